@@ -1,13 +1,63 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy.stats import linregress
+import argparse
+import sqlite3
+import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from PIL import Image, ImageTk
 import webbrowser  # Import for opening URLs
+import threading
+import time
+
+# Only light modules are imported at startup: pandas and scipy load with the
+# first file/fit, matplotlib (cv_plots) with the first graph, PIL after the
+# window is on screen
+import cv_analysis
+import cv_bootstrap
+import cv_cache
+import cv_doping
+import cv_profiles
+import cv_results
+import cv_robust
+import cv_trace
+from cv_trace import stage
+
+
+class TaskCancelled(Exception):
+    """Raised inside a background task once the user has cancelled it"""
+
+
+class BackgroundTask:
+    """Run a function on a daemon thread and hand its outcome back to the Tk loop"""
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.cancel_event = threading.Event()
+        self.stage = "Working"
+        self.result = None
+        self.error = None
+        self.done = False
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, args=(func, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, func, args):
+        try:
+            self.result = func(self, *args)
+        except BaseException as e:
+            self.error = e
+        self.done = True
+
+    def set_stage(self, stage):
+        """Report progress from the worker; raises TaskCancelled if the task was cancelled"""
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+        self.stage = stage
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
 
 
 class CVAnalysisApp:
@@ -16,15 +66,60 @@ class CVAnalysisApp:
         self.root.title("DEPLETION WIDTH CALCULATION SETUP OF HETEROJUNCTION DIODE")
         self.root.geometry("900x750")
 
+        # Material and device profiles (the built-in ones if the profiles file is unreadable)
+        try:
+            self.profiles = cv_profiles.Profiles.load()
+        except cv_profiles.ProfileError as e:
+            print(f"Profiles file ignored: {e}")
+            self.profiles = cv_profiles.Profiles()
+
         # Constants
-        self.q = 1.6e-19  # elementary charge (C)
-        self.eps_0 = 8.85e-12  # vacuum permittivity (F/m)
-        self.eps_r = 11.7  # relative permittivity for Silicon
+        self.q = cv_analysis.Q  # elementary charge (C)
+        self.eps_0 = cv_analysis.EPS_0  # vacuum permittivity (F/m)
+        self.eps_r, self.A = self.profiles.resolve()  # relative permittivity, junction area in m²
         self.eps_s = self.eps_r * self.eps_0  # semiconductor permittivity
-        self.A = 1e-6  # junction area in m²
+
+        # Background work currently in flight (at most one)
+        self.task = None
+
+        # On-disk cache of parsed sweeps (optional; loading works without it)
+        try:
+            self.sweep_cache = cv_cache.SweepCache()
+        except OSError as e:
+            print(f"Sweep cache disabled: {e}")
+            self.sweep_cache = None
+
+        # Database of every analysis run (optional as well)
+        try:
+            self.results_store = cv_results.ResultsStore()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Results database disabled: {e}")
+            self.results_store = None
+
+        # Persistent graph views, refreshed only when plot_version changes
+        self.graph_views = {}
+        self.current_view = None
+        self.plot_version = 0
+
+        # Prefix sums of the loaded sweep for live refits while dragging the fit window
+        self.window_fitter = None
+        self.drag_latencies = []
+
+        # Differential C-V doping profile of the loaded sweep
+        self.profile = None
+
+        # Bootstrap confidence intervals of the current fit (None when off or stale)
+        self.uncertainty = None
+
+        # Start of the current operation in the stage trace (see cv_trace, enabled with --trace)
+        self.trace_mark = 0
+        self.trace_load = False
 
         # Variables to store analysis results
         self.df = None
+        self.file_path = None
+        self.file_hash = None
+        self.result = None
         self.V_bi = None
         self.V_bi_mod = None
         self.N_A = None
@@ -32,10 +127,13 @@ class CVAnalysisApp:
         self.slope = None
         self.intercept = None
         self.r_value = None
+        self.std_err = None
 
         # Default voltage range for linear regression
-        self.min_v = -5.0
-        self.max_v = -1.0
+        self.min_v = cv_analysis.MIN_V
+        self.max_v = cv_analysis.MAX_V
+        # The window to go back to when Auto Fit Window is unticked (--min-v/--max-v or the last dragged one)
+        self.manual_window = (self.min_v, self.max_v)
 
         # Create GUI elements
         self.create_widgets()
@@ -45,16 +143,9 @@ class CVAnalysisApp:
         heading_frame = ttk.Frame(self.root)
         heading_frame.pack(fill=tk.X, pady=5)
 
-        # Load and display logo image
-        try:
-            logo_img = Image.open(r"C:\Users\ankur\Downloads\DATA - Python project Heterojunction\jiitlogo.png")
-            logo_img = logo_img.resize((150, 150))  # Adjust size as needed
-            self.logo_photo = ImageTk.PhotoImage(logo_img)
-
-            logo_label = ttk.Label(heading_frame, image=self.logo_photo)
-            logo_label.pack(side=tk.LEFT, padx=10)
-        except Exception as e:
-            print(f"Error loading logo: {e}")
+        # Logo image (filled in by load_images once the window is shown)
+        self.logo_label = ttk.Label(heading_frame)
+        self.logo_label.pack(side=tk.LEFT, padx=10)
 
         # Application heading (moved to heading_frame)
         heading_label = ttk.Label(
@@ -72,6 +163,11 @@ class CVAnalysisApp:
         self.load_button = ttk.Button(control_frame, text="Load CSV Data", command=self.load_data)
         self.load_button.pack(side=tk.LEFT, padx=5)
 
+        # Cancel button for background loading/analysis
+        self.cancel_button = ttk.Button(control_frame, text="Cancel", command=self.cancel_task)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button["state"] = "disabled"
+
         # Show calculation results button
         self.show_results_button = ttk.Button(control_frame, text="Show Calculation Results",
                                               command=self.show_calculation_results)
@@ -90,6 +186,32 @@ class CVAnalysisApp:
         self.show_properties_button.pack(side=tk.LEFT, padx=5)
         self.show_properties_button["state"] = "disabled"
 
+        # Export saved results button
+        self.export_button = ttk.Button(control_frame, text="Export Results", command=self.export_results)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        if self.results_store is None:
+            self.export_button["state"] = "disabled"
+
+        # Auto fit window toggle
+        self.auto_window_var = tk.BooleanVar(value=False)
+        self.auto_window_check = ttk.Checkbutton(control_frame, text="Auto Fit Window",
+                                                 variable=self.auto_window_var, command=self.on_auto_window_toggled)
+        self.auto_window_check.pack(side=tk.LEFT, padx=5)
+
+        # Fit engine for the 1/C² regression
+        ttk.Label(control_frame, text="Fit:").pack(side=tk.LEFT)
+        self.fit_method_var = tk.StringVar(value=cv_robust.FIT_METHODS["ols"])
+        self.fit_method_combo = ttk.Combobox(control_frame, textvariable=self.fit_method_var, state="readonly",
+                                             values=list(cv_robust.FIT_METHODS.values()), width=24)
+        self.fit_method_combo.bind("<<ComboboxSelected>>", lambda event: self.df is not None and self.analyze_data())
+        self.fit_method_combo.pack(side=tk.LEFT, padx=5)
+
+        # Bootstrap confidence intervals toggle
+        self.ci_var = tk.BooleanVar(value=False)
+        self.ci_check = ttk.Checkbutton(control_frame, text="Confidence Intervals", variable=self.ci_var,
+                                        command=self.update_uncertainty)
+        self.ci_check.pack(side=tk.LEFT, padx=5)
+
         # Add button to open URL - project principles
         self.principle_button = tk.Button(
             control_frame,
@@ -112,17 +234,32 @@ class CVAnalysisApp:
         )
         self.linkedin_button.pack(side=tk.LEFT, padx=10)
 
-        # Add junction diagram after the control buttons
-        try:
-            junction_img = Image.open(r"C:\Users\ankur\Downloads\DATA - Python project Heterojunction\junction.png")
-            junction_img = junction_img.resize((350, 250), Image.LANCZOS)  # High-quality resize
-            self.junction_photo = ImageTk.PhotoImage(junction_img)
-
-            # Use tk.Label instead of ttk.Label
-            junction_label = tk.Label(self.root, image=self.junction_photo)
-            junction_label.pack(pady=10)
-        except Exception as e:
-            print(f"Error loading junction diagram: {e}")
+        # Material and device profile selection
+        profile_frame = ttk.Frame(self.root, padding=(10, 0))
+        profile_frame.pack(fill=tk.X)
+
+        ttk.Label(profile_frame, text="Device:").pack(side=tk.LEFT)
+        self.device_var = tk.StringVar(value=cv_profiles.DEFAULT_DEVICE)
+        self.device_combo = ttk.Combobox(profile_frame, textvariable=self.device_var, state="readonly",
+                                         values=list(self.profiles.devices), width=24)
+        self.device_combo.bind("<<ComboboxSelected>>", lambda event: self.on_device_selected())
+        self.device_combo.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(profile_frame, text="Material:").pack(side=tk.LEFT)
+        self.material_var = tk.StringVar(value=self.profiles.device(cv_profiles.DEFAULT_DEVICE)["material"])
+        self.material_combo = ttk.Combobox(profile_frame, textvariable=self.material_var, state="readonly",
+                                           values=list(self.profiles.materials), width=12)
+        self.material_combo.bind("<<ComboboxSelected>>", lambda event: self.on_material_selected())
+        self.material_combo.pack(side=tk.LEFT, padx=5)
+
+        self.constants_label = ttk.Label(profile_frame)
+        self.constants_label.pack(side=tk.LEFT, padx=5)
+        self.update_constants_label()
+
+        # Add junction diagram after the control buttons (image filled in by load_images)
+        # Use tk.Label instead of ttk.Label
+        self.junction_label = tk.Label(self.root)
+        self.junction_label.pack(pady=10)
 
         # Results frame (initially hidden)
         self.results_frame = ttk.LabelFrame(self.root, text="Calculation Results", padding="10")
@@ -143,6 +280,12 @@ class CVAnalysisApp:
         self.r_squared_label = ttk.Label(self.results_frame, text="R² Value: ")
         self.r_squared_label.grid(row=4, column=0, sticky=tk.W, padx=5, pady=2)
 
+        self.std_err_label = ttk.Label(self.results_frame, text="Slope Std. Error: ")
+        self.std_err_label.grid(row=5, column=0, sticky=tk.W, padx=5, pady=2)
+
+        self.ci_label = ttk.Label(self.results_frame, text="", justify=tk.LEFT)
+        self.ci_label.grid(row=6, column=0, sticky=tk.W, padx=5, pady=2)
+
         # Steps frame (initially hidden)
         self.steps_frame = ttk.LabelFrame(self.root, text="Calculation Steps", padding="10")
 
@@ -181,6 +324,10 @@ class CVAnalysisApp:
         self.all_button = ttk.Button(graph_buttons_frame, text="All Graphs", command=lambda: self.show_graph("all"))
         self.all_button.grid(row=0, column=3, padx=5, pady=5)
 
+        self.profile_button = ttk.Button(graph_buttons_frame, text="N vs. W Profile",
+                                         command=lambda: self.show_graph("profile"))
+        self.profile_button.grid(row=0, column=4, padx=5, pady=5)
+
         # Frame for the graph
         self.graph_frame = ttk.Frame(self.root, padding="10")
         self.graph_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -194,6 +341,33 @@ class CVAnalysisApp:
         # Disable buttons initially
         self.toggle_buttons(False)
 
+        # Decode the images after the first paint so the window appears without waiting for PIL
+        self.root.after(10, self.load_images)
+
+    def load_images(self):
+        """Load the logo and junction diagram"""
+        from PIL import Image, ImageTk
+
+        # Load and display logo image
+        try:
+            logo_img = Image.open(r"C:\Users\ankur\Downloads\DATA - Python project Heterojunction\jiitlogo.png")
+            logo_img = logo_img.resize((150, 150))  # Adjust size as needed
+            self.logo_photo = ImageTk.PhotoImage(logo_img)
+            self.logo_label.config(image=self.logo_photo)
+        except Exception as e:
+            self.logo_label.pack_forget()
+            print(f"Error loading logo: {e}")
+
+        # Load junction diagram
+        try:
+            junction_img = Image.open(r"C:\Users\ankur\Downloads\DATA - Python project Heterojunction\junction.png")
+            junction_img = junction_img.resize((350, 250), Image.LANCZOS)  # High-quality resize
+            self.junction_photo = ImageTk.PhotoImage(junction_img)
+            self.junction_label.config(image=self.junction_photo)
+        except Exception as e:
+            self.junction_label.pack_forget()
+            print(f"Error loading junction diagram: {e}")
+
     # Function to open the LinkedIn URL
     def open_linkedin_url(self):
         """Open the LinkedIn profile URL in the default web browser"""
@@ -210,13 +384,52 @@ class CVAnalysisApp:
 
     def toggle_buttons(self, state):
         """Enable or disable all interactive buttons"""
-        for button in [self.inv_c2_button, self.c_button, self.g_button, self.all_button,
+        for button in [self.inv_c2_button, self.c_button, self.g_button, self.all_button, self.profile_button,
                        self.show_results_button, self.show_steps_button, self.show_properties_button]:
             if state:
                 button["state"] = "normal"
             else:
                 button["state"] = "disabled"
 
+    def run_in_background(self, message, func, args, on_done, on_error):
+        """Run func(task, *args) off the Tk loop and call on_done/on_error with its outcome"""
+        # A new task supersedes whatever is still running
+        if self.task is not None:
+            self.task.cancel()
+
+        self.task = BackgroundTask(func, *args)
+        self.cancel_button["state"] = "normal"
+        self.poll_task(self.task, message, on_done, on_error)
+
+    def poll_task(self, task, message, on_done, on_error, tick=0):
+        """Show task progress in the status bar until it finishes, then marshal its result"""
+        if task is not self.task:
+            return
+
+        if not task.done:
+            spinner = "|/-\\"[tick % 4]
+            self.status_var.set(f"{message} {spinner} {task.stage}... ({task.elapsed:.1f} s)")
+            self.root.after(50, self.poll_task, task, message, on_done, on_error, tick + 1)
+            return
+
+        self.task = None
+        self.cancel_button["state"] = "disabled"
+
+        if isinstance(task.error, TaskCancelled) or task.cancel_event.is_set():
+            self.status_var.set("Cancelled.")
+        elif task.error is not None:
+            on_error(task.error)
+        else:
+            on_done(task.result)
+
+    def cancel_task(self):
+        """Cancel the running background task; its result will be discarded"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+            self.status_var.set("Cancelled.")
+        self.cancel_button["state"] = "disabled"
+
     def load_data(self):
         """Load CSV data"""
         file_path = filedialog.askopenfilename(
@@ -227,109 +440,399 @@ class CVAnalysisApp:
         if not file_path:
             return
 
-        try:
-            self.df = pd.read_csv(file_path)
-            self.status_var.set(f"Loaded {file_path}")
+        self.load_file(file_path)
+
+    def load_file(self, file_path):
+        """Load and analyze a sweep file in the background"""
+        self.trace_mark = cv_trace.tracer.mark()
+        self.run_in_background(f"Loading {file_path}", self.load_worker, (file_path, self.sweep_cache),
+                               lambda loaded: self.on_data_loaded(file_path, *loaded), self.on_load_error)
+
+    @staticmethod
+    def load_worker(task, file_path, cache=None):
+        """Parse a sweep file and extract its device properties (runs off the Tk loop)"""
+        task.set_stage("Parsing")
+        df, device_properties = cv_analysis.load_sweep(file_path, cache)
+
+        task.set_stage("Hashing")
+        with stage("hash"):
+            digest = cv_results.file_hash(file_path)
+
+        # Warm up matplotlib here rather than on the Tk thread at the first graph
+        task.set_stage("Loading plotting")
+        with stage("import plotting"):
+            import cv_plots  # noqa: F401
+
+        task.set_stage("Done")
+        return df, device_properties, digest
+
+    def on_data_loaded(self, file_path, df, device_properties, digest):
+        """Install a freshly loaded sweep and start its analysis"""
+        # The previous file's fit must not be dragged, refitted or saved under the new file
+        self.clear_fit()
+        self.df = df
+        self.device_properties = device_properties
+        self.file_path = file_path
+        self.file_hash = digest
+        self.status_var.set(f"Loaded {file_path}")
+        # Report loading and the analysis it starts as one traced operation
+        self.trace_load = True
+
+        messagebox.showinfo("Data Loaded", f"Successfully loaded {len(self.df)} data points.")
+        self.analyze_data()  # Run analysis automatically
+
+    def on_load_error(self, error):
+        if isinstance(error, cv_analysis.MissingColumnsError):
+            messagebox.showerror("Missing Columns", str(error))
+        else:
+            messagebox.showerror("Error", f"Failed to load data: {str(error)}")
+        self.df = None
+        self.clear_fit()
+        self.status_var.set("Ready. Load a CSV file to begin.")
 
-            # Clean column names
-            self.df.columns = self.df.columns.str.strip()
+    def analyze_data(self):
+        """Perform CV analysis on the loaded data"""
+        if self.df is None:
+            messagebox.showwarning("No Data", "Please load a CSV file first.")
+            return
 
-            # Verify required columns
-            required_cols = ["VBias", "C", "G"]
-            missing_cols = [col for col in required_cols if col not in self.df.columns]
+        if not self.trace_load:
+            self.trace_mark = cv_trace.tracer.mark()
+        self.trace_load = False
+        self.run_in_background("Analyzing", self.analysis_worker,
+                               (self.df, self.min_v, self.max_v, self.eps_r, self.A, self.auto_window_var.get(),
+                                self.fit_method, self.fit_frequency()),
+                               self.on_analysis_done, self.on_analysis_failed)
+
+    def on_auto_window_toggled(self):
+        """Re-analyze with the automatic window, or back on the manual one, once a file is loaded"""
+        if not self.auto_window_var.get():
+            self.min_v, self.max_v = self.manual_window
+        if self.df is not None:
+            self.analyze_data()
+
+    @property
+    def fit_method(self):
+        """Key of the fit engine selected in the combobox (see cv_robust.FIT_METHODS)"""
+        label = self.fit_method_var.get()
+        return next((key for key, name in cv_robust.FIT_METHODS.items() if name == label), "ols")
+
+    def fit_frequency(self):
+        """Sweep frequency for the G-weighted fit (None for every other engine)"""
+        if self.fit_method != "wls-g":
+            return None
+        return cv_analysis.sweep_frequency(self.device_properties)
+
+    @staticmethod
+    def analysis_worker(task, df, min_v, max_v, eps_r, A, auto_window, method="ols", frequency=None):
+        """Fit 1/C² vs V for the loaded sweep (runs off the Tk loop)"""
+        task.set_stage("Indexing sweep")
+        with stage("index sweep"):
+            fitter = cv_analysis.WindowFitter(df['VBias'], df['1/C^2'], eps_r, A)
+
+        if auto_window:
+            # Replace the fit window with the most linear region of 1/C²
+            # The search is O(n²): report progress through set_stage so that Cancel stops it
+            with stage("window search"):
+                min_v, max_v = cv_analysis.find_linear_window(
+                    fitter, None, progress=lambda done: task.set_stage(f"Searching fit window ({done:.0%})"))
+
+        task.set_stage("Fitting 1/C²")
+        result = cv_analysis.analyze_sweep(df, min_v, max_v, eps_r, A, method=method, frequency=frequency)
+
+        task.set_stage("Doping profile")
+        V, C = df['VBias'].to_numpy(), df['C'].to_numpy()
+        with stage("doping profile"):
+            try:
+                profile = cv_doping.doping_profile(V, C, eps_r, A)
+            except cv_analysis.AnalysisError:
+                # Non-uniform bias steps: fall back to the smoothed gradient
+                try:
+                    profile = cv_doping.doping_profile(V, C, eps_r, A, method="gradient")
+                except cv_analysis.AnalysisError:
+                    profile = None
+        return result, fitter, profile
+
+    def on_analysis_done(self, outcome):
+        """Show the analysis results (runs on the Tk loop)"""
+        result, self.window_fitter, self.profile = outcome
+        self.uncertainty = None
+        if (result.eps_s, result.A) != (self.eps_s, self.A):
+            # εr or the area was switched while the analysis ran
+            result = result.with_constants(self.eps_r, self.A)
+            self.window_fitter.eps_s, self.window_fitter.A = self.eps_s, self.A
+            if self.profile is not None:
+                self.profile = self.profile.with_constants(self.eps_r, self.A)
+        try:
+            self.show_results(result)
+            self.save_result()
 
-            if missing_cols:
-                messagebox.showerror("Missing Columns",
-                                     f"The following required columns are missing: {', '.join(missing_cols)}")
-                self.df = None
-                return
+            # Enable buttons
+            self.toggle_buttons(True)
 
-            # Calculate 1/C²
-            self.df['1/C^2'] = 1 / (self.df['C'] ** 2)
+            # Show all graphs by default
+            self.plot_version += 1
+            self.show_graph("all")
 
-            # Extract device properties
-            self.extract_device_properties()
+            self.status_var.set(self.with_trace(
+                f"Analysis completed successfully. {result.n_points} points used for linear regression."))
 
-            messagebox.showinfo("Data Loaded", f"Successfully loaded {len(self.df)} data points.")
-            self.analyze_data()  # Run analysis automatically
+            if self.ci_var.get():
+                self.update_uncertainty()
 
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load data: {str(e)}")
-            self.df = None
+            self.on_analysis_failed(e)
 
-    def extract_device_properties(self):
-        """Extract device properties from loaded CSV"""
-        self.device_properties = {}
-
-        # Properties to extract
-        property_columns = ["Record Time", "Monitor Unit", "Frequency", "Batch ID", "Record Date"]
+    def update_uncertainty(self):
+        """Bootstrap confidence intervals for the current fit window in the background"""
+        self.uncertainty = None
+        if self.df is None or self.slope is None or not self.ci_var.get():
+            self.show_uncertainty()
+            return
 
-        # Check for each property column
-        for prop in property_columns:
-            try:
-                if prop in self.df.columns:
-                    # Get first non-null value for the property
-                    values = self.df[prop].dropna()
-                    if len(values) > 0:
-                        self.device_properties[prop] = values.iloc[0]
-                    else:
-                        self.device_properties[prop] = "N/A"
-                else:
-                    self.device_properties[prop] = "N/A"
-            except:
-                self.device_properties[prop] = "N/A"
-
-        # Add additional calculated properties
-        self.device_properties["Number of Data Points"] = len(self.df)
-        self.device_properties["Voltage Range"] = f"{self.df['VBias'].min():.2f} V to {self.df['VBias'].max():.2f} V"
+        self.run_in_background("Bootstrapping", self.uncertainty_worker,
+                               (self.df, self.min_v, self.max_v, self.eps_r, self.A),
+                               self.on_uncertainty_done, self.on_analysis_error)
+
+    @staticmethod
+    def uncertainty_worker(task, df, min_v, max_v, eps_r, A):
+        """Resample the fit window (runs off the Tk loop)"""
+        return cv_bootstrap.bootstrap_fit(
+            df['VBias'].to_numpy(), df['1/C^2'].to_numpy(), min_v, max_v, eps_r=eps_r, A=A,
+            progress=lambda done: task.set_stage(f"{cv_bootstrap.N_RESAMPLES} resamples ({done:.0%})"))
+
+    def on_uncertainty_done(self, uncertainty):
+        self.uncertainty = uncertainty
+        self.show_uncertainty()
+        self.status_var.set(f"{uncertainty.n_resamples} bootstrap resamples of the fit window done.")
+
+    def show_uncertainty(self):
+        """Refresh the confidence interval label and calculation steps"""
+        if self.uncertainty is None:
+            self.ci_label.config(text="")
+        else:
+            level = f"{self.uncertainty.confidence * 100:g}%"
+            v_low, v_high = self.uncertainty.ci["V_bi"]
+            n_low, n_high = self.uncertainty.ci["N_A"]
+            w_low, w_high = self.uncertainty.ci["W"]
+            self.ci_label.config(text=f"{level} CI ({self.bootstrap_label}, {self.uncertainty.n_resamples} "
+                                      f"resamples):\n"
+                                      f"  V_bi: {v_low:.4f} V to {v_high:.4f} V\n"
+                                      f"  N_A: {n_low:.4e} m⁻³ to {n_high:.4e} m⁻³\n"
+                                      f"  W: {w_low:.4f} nm to {w_high:.4f} nm")
+        self.refresh_calculation_steps()
+
+    @property
+    def bootstrap_label(self):
+        """The intervals always resample OLS fits; say so next to a robust point estimate"""
+        if self.result is None or self.result.method == "ols":
+            return "bootstrap"
+        return f"OLS bootstrap, not {cv_robust.FIT_METHODS[self.result.method]}"
+
+    def show_results(self, result):
+        """Store a fit result and refresh the results labels and calculation steps"""
+        self.result = result
+        self.min_v, self.max_v = result.min_v, result.max_v
+        self.slope, self.intercept, self.r_value = result.slope, result.intercept, result.r_value
+        self.std_err = result.std_err
+        self.V_bi, self.V_bi_mod, self.N_A, self.W = result.V_bi, result.V_bi_mod, result.N_A, result.W
+
+        # Update results display
+        self.v_bi_label.config(text=f"Built-in Potential (V_bi): {self.V_bi:.4f} V")
+        self.v_bi_mod_label.config(text=f"|V_bi|: {self.V_bi_mod:.4f} V")
+        self.n_a_label.config(text=f"Carrier Concentration (N_A): {self.N_A:.4e} m⁻³ = {self.N_A / 1e6:.4e} cm⁻³")
+        self.w_label.config(text=f"Depletion Width (W): {self.W:.4f} nm")
+        self.r_squared_label.config(text=f"R² Value: {self.r_value ** 2:.4f}")
+        self.std_err_label.config(text=f"Slope Std. Error: {self.std_err:.4e}")
+
+        # Intervals belong to the previous window until they are recomputed
+        self.uncertainty = None
+        self.ci_label.config(text="")
+        self.refresh_calculation_steps()
+
+    def refresh_calculation_steps(self):
+        # Prepare calculation steps text
+        self.prepare_calculation_steps()
+        if self.steps_frame.winfo_ismapped():
+            self.steps_text.config(state=tk.NORMAL)
+            self.steps_text.delete(1.0, tk.END)
+            self.steps_text.insert(tk.END, self.calculation_steps)
+            self.steps_text.config(state=tk.DISABLED)
 
-    def analyze_data(self):
-        """Perform CV analysis on the loaded data"""
-        if self.df is None:
-            messagebox.showwarning("No Data", "Please load a CSV file first.")
+    def use_profiles(self, profiles, device=None, material=None, eps_r=None, A=None):
+        """Offer another set of profiles and select a device/material (explicit εr or area win)"""
+        self.profiles = profiles
+        self.device_combo["values"] = list(profiles.devices)
+        self.material_combo["values"] = list(profiles.materials)
+        self.device_var.set(device or cv_profiles.DEFAULT_DEVICE)
+        self.material_var.set(material or profiles.device(self.device_var.get())["material"])
+        self.set_constants(*profiles.resolve(device, material, eps_r, A))
+
+    def update_constants_label(self):
+        self.constants_label.config(text=f"εr = {self.eps_r:g}, A = {self.A:g} m²")
+
+    def on_device_selected(self):
+        device = self.profiles.device(self.device_var.get())
+        self.material_var.set(device["material"])
+        self.set_constants(self.profiles.eps_r(device["material"]), device["area"])
+
+    def on_material_selected(self):
+        self.set_constants(self.profiles.eps_r(self.material_var.get()), self.A)
+
+    def set_constants(self, eps_r, A):
+        """Switch εr and the junction area, re-deriving N_A and W from the current fit without refitting"""
+        self.eps_r, self.A = eps_r, A
+        self.eps_s = eps_r * self.eps_0
+        self.update_constants_label()
+        if self.window_fitter is not None:
+            self.window_fitter.eps_s, self.window_fitter.A = self.eps_s, A
+        # A running analysis is rescaled by on_analysis_done; a running bootstrap is restarted below
+        if self.result is None or (self.task is not None and self.task.func is self.analysis_worker):
             return
 
+        if self.profile is not None:
+            self.profile = self.profile.with_constants(eps_r, A)
+        self.show_results(self.result.with_constants(eps_r, A))
+        self.plot_version += 1
+        self.show_graph(self.current_view.graph_type if self.current_view is not None else "all")
+        self.status_var.set(f"N_A and W re-derived for εr = {eps_r:g}, A = {A:g} m².")
+        if self.ci_var.get():
+            self.update_uncertainty()
+
+    def on_window_drag(self, low, high):
+        """Refit live while a new fit window is dragged on the 1/C² plot"""
+        if self.window_fitter is None or self.task is not None:
+            return False
+
+        start = time.perf_counter()
         try:
-            # Select linear region for regression
-            steep_region = self.df[(self.df['VBias'] >= self.min_v) & (self.df['VBias'] <= self.max_v)]
-
-            if len(steep_region) < 2:
-                messagebox.showerror("Error", "Not enough data points in the selected voltage range.")
-                return
-
-            V_steep = steep_region['VBias']
-            invC2_steep = steep_region['1/C^2']
+            result = self.window_fitter.fit(low, high)
+        except cv_analysis.AnalysisError:
+            return False
+
+        self.show_results(result)
+        self.current_view.blit_fit(result.min_v, result.max_v, result.slope, result.intercept,
+                                   result.r_value, result.V_bi)
+
+        latency = time.perf_counter() - start
+        self.drag_latencies.append(latency)
+        self.status_var.set(f"Fit window {result.min_v:.2f} V to {result.max_v:.2f} V: "
+                            f"R² = {result.r_squared:.4f} (refit + redraw {latency * 1000:.1f} ms)")
+        return True
+
+    def on_window_release(self, low, high):
+        """Keep the dragged window as the new fit window"""
+        if not self.on_window_drag(low, high):
+            self.current_view.blit_overlay()
+            self.drag_latencies = []
+            return
 
-            # Linear regression
-            self.slope, self.intercept, self.r_value, p_value, std_err = linregress(V_steep, invC2_steep)
+        # A hand-picked window overrides the automatic search
+        self.auto_window_var.set(False)
+        self.manual_window = (self.min_v, self.max_v)
+        latencies = self.drag_latencies
+        self.drag_latencies = []
+
+        # The live preview is an OLS refit; fit the kept window with the selected engine off the Tk loop
+        if self.fit_method != "ols":
+            self.trace_mark = cv_trace.tracer.mark()
+            self.run_in_background("Refitting", self.analysis_worker,
+                                   (self.df, self.min_v, self.max_v, self.eps_r, self.A, False, self.fit_method,
+                                    self.fit_frequency()),
+                                   self.on_analysis_done, self.on_refit_failed)
+            return
 
-            # Extract parameters
-            self.V_bi = -self.intercept / self.slope
-            self.V_bi_mod = abs(self.V_bi)
-            self.N_A = 2 / (self.q * self.eps_s * self.A ** 2 * self.slope)
-            self.W = np.sqrt(2 * self.eps_s * self.V_bi_mod / (self.q * self.N_A)) * 1e9  # nm
+        self.save_result()
+        self.plot_version += 1
+        self.show_graph(self.current_view.graph_type)
 
-            # Update results display
-            self.v_bi_label.config(text=f"Built-in Potential (V_bi): {self.V_bi:.4f} V")
-            self.v_bi_mod_label.config(text=f"|V_bi|: {self.V_bi_mod:.4f} V")
-            self.n_a_label.config(text=f"Carrier Concentration (N_A): {self.N_A:.4e} m⁻³ = {self.N_A / 1e6:.4e} cm⁻³")
-            self.w_label.config(text=f"Depletion Width (W): {self.W:.4f} nm")
-            self.r_squared_label.config(text=f"R² Value: {self.r_value ** 2:.4f}")
+        self.status_var.set(
+            f"Fit window set to {self.min_v:.2f} V to {self.max_v:.2f} V. Drag latency over {len(latencies)} "
+            f"events: mean {sum(latencies) / len(latencies) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
 
-            # Prepare calculation steps text
-            self.prepare_calculation_steps()
+        if self.ci_var.get():
+            self.update_uncertainty()
 
-            # Enable buttons
-            self.toggle_buttons(True)
+    def save_result(self):
+        """Add the current fit to the results database"""
+        if self.results_store is None or self.result is None:
+            return
+        try:
+            with stage("save result"):
+                self.results_store.add(self.file_path, self.device_properties, self.result, self.eps_r,
+                                       self.file_hash)
+        except sqlite3.Error as e:
+            print(f"Result not saved: {e}")
+
+    def export_results(self):
+        """Export every saved result to CSV, XLSX or Parquet"""
+        output_path = filedialog.asksaveasfilename(
+            title="Export Results",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("Parquet files", "*.parquet")]
+        )
+        if not output_path:
+            return
 
-            # Show all graphs by default
-            self.show_graph("all")
+        # The export reads the database on its own connection, so it runs beside the current task
+        # instead of superseding it like run_in_background would
+        self.export_button["state"] = "disabled"
+        self.poll_export(BackgroundTask(self.export_worker, self.results_store.db_path, output_path), output_path)
 
-            self.status_var.set(
-                f"Analysis completed successfully. {len(steep_region)} points used for linear regression.")
+    def poll_export(self, task, output_path):
+        """Wait for an export on the Tk loop and report its outcome"""
+        if not task.done:
+            self.root.after(100, self.poll_export, task, output_path)
+            return
 
-        except Exception as e:
-            messagebox.showerror("Analysis Error", f"Error during analysis: {str(e)}")
+        self.export_button["state"] = "normal"
+        if task.error is not None:
+            messagebox.showerror("Export Error", f"Failed to export results: {task.error}")
+        else:
+            self.status_var.set(f"Exported {task.result} results to {output_path}")
+
+    @staticmethod
+    def export_worker(task, db_path, output_path):
+        """Stream the results database to a file (runs off the Tk loop on its own connection)"""
+        task.set_stage("Writing")
+        with cv_results.ResultsStore(db_path) as store:
+            return store.export(output_path)
+
+    def clear_fit(self):
+        """Forget the current fit and disable everything that acts on it"""
+        self.result = None
+        self.window_fitter = None
+        self.profile = None
+        self.uncertainty = None
+        self.slope = self.intercept = self.r_value = self.std_err = None
+        self.V_bi = self.V_bi_mod = self.N_A = self.W = None
+        self.toggle_buttons(False)
+        self.hide_info_frames()
+        if self.current_view is not None:
+            self.current_view.hide()
+            self.current_view = None
+
+    def on_analysis_failed(self, error):
+        """An analysis of the loaded sweep failed: its file has no fit to show, drag or save"""
+        self.clear_fit()
+        self.on_analysis_error(error)
+
+    def on_refit_failed(self, error):
+        """The selected engine could not fit a dragged window: keep the OLS preview and select OLS to match"""
+        self.fit_method_var.set(cv_robust.FIT_METHODS["ols"])
+        self.save_result()
+        self.plot_version += 1
+        self.show_graph(self.current_view.graph_type)
+        self.on_analysis_error(error)
+        if self.ci_var.get():
+            self.update_uncertainty()
+
+    def on_analysis_error(self, error):
+        if isinstance(error, cv_analysis.AnalysisError):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Analysis Error", f"Error during analysis: {str(error)}")
+        self.status_var.set("Analysis failed.")
 
     def prepare_calculation_steps(self):
         """Prepare the calculation steps text"""
@@ -337,7 +840,7 @@ class CVAnalysisApp:
 1. Plotting C-V Characteristics:
    - Generated 1/C² vs. V plot
    - Selected voltage range: {self.min_v} V to {self.max_v} V
-   - Linear regression performed on selected range
+   - {cv_robust.FIT_METHODS[self.result.method]} regression performed on selected range
    - Found linear relationship: 1/C² = {self.slope:.4e} × V + {self.intercept:.4e}
    - R² value: {self.r_value ** 2:.4f}
 
@@ -351,6 +854,15 @@ class CVAnalysisApp:
    - Using formula: W = √(2εs|V_bi|/(q × N_A))
    - W = √(2 × {self.eps_s} × {self.V_bi_mod})/({self.q} × {self.N_A})
    - W = {self.W:.4f} nm (with V_ext = 0)
+"""
+        if self.uncertainty is not None:
+            u = self.uncertainty
+            steps += f"""
+4. Bootstrap Uncertainty ({u.method} resampling of the OLS fit, {u.n_resamples} resamples, {u.confidence * 100:g}% CI):
+   - Slope: {u.ci['slope'][0]:.4e} to {u.ci['slope'][1]:.4e} (std {u.std['slope']:.4e}, linregress std err {self.std_err:.4e})
+   - V_bi: {u.ci['V_bi'][0]:.4f} V to {u.ci['V_bi'][1]:.4f} V
+   - N_A: {u.ci['N_A'][0]:.4e} m⁻³ to {u.ci['N_A'][1]:.4e} m⁻³
+   - W: {u.ci['W'][0]:.4f} nm to {u.ci['W'][1]:.4f} nm
 """
         self.calculation_steps = steps
 
@@ -409,104 +921,96 @@ class CVAnalysisApp:
         if self.properties_frame.winfo_ismapped():
             self.properties_frame.pack_forget()
 
-    def clear_graph_frame(self):
-        """Clear the current graph"""
-        for widget in self.graph_frame.winfo_children():
-            widget.destroy()
-
     def show_graph(self, graph_type):
         """Display the selected graph"""
         if self.df is None:
             return
 
-        self.clear_graph_frame()
-
-        if graph_type == "all":
-            fig = Figure(figsize=(7, 8), dpi=100)
-
-            # 1/C² vs V plot
-            ax1 = fig.add_subplot(311)
-            self.plot_inv_c2(ax1)
-
-            # C vs V plot
-            ax2 = fig.add_subplot(312)
-            self.plot_c(ax2)
+        import cv_plots
+
+        # Each view keeps one figure/canvas for the lifetime of the app
+        view = self.graph_views.get(graph_type)
+        if view is None:
+            with stage("figure setup"):
+                view = self.graph_views[graph_type] = cv_plots.SweepPlot(self.graph_frame, graph_type,
+                                                                         self.on_window_drag, self.on_window_release)
+
+        if self.current_view is not view:
+            if self.current_view is not None:
+                self.current_view.hide()
+            view.show()
+            self.current_view = view
+
+        with stage("plot"):
+            view.update(self.plot_version, self.df['VBias'].to_numpy(), self.df['C'].to_numpy(),
+                        self.df['G'].to_numpy(), self.df['1/C^2'].to_numpy(), self.min_v, self.max_v,
+                        self.slope, self.intercept, self.r_value, self.V_bi, self.profile)
+
+    def with_trace(self, message):
+        """Append the stage timings of the current operation to a status message when tracing is on"""
+        if not cv_trace.tracer.enabled:
+            return message
+        return f"{message} [{cv_trace.tracer.summary(self.trace_mark)}]"
+
+
+def print_results(file_path, min_v, max_v, auto_window, method="ols", eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA):
+    """Analyze one file without a window and print the extracted parameters"""
+    try:
+        device_properties, result = cv_analysis.analyze_file(file_path, min_v, max_v, eps_r, A, auto_window,
+                                                             method=method)
+    except (OSError, cv_analysis.AnalysisError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"File: {file_path}")
+    print(f"Batch ID: {device_properties['Batch ID']}   Frequency: {device_properties['Frequency']}")
+    print(f"Fit window: {result.min_v} V to {result.max_v} V ({result.n_points} points, "
+          f"{cv_robust.FIT_METHODS[result.method]})")
+    print(f"Constants: εr = {eps_r:g}, A = {A:g} m²")
+    print(f"Built-in Potential (V_bi): {result.V_bi:.4f} V")
+    print(f"|V_bi|: {result.V_bi_mod:.4f} V")
+    print(f"Carrier Concentration (N_A): {result.N_A:.4e} m⁻³ = {result.N_A / 1e6:.4e} cm⁻³")
+    print(f"Depletion Width (W): {result.W:.4f} nm")
+    print(f"R² Value: {result.r_squared:.4f}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Depletion width calculation setup of heterojunction diode")
+    parser.add_argument("file", nargs="?", help="Sweep CSV to open on start")
+    parser.add_argument("--no-gui", action="store_true", help="Print V_bi, N_A and W for FILE without opening a window")
+    parser.add_argument("--min-v", type=float, default=cv_analysis.MIN_V, help="Lower bound of the fit window (V)")
+    parser.add_argument("--max-v", type=float, default=cv_analysis.MAX_V, help="Upper bound of the fit window (V)")
+    parser.add_argument("--auto-window", action="store_true", help="Pick the most linear 1/C² window automatically")
+    parser.add_argument("--fit-method", choices=list(cv_robust.FIT_METHODS), default="ols",
+                        help="Fit engine for the 1/C² regression (default: ols)")
+    cv_profiles.add_arguments(parser)
+    cv_trace.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiles, eps_r, area = cv_profiles.from_args(parser, args)
+    if args.trace:
+        cv_trace.start(args.trace)
+
+    if args.no_gui:
+        if not args.file:
+            parser.error("--no-gui needs a sweep file")
+        status = print_results(args.file, args.min_v, args.max_v, args.auto_window, args.fit_method, eps_r, area)
+        if args.trace:
+            print(f"Stages: {cv_trace.tracer.summary()}")
+        return status
 
-            # G vs V plot
-            ax3 = fig.add_subplot(313)
-            self.plot_g(ax3)
-
-            fig.tight_layout()
-
-        else:
-            fig = Figure(figsize=(7, 5), dpi=100)
-            ax = fig.add_subplot(111)
-
-            if graph_type == "inv_c2":
-                self.plot_inv_c2(ax)
-            elif graph_type == "c":
-                self.plot_c(ax)
-            elif graph_type == "g":
-                self.plot_g(ax)
-
-        # Add figure to tkinter window
-        canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    def plot_inv_c2(self, ax):
-        """Plot 1/C² vs V graph"""
-        V = self.df['VBias']
-        invC2 = self.df['1/C^2']
-
-        # Select linear region
-        steep_region = self.df[(self.df['VBias'] >= self.min_v) & (self.df['VBias'] <= self.max_v)]
-        V_steep = steep_region['VBias']
-        invC2_steep = steep_region['1/C^2']
-
-        # Plot data points
-        ax.scatter(V, invC2 * 1e-24, color='blue', alpha=0.6, label='All data')
-        ax.scatter(V_steep, invC2_steep * 1e-24, color='red', label='Selected region')
-
-        # Plot regression line
-        x_fit = np.linspace(min(V), max(V), 100)
-        y_fit = (self.slope * x_fit + self.intercept) * 1e-24
-        ax.plot(x_fit, y_fit, 'r--', label=f'Fit (R² = {self.r_value ** 2:.4f})')
-
-        # Plot V_bi if within reasonable range
-        if -2 * max(abs(V)) < self.V_bi < 2 * max(abs(V)):
-            ax.axvline(self.V_bi, color='green', linestyle='--', label=f'V_bi = {self.V_bi:.2f} V')
-
-        ax.set_xlabel('Voltage (V)')
-        ax.set_ylabel('1/C² (F⁻² × 10²⁴)')
-        ax.set_title('1/C² vs. V')
-        ax.grid(True, alpha=0.3)
-        ax.legend()
-
-    def plot_c(self, ax):
-        """Plot C vs V graph"""
-        V = self.df['VBias']
-        C = self.df['C']
-
-        ax.scatter(V, C * 1e12, color='purple')
-        ax.set_xlabel('Voltage (V)')
-        ax.set_ylabel('Capacitance (pF)')
-        ax.set_title('C vs. V')
-        ax.grid(True, alpha=0.3)
-
-    def plot_g(self, ax):
-        """Plot G vs V graph"""
-        V = self.df['VBias']
-        G = self.df['G']
-
-        ax.plot(V, G * 1e6, color='orange')
-        ax.set_xlabel('Voltage (V)')
-        ax.set_ylabel('Conductance (µS)')
-        ax.set_title('G vs. V')
-        ax.grid(True, alpha=0.3)
+    root = tk.Tk()
+    app = CVAnalysisApp(root)
+    app.min_v, app.max_v = args.min_v, args.max_v
+    app.manual_window = (args.min_v, args.max_v)
+    app.auto_window_var.set(args.auto_window)
+    app.fit_method_var.set(cv_robust.FIT_METHODS[args.fit_method])
+    app.use_profiles(profiles, args.device, args.material, args.eps_r, args.area)
+    if args.file:
+        root.after_idle(app.load_file, args.file)
+    root.mainloop()
+    return 0
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = CVAnalysisApp(root)
-    root.mainloop()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
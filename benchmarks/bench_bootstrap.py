@@ -0,0 +1,47 @@
+"""10k bootstrap resamples of one fit window, and many sweeps over a process pool.
+
+A single sweep should finish well inside the ~100 ms that still feels
+interactive when the GUI recomputes intervals after a window change.
+
+    python benchmarks/bench_bootstrap.py
+"""
+import time
+
+from synthetic import make_sweep, make_sweeps
+import cv_bootstrap
+
+INTERACTIVE = 0.1
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    for n_points in (10 ** 2, 10 ** 3, 10 ** 4):
+        V, C, G = make_sweep(n_points, -6.0, 0.0, seed=1)
+        invC2 = 1 / C ** 2
+        window = int(((V >= -5.0) & (V <= -1.0)).sum())
+        for method in ("pairs", "residual"):
+            elapsed = timed(lambda: cv_bootstrap.bootstrap_fit(V, invC2, method=method, seed=0))
+            verdict = "ok" if elapsed < INTERACTIVE else "SLOW"
+            print(f"{window:>6d} window points  {method:<8s}  {cv_bootstrap.N_RESAMPLES} resamples "
+                  f"{elapsed * 1000:8.2f} ms  [{verdict}]")
+
+    n_sweeps = 64
+    V, C, G = make_sweeps(n_sweeps, 200, v_start=-6.0, v_stop=0.0)
+    sweeps = [(V, 1 / c ** 2) for c in C]
+    for workers in (1, None):
+        elapsed = timed(lambda: cv_bootstrap.bootstrap_many(sweeps, workers=workers, seed=0), repeat=1)
+        label = "serial" if workers == 1 else "process pool"
+        print(f"{n_sweeps} sweeps x {cv_bootstrap.N_RESAMPLES} resamples  {label:<12s} {elapsed:6.2f} s  "
+              f"({n_sweeps / elapsed:6.1f} sweeps/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Cold CSV parse versus a warm SweepCache hit.
+
+    python benchmarks/bench_cache.py
+"""
+import os
+import tempfile
+import time
+
+from synthetic import write_sweep_csv
+import cv_analysis
+import cv_cache
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = cv_cache.SweepCache(os.path.join(tmp, "cache"), max_mb=1024)
+        for n_points in (10 ** 2, 10 ** 4, 10 ** 6):
+            path = write_sweep_csv(os.path.join(tmp, f"sweep_{n_points}.csv"), n_points)
+            cold = timed(lambda: cv_analysis.load_sweep(path))
+            cv_analysis.load_sweep(path, cache)
+            warm = timed(lambda: cv_analysis.load_sweep(path, cache))
+            print(f"{n_points:>8d} points  parse {cold * 1000:8.2f} ms   cached {warm * 1000:7.2f} ms   "
+                  f"speedup {cold / warm:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Per-sweep cost of every fit engine against the plain linregress fit.
+
+Single sweeps go through cv_analysis.fit_sweep (OLS) or cv_robust.fit_sweep,
+batches through cv_analysis.fit_sweeps / cv_robust.fit_sweeps. A few points
+of every sweep are pulled down to show how far each engine's V_bi moves.
+
+    python benchmarks/bench_fit_methods.py
+"""
+import time
+
+import numpy as np
+
+from synthetic import make_sweep, make_sweeps
+import cv_analysis
+import cv_robust
+
+V_BI = 2.5
+OUTLIER_FRACTION = 0.05
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def with_outliers(C, seed=0):
+    """Copy of C with OUTLIER_FRACTION of the points of every sweep at 60% of their value"""
+    rng = np.random.default_rng(seed)
+    C = np.array(C, dtype=float)
+    hit = rng.random(C.shape) < OUTLIER_FRACTION
+    C[hit] *= 0.6
+    return C
+
+
+def main():
+    print("single sweep (window -5 V to -1 V)")
+    for n_points in (10 ** 2, 10 ** 3, 10 ** 4):
+        V, C, G = make_sweep(n_points, -6.0, 0.0, seed=1)
+        C = with_outliers(C)
+        baseline = timed(lambda: cv_analysis.fit_sweep(V, 1 / C ** 2))
+        for method in cv_robust.FIT_METHODS:
+            if method == "ols":
+                elapsed, result = baseline, cv_analysis.fit_sweep(V, 1 / C ** 2)
+            else:
+                elapsed = timed(lambda: cv_robust.fit_sweep(V, C, G, method=method))
+                result = cv_robust.fit_sweep(V, C, G, method=method)
+            print(f"{n_points:>6d} points  {method:<10s} {elapsed * 1000:8.3f} ms  ({elapsed / baseline:6.1f}x OLS)  "
+                  f"V_bi error {result.V_bi - V_BI:+.4f} V")
+
+    n_sweeps, n_points = 1000, 200
+    print(f"\n{n_sweeps} sweeps x {n_points} points, one batch call")
+    V, C, G = make_sweeps(n_sweeps, n_points, v_start=-6.0, v_stop=0.0)
+    C = with_outliers(C)
+    baseline = timed(lambda: cv_analysis.fit_sweeps(V, C))
+    for method in cv_robust.FIT_METHODS:
+        if method == "ols":
+            elapsed, batch = baseline, cv_analysis.fit_sweeps(V, C)
+        else:
+            elapsed = timed(lambda: cv_robust.fit_sweeps(V, C, G, method=method), repeat=1)
+            batch = cv_robust.fit_sweeps(V, C, G, method=method)
+        print(f"{method:<10s} {elapsed / n_sweeps * 1e6:9.1f} µs/sweep  ({elapsed / baseline:6.1f}x OLS)  "
+              f"V_bi error median {np.median(batch.V_bi) - V_BI:+.4f} V, spread {np.std(batch.V_bi):.4f} V")
+
+
+if __name__ == "__main__":
+    main()
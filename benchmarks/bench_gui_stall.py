@@ -0,0 +1,107 @@
+"""Worst-case Tk event-loop stall while loading and analyzing a large sweep.
+
+"before" runs parsing and extraction inline on the Tk thread, as the app
+used to; "after" goes through CVAnalysisApp.load_data and its background
+worker. A 10 ms heartbeat records the longest gap between ticks.
+
+    python benchmarks/bench_gui_stall.py --points 2000000
+"""
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+import tkinter as tk
+from unittest import mock
+
+from synthetic import write_sweep_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEARTBEAT_MS = 10
+
+
+def load_app_module():
+    spec = importlib.util.spec_from_file_location("cmu_setup", os.path.join(ROOT, "CMU Setup.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Heartbeat:
+    def __init__(self, root):
+        self.root = root
+        self.last = time.perf_counter()
+        self.worst = 0.0
+        self.running = True
+        root.after(HEARTBEAT_MS, self.tick)
+
+    def tick(self):
+        now = time.perf_counter()
+        self.worst = max(self.worst, now - self.last - HEARTBEAT_MS / 1000)
+        self.last = now
+        if self.running:
+            self.root.after(HEARTBEAT_MS, self.tick)
+
+
+class InlineTask:
+    def set_stage(self, stage):
+        pass
+
+
+def run(module, file_path, background):
+    root = tk.Tk()
+    app = module.CVAnalysisApp(root)
+    # Graph rendering stays on the Tk thread either way; leave it out of the comparison
+    app.show_graph = lambda graph_type: None
+    heartbeat = Heartbeat(root)
+    finished = []
+
+    def start():
+        if background:
+            app.load_data()
+        else:
+            df, properties, digest = app.load_worker(InlineTask(), file_path)
+            app.on_data_loaded(file_path, df, properties, digest)
+
+    def wait():
+        if app.task is None and app.slope is not None:
+            finished.append(time.perf_counter())
+            heartbeat.running = False
+            root.quit()
+        else:
+            root.after(HEARTBEAT_MS, wait)
+
+    with mock.patch.object(module.filedialog, "askopenfilename", return_value=file_path), \
+            mock.patch.object(module.messagebox, "showinfo"), \
+            mock.patch.object(module.messagebox, "showerror"):
+        if not background:
+            # Run the analysis inline as well
+            app.analyze_data = lambda: app.on_analysis_done(app.analysis_worker(
+                InlineTask(), app.df, app.min_v, app.max_v, app.eps_r, app.A, False))
+        start_time = time.perf_counter()
+        root.after(50, start)
+        root.after(60, wait)
+        root.mainloop()
+
+    root.destroy()
+    return heartbeat.worst, finished[0] - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=2_000_000, help="Points in the synthetic sweep")
+    args = parser.parse_args()
+
+    module = load_app_module()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the app's results database and sweep cache out of the user's real ones
+        os.environ["CMU_RESULTS_DB"] = os.path.join(tmp, "results.sqlite")
+        os.environ["CMU_CACHE_DIR"] = os.path.join(tmp, "cache")
+        file_path = write_sweep_csv(os.path.join(tmp, "sweep.csv"), args.points)
+        for label, background in (("before (inline)", False), ("after (background)", True)):
+            stall, total = run(module, file_path, background)
+            print(f"{label:20s} worst stall {stall * 1000:8.1f} ms   total {total:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
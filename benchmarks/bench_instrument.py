@@ -0,0 +1,51 @@
+"""Points/second from the simulated CMU: per-point queries versus batched list sweeps.
+
+Per-point mode pays one TCP round trip per reading; the list sweep sends
+the bias list and trigger in one write and reads C/G back as one block,
+either as ASCII or as a binary REAL,64 block.
+
+    python benchmarks/bench_instrument.py
+"""
+import time
+
+import numpy as np
+
+import synthetic  # noqa: F401  (puts the repository root on sys.path)
+import cv_instrument
+import cv_simulator
+
+
+def ascii_sweep(instrument, V):
+    """List sweep with ASCII transfers, for comparison with the binary block path"""
+    instrument.write(":FORM:DATA ASC", ":SOUR:LIST:VOLT " + ",".join(f"{v:g}" for v in V), ":SOUR:VOLT:MODE LIST",
+                     ":INIT", ":FETC?")
+    data = np.array(instrument.read_line().split(","), dtype=float)
+    return data[0::2], data[1::2]
+
+
+def rate(func, V, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(V)
+        best = min(best, time.perf_counter() - start)
+    return len(V) / best
+
+
+def main():
+    server = cv_simulator.start_simulator(cv_simulator.DiodeModel(seed=0))
+    host, port = server.server_address
+    with cv_instrument.SCPIInstrument(host, port) as instrument:
+        instrument.configure()
+        for n_points in (10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5):
+            V = np.linspace(-5.0, 5.0, n_points)
+            per_point = rate(lambda V: [instrument.measure_point(v) for v in V], V) if n_points <= 10 ** 4 else np.nan
+            ascii_list = rate(lambda V: ascii_sweep(instrument, V), V)
+            binary_list = rate(instrument.sweep, V)
+            print(f"{n_points:>7d} points  per-point {per_point:10.0f} pts/s   list ASCII {ascii_list:10.0f} pts/s   "
+                  f"list binary {binary_list:10.0f} pts/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Render time of a 1M-point sweep and a 500-sweep overlay, with and without decimation.
+
+Each case draws once with Agg (the same renderer TkAgg uses), then zooms
+into 1/10 of the range and draws again, which is when the decimated
+series are recomputed for the new x limits.
+
+    python benchmarks/bench_lod.py
+"""
+import time
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from synthetic import make_sweep, make_sweeps
+from bench_window_refit import HeadlessCanvas
+import cv_analysis
+import cv_lod
+import cv_plots
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_sweep(n_points):
+    V, C, G = make_sweep(n_points)
+    invC2 = 1 / C ** 2
+    result = cv_analysis.WindowFitter(V, invC2).fit(cv_analysis.MIN_V, cv_analysis.MAX_V)
+    view = cv_plots.SweepPlot(None, "all")
+
+    def draw():
+        view.update(1, V, C, G, invC2, result.min_v, result.max_v, result.slope, result.intercept,
+                    result.r_value, result.V_bi)
+        view.canvas.draw()
+
+    def zoom():
+        for ax in view.axes.values():
+            ax.set_xlim(-3.0, -2.0)
+        view.canvas.draw()
+
+    first = timed(draw)
+    zoomed = timed(zoom)
+    blit = timed(lambda: view.blit_fit(-4.0, -1.5, result.slope, result.intercept, result.r_value, result.V_bi))
+    return first, zoomed, blit
+
+
+def bench_overlay(n_sweeps, n_points, decimate):
+    V, C, G = make_sweeps(n_sweeps, n_points)
+    fig = Figure(figsize=(7, 5), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+
+    def draw():
+        if decimate:
+            cv_lod.LineOverlay(ax, [(V, c * 1e12) for c in C], linewidths=0.8)
+        else:
+            for c in C:
+                ax.plot(V, c * 1e12, linewidth=0.8, color="C0")
+        canvas.draw()
+
+    def zoom():
+        ax.set_xlim(-1.0, 0.0)
+        canvas.draw()
+
+    return timed(draw), timed(zoom)
+
+
+def main():
+    cv_plots.FigureCanvasTkAgg = HeadlessCanvas
+    threshold = cv_lod.LOD_MIN_POINTS
+    for n_points in (10 ** 5, 10 ** 6):
+        for label, lod_min in (("full", float("inf")), ("decimated", threshold)):
+            cv_lod.LOD_MIN_POINTS = lod_min
+            first, zoomed, blit = bench_sweep(n_points)
+            print(f"{n_points:>8d}-point sweep  {label:<9s}  first draw {first * 1000:8.1f} ms   "
+                  f"zoom {zoomed * 1000:8.1f} ms   fit blit {blit * 1000:7.1f} ms")
+    cv_lod.LOD_MIN_POINTS = threshold
+
+    for label, decimate in (("full", False), ("decimated", True)):
+        first, zoomed = bench_overlay(500, 2000, decimate)
+        print(f"500 x 2000-point overlay  {label:<9s}  first draw {first * 1000:8.1f} ms   zoom {zoomed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
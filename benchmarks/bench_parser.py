@@ -0,0 +1,58 @@
+"""Dedicated sweep parser versus the generic pd.read_csv load path.
+
+"read_csv" is the previous path: every column parsed by pandas, then
+the device properties scanned out of the object columns. "parse_sweep"
+reads only VBias/C/G as float64 and the metadata from the first row.
+Peak memory is measured with tracemalloc in a separate run.
+
+    python benchmarks/bench_parser.py
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from synthetic import write_sweep_csv
+import cv_analysis
+import cv_parser
+
+
+def generic_load(path):
+    df = cv_analysis.read_sweep(path)
+    return df, cv_analysis.extract_device_properties(df)
+
+
+def fast_load(path):
+    sweep = cv_parser.parse_sweep(path)
+    return sweep.to_frame(), sweep.device_properties()
+
+
+def measure(func, path):
+    start = time.perf_counter()
+    func(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    # The generic path warns about the sparse metadata columns; that is the point
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_points in (10 ** 4, 10 ** 5, 10 ** 6):
+            path = write_sweep_csv(os.path.join(tmp, f"sweep_{n_points}.csv"), n_points)
+            size_mb = os.path.getsize(path) / 1e6
+            t_old, m_old = measure(generic_load, path)
+            t_new, m_new = measure(fast_load, path)
+            print(f"{n_points:>8d} points ({size_mb:6.1f} MB)  read_csv {t_old * 1000:8.1f} ms {m_old / 1e6:7.1f} MB"
+                  f"   parse_sweep {t_new * 1000:8.1f} ms {m_new / 1e6:7.1f} MB"
+                  f"   {t_old / t_new:5.1f}x faster, {m_old / m_new:5.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""End-to-end pipeline benchmarks with stored baselines.
+
+Covers parsing (cv_analysis.load_sweep), extraction (analyze_sweep with the
+default and the automatic fit window), rendering (a SweepPlot of all panels
+drawn with Agg) on synthetic sweeps of 10², 10⁴ and 10⁶ points, and batch
+mode (cv_batch.run_batch) on 1, 100, 1000 and 10000 files. The automatic
+window search is O(n²) and stops at AUTO_WINDOW_MAX_POINTS.
+
+Every case is timed best-of-N with tracing off, then run once more under
+cv_trace to record its peak traced memory. Short cases repeat until they
+have run for MIN_TIMING seconds, so their best time is not a single noisy
+sample. The results are compared with benchmarks/baselines.json; a case
+slower (or hungrier) than its baseline by more than the tolerance and by
+more than the noise floor is timed again up to CONFIRM_RUNS times, and if
+it stays over it is a regression and makes the script exit with 1.
+Baselines are per machine: record them with --save-baseline first. They
+store the median of BASELINE_RUNS best-of timings, so that one lucky fast
+run does not set the bar.
+
+    python benchmarks/bench_pipeline.py --save-baseline
+    python benchmarks/bench_pipeline.py --quick
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+from synthetic import write_sweep_csv
+import cv_analysis
+import cv_batch
+import cv_trace
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+SWEEP_SIZES = (10 ** 2, 10 ** 4, 10 ** 6)
+BATCH_SIZES = (1, 100, 1000, 10000)
+BATCH_POINTS = 200
+# Distinct synthetic files per batch; larger batches cycle through copies of them
+BATCH_DISTINCT = 100
+AUTO_WINDOW_MAX_POINTS = 10 ** 4
+# Cases left out by --quick
+QUICK_SKIP = {f"parse/{10 ** 6}", f"extract/{10 ** 6}", f"render/{10 ** 6}", "batch/10000"}
+# Batches this large are only timed: a traced run costs several times the untraced one
+MEMORY_MAX_FILES = 1000
+# Short cases keep repeating until they have run this long (seconds), up to MAX_REPEAT times
+MIN_TIMING = 0.5
+MAX_REPEAT = 200
+# Differences below these are scheduler and allocator noise, whatever the ratio
+NOISE_FLOOR = {"seconds": 0.002, "peak_mb": 0.25}
+# Extra timings of a case over its baseline before it counts as a regression
+CONFIRM_RUNS = 2
+# Best-of timings per case whose median --save-baseline stores
+BASELINE_RUNS = 3
+
+
+def timed(func, repeat):
+    """Best time of at least repeat runs, more for short cases (see MIN_TIMING)"""
+    best, total, runs = float("inf"), 0.0, 0
+    while runs < repeat or (total < MIN_TIMING and runs < MAX_REPEAT):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best, total, runs = min(best, elapsed), total + elapsed, runs + 1
+    return best
+
+
+def traced_peak(name, func):
+    """Peak traced memory (MB) of one run of func, worker processes included"""
+    tracer = cv_trace.tracer
+    mark = tracer.mark()
+    tracer.enable(memory=True)
+    try:
+        with cv_trace.stage(name):
+            func()
+    finally:
+        tracer.disable()
+    return max(event.get("peak_mb", 0.0) for event in tracer.events[mark:])
+
+
+def headless_plots():
+    """Render SweepPlots with Agg, as bench_window_refit does"""
+    import cv_plots
+    from bench_window_refit import HeadlessCanvas
+
+    cv_plots.FigureCanvasTkAgg = HeadlessCanvas
+    return cv_plots
+
+
+def sweep_cases(tmp, sizes):
+    """(name, func, repeat) of the single-sweep stages at every size"""
+    cv_plots = headless_plots()
+    for n_points in sizes:
+        path = write_sweep_csv(os.path.join(tmp, f"sweep_{n_points}.csv"), n_points, v_start=-6.0, v_stop=0.0)
+        df, device_properties = cv_analysis.load_sweep(path)
+        result = cv_analysis.analyze_sweep(df)
+        V, C, G, invC2 = (df[column].to_numpy() for column in ("VBias", "C", "G", "1/C^2"))
+        repeat = 3 if n_points < 10 ** 6 else 1
+
+        def render(V=V, C=C, G=G, invC2=invC2, result=result):
+            view = cv_plots.SweepPlot(None, "all")
+            view.update(1, V, C, G, invC2, result.min_v, result.max_v, result.slope, result.intercept,
+                        result.r_value, result.V_bi)
+            view.figure.clear()
+
+        yield f"parse/{n_points}", lambda path=path: cv_analysis.load_sweep(path), repeat
+        yield f"extract/{n_points}", lambda df=df: cv_analysis.analyze_sweep(df), repeat
+        if n_points <= AUTO_WINDOW_MAX_POINTS:
+            yield f"extract-auto/{n_points}", lambda df=df: cv_analysis.analyze_sweep(df, auto_window=True), repeat
+        yield f"render/{n_points}", render, repeat
+
+
+def batch_cases(tmp, sizes, workers):
+    """(name, func, repeat) of run_batch over lots of synthetic files"""
+    distinct = [write_sweep_csv(os.path.join(tmp, f"die_{i}.csv"), BATCH_POINTS, v_start=-6.0, v_stop=0.0, seed=i)
+                for i in range(BATCH_DISTINCT)]
+    for n_files in sizes:
+        lot = os.path.join(tmp, f"lot_{n_files}")
+        os.makedirs(lot)
+        files = []
+        for i in range(n_files):
+            files.append(os.path.join(lot, f"die_{i}.csv"))
+            shutil.copyfile(distinct[i % BATCH_DISTINCT], files[-1])
+        yield f"batch/{n_files}", lambda files=files: cv_batch.run_batch(files, workers), 3 if n_files < 1000 else 1
+
+
+def over_baseline(key, measured, base, tolerance):
+    """Whether measured[key] exceeds the baseline by more than both the tolerance and the noise floor"""
+    if measured.get(key) is None or base is None or base.get(key) is None:
+        return False
+    return measured[key] > base[key] * (1 + tolerance) and measured[key] - base[key] > NOISE_FLOOR[key]
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every case against its baseline, and whether any regressed"""
+    lines, regressed = [], False
+    for name, measured in results.items():
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f"{name:<20s} no baseline")
+            continue
+        verdicts = []
+        for key, unit, scale in (("seconds", "ms", 1000), ("peak_mb", "MB", 1)):
+            if measured.get(key) is None or base.get(key) is None:
+                continue
+            ratio = measured[key] / base[key] if base[key] else 1.0
+            over = over_baseline(key, measured, base, tolerance)
+            regressed |= over
+            verdicts.append(f"{key} {base[key] * scale:.2f} -> {measured[key] * scale:.2f} {unit} "
+                            f"({ratio:5.2f}x){' REGRESSION' if over else ''}")
+        lines.append(f"{name:<20s} " + "   ".join(verdicts))
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parsing, extraction, rendering and batch mode")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown or memory growth over the baseline (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true", help="Skip the 10⁶-point sweeps and the 10k-file batch")
+    parser.add_argument("--only", default="*", help="Run only the cases matching this pattern, e.g. 'batch/*'")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Batch worker processes (default: all CPUs)")
+    parser.add_argument("--trace", metavar="JSON", help="Also write the memory runs' stage trace to this file")
+    args = parser.parse_args(argv)
+
+    def selected(names):
+        return [name for name in names
+                if fnmatch.fnmatch(name, args.only) and not (args.quick and name in QUICK_SKIP)]
+
+    sweep_sizes = [n for n in SWEEP_SIZES
+                   if selected(f"{stage}/{n}" for stage in ("parse", "extract", "extract-auto", "render"))]
+    batch_sizes = [n for n in BATCH_SIZES if selected([f"batch/{n}"])]
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    results = {}
+    # N_A comes out negative on the synthetic sweeps, as on the sample data, so W is NaN
+    warnings.simplefilter("ignore", RuntimeWarning)
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = list(sweep_cases(tmp, sweep_sizes)) if sweep_sizes else []
+        cases += list(batch_cases(tmp, batch_sizes, args.workers))
+        for name, func, repeat in cases:
+            if not selected([name]):
+                continue
+            if repeat > 1:
+                func()  # warm-up: imports, file system cache
+            if args.save_baseline:
+                seconds = sorted(timed(func, repeat) for _ in range(BASELINE_RUNS))[BASELINE_RUNS // 2]
+            else:
+                seconds = timed(func, repeat)
+            for _ in range(CONFIRM_RUNS):
+                # A slow outlier run of a noisy machine is not a regression until it repeats
+                if not over_baseline("seconds", {"seconds": seconds}, baseline.get(name), args.tolerance):
+                    break
+                seconds = min(seconds, timed(func, repeat))
+            peak_mb = None
+            if not (name.startswith("batch/") and int(name.split("/")[1]) > MEMORY_MAX_FILES):
+                peak_mb = traced_peak(name, func)
+            results[name] = {"seconds": seconds, "peak_mb": peak_mb}
+            memory = f"   peak {peak_mb:8.2f} MB" if peak_mb is not None else ""
+            print(f"{name:<20s} {seconds * 1000:10.2f} ms{memory}", flush=True)
+
+    if args.trace:
+        print(f"Trace written to {cv_trace.tracer.save(args.trace)}")
+
+    if args.save_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                stored = json.load(f)
+        stored.setdefault("cases", {}).update(results)
+        stored["machine"] = {"python": platform.python_version(), "platform": platform.platform(),
+                             "cpus": os.cpu_count()}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline.")
+        return 0
+    lines, regressed = compare(results, baseline, args.tolerance)
+    print(f"\nAgainst {args.baseline} (tolerance {args.tolerance:.0%}, noise floor "
+          f"{NOISE_FLOOR['seconds'] * 1000:g} ms / {NOISE_FLOOR['peak_mb']:g} MB):")
+    for line in lines:
+        print("  " + line)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Bulk insert, indexed queries, εr/area recompute and streaming CSV export of the results database.
+
+    python benchmarks/bench_results_db.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import synthetic  # noqa: F401  (puts the repository root on sys.path)
+import cv_results
+
+
+def make_records(n_rows, seed=0):
+    """Synthetic make_record() tuples spread over 200 batches, 30 dates and 4 frequencies"""
+    rng = np.random.default_rng(seed)
+    batches = rng.integers(0, 200, n_rows)
+    days = rng.integers(1, 31, n_rows)
+    frequencies = np.array([1e4, 1e5, 1e6, 1e7])[rng.integers(0, 4, n_rows)]
+    V_bi = 2.5 + 0.05 * rng.standard_normal(n_rows)
+    N_A = 1e21 * (1 + 0.05 * rng.standard_normal(n_rows))
+    for i in range(n_rows):
+        yield ("2025-02-05T07:00:00", f"/lot/die_{i}.csv", f"{i:040x}", f"B{batches[i]:03d}", float(frequencies[i]),
+               f"2025-01-{days[i]:02d}", "06:59:32", "CMU1:MF/SC", "{}", "ols", -5.0, -1.0, 21, -1.2e20, 3.0e20, -0.999,
+               1e18, float(V_bi[i]), float(N_A[i]), 50.0, 0.998, 11.7, 1e-6)
+
+
+def main():
+    for n_rows in (10 ** 4, 10 ** 5, 10 ** 6):
+        with tempfile.TemporaryDirectory() as tmp:
+            with cv_results.ResultsStore(os.path.join(tmp, "results.sqlite")) as store:
+                start = time.perf_counter()
+                store.add_many(make_records(n_rows))
+                insert = time.perf_counter() - start
+
+                start = time.perf_counter()
+                matched = store.count(batch_id="B042", frequency=1e6)
+                frame = store.query(batch_id="B042", date_from="2025-01-10", date_to="2025-01-20")
+                query = time.perf_counter() - start
+
+                start = time.perf_counter()
+                recomputed = store.recompute(8.5, 2.5e-7)
+                recompute = time.perf_counter() - start
+
+                start = time.perf_counter()
+                exported = store.export(os.path.join(tmp, "results.csv"))
+                export = time.perf_counter() - start
+
+            print(f"{n_rows:>8d} rows  insert {insert:6.2f} s ({n_rows / insert:9.0f} rows/s)   "
+                  f"indexed query {query * 1000:7.2f} ms ({matched} + {len(frame)} rows)   "
+                  f"recompute N_A/W {recompute:6.2f} s ({recomputed / recompute:9.0f} rows/s)   "
+                  f"CSV export {export:6.2f} s ({exported / export:9.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Startup cost of the GUI script: import time, time-to-first-window and --no-gui.
+
+Each measurement runs in a fresh interpreter; the best of --repeat runs
+is reported. Time-to-first-window needs a display and is skipped without
+one. Also checks that importing the app does not pull in the heavy
+modules that are meant to load lazily.
+
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "CMU Setup.py")
+SAMPLE = os.path.join(ROOT, "CV sweep data.csv")
+LAZY_MODULES = ["pandas", "scipy", "matplotlib", "PIL"]
+
+IMPORT_SCRIPT = f"""
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("cmu_setup", {APP!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))
+"""
+
+WINDOW_SCRIPT = IMPORT_SCRIPT + """
+root = module.tk.Tk()
+app = module.CVAnalysisApp(root)
+root.update()
+print(time.perf_counter() - start)
+root.destroy()
+"""
+
+
+def best_of(repeat, func):
+    return min(func() for _ in range(repeat))
+
+
+def run_python(script):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT)
+    wall = time.perf_counter() - start
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+    return wall, output.stdout.split("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    loaded = run_python(IMPORT_SCRIPT)[1][0].split(" ")[1]
+    print(f"heavy modules loaded at import: {loaded or 'none'}")
+
+    import_time = best_of(args.repeat, lambda: float(run_python(IMPORT_SCRIPT)[1][0].split(" ")[0]))
+    print(f"import CMU Setup.py          {import_time * 1000:8.1f} ms")
+
+    try:
+        window = best_of(args.repeat, lambda: run_python(WINDOW_SCRIPT)[0])
+        print(f"time to first window (wall) {window * 1000:8.1f} ms")
+    except RuntimeError as e:
+        print(f"time to first window        skipped ({e})")
+
+    def no_gui():
+        start = time.perf_counter()
+        subprocess.run([sys.executable, APP, "--no-gui", SAMPLE], capture_output=True, check=True)
+        return time.perf_counter() - start
+
+    print(f"--no-gui on sample (wall)    {best_of(args.repeat, no_gui) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
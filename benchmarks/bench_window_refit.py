@@ -0,0 +1,66 @@
+"""Per-event latency of a fit-window drag on the 1/C² plot.
+
+Each simulated drag event does what CVAnalysisApp.on_window_drag does: an
+O(1) prefix-sum refit followed by a blit of the fit overlay. The canvas
+is rendered with Agg so the benchmark runs without a display. The target
+is under ~16 ms per event (one frame at 60 Hz).
+
+    python benchmarks/bench_window_refit.py
+"""
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from synthetic import make_sweep
+import cv_analysis
+import cv_plots
+
+FRAME_BUDGET = 0.016
+
+
+class HeadlessCanvas(FigureCanvasAgg):
+    def __init__(self, figure, master=None):
+        super().__init__(figure)
+
+    def get_tk_widget(self):
+        return None
+
+    def draw_idle(self):
+        self.draw()
+
+
+def bench(n_points, n_events=200):
+    V, C, G = make_sweep(n_points)
+    invC2 = 1 / C ** 2
+    fitter = cv_analysis.WindowFitter(V, invC2)
+    result = fitter.fit(cv_analysis.MIN_V, cv_analysis.MAX_V)
+
+    view = cv_plots.SweepPlot(None, "inv_c2")
+    view.update(1, V, C, G, invC2, result.min_v, result.max_v, result.slope, result.intercept,
+                result.r_value, result.V_bi)
+
+    refit, total = [], []
+    for high in np.linspace(-4.5, -0.5, n_events):
+        start = time.perf_counter()
+        result = fitter.fit(-5.0, high)
+        mid = time.perf_counter()
+        view.blit_fit(result.min_v, result.max_v, result.slope, result.intercept, result.r_value, result.V_bi)
+        end = time.perf_counter()
+        refit.append(mid - start)
+        total.append(end - start)
+    return np.array(refit), np.array(total)
+
+
+def main():
+    cv_plots.FigureCanvasTkAgg = HeadlessCanvas
+    for n_points in (10 ** 3, 10 ** 4, 10 ** 5):
+        refit, total = bench(n_points)
+        verdict = "ok" if np.percentile(total, 95) < FRAME_BUDGET else "OVER BUDGET"
+        print(f"{n_points:>8d} points  refit {refit.mean() * 1e6:7.1f} µs   "
+              f"refit+blit mean {total.mean() * 1000:6.2f} ms  p95 {np.percentile(total, 95) * 1000:6.2f} ms  "
+              f"max {total.max() * 1000:6.2f} ms  [{verdict}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Let the benchmarks import the application modules from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv_analysis  # noqa: E402
+
+HEADER = [" VBias", " C", " G", "Record Time", "Monitor Unit", "Frequency ", "Batch ID", "Record Date"]
+
+
+def make_sweep(n_points, v_start=-5.0, v_stop=5.0, V_bi=2.5, N=1e21, noise=0.005, seed=0):
+    """Generate a synthetic diode sweep (VBias, C, G) shaped like the sample data"""
+    rng = np.random.default_rng(seed)
+    V = np.linspace(v_start, v_stop, n_points)
+
+    # 1/C² falls linearly towards V_bi, as in 'CV sweep data.csv', and flattens near it
+    eps_s = cv_analysis.EPS_R * cv_analysis.EPS_0
+    slope = -2 / (cv_analysis.Q * eps_s * cv_analysis.AREA ** 2 * N)
+    inv_c2 = slope * (np.minimum(V, V_bi - 0.5) - V_bi)
+    C = 1 / np.sqrt(inv_c2) * (1 + noise * rng.standard_normal(n_points))
+    G = 6.8e-4 - 2e-6 * V + 1e-6 * rng.standard_normal(n_points)
+    return V, C, G
+
+
+def make_sweeps(n_sweeps, n_points, **kwargs):
+    """Generate n_sweeps synthetic sweeps on one shared voltage grid"""
+    rows = [make_sweep(n_points, seed=i, **kwargs) for i in range(n_sweeps)]
+    V = rows[0][0]
+    return V, np.stack([r[1] for r in rows]), np.stack([r[2] for r in rows])
+
+
+def write_sweep_csv(path, n_points, batch_id="A15G2", frequency="1000000 Hz", **kwargs):
+    """Write a synthetic sweep in the instrument's export layout (metadata on the first row only)"""
+    V, C, G = make_sweep(n_points, **kwargs)
+    df = pd.DataFrame({HEADER[0]: V, HEADER[1]: C, HEADER[2]: G})
+    for column in HEADER[3:]:
+        df[column] = None
+    df.loc[0, HEADER[3:]] = ["  06:59:32", " CMU1:MF/SC", frequency, f" {batch_id}", "2/5/2025"]
+    df.to_csv(path, index=False)
+    return path
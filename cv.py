@@ -0,0 +1,93 @@
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+import cv_analysis
+import cv_instrument
+import cv_profiles
+
+# Header of the instrument's CSV export, as in 'CV sweep data.csv'
+EXPORT_HEADER = [" VBias", " C", " G", "Record Time", "Monitor Unit", "Frequency ", "Batch ID", "Record Date"]
+
+
+def write_export(file_path, V, C, G, frequency, batch_id, monitor_unit="CMU1:MF/SC"):
+    """Write a sweep in the instrument's export layout (metadata on the first row only)"""
+    now = time.localtime()
+    metadata = [time.strftime("%H:%M:%S", now), monitor_unit, f"{frequency:.0f} Hz", batch_id,
+                f"{now.tm_mon}/{now.tm_mday}/{now.tm_year}"]
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_HEADER)
+        for i, (vbias, c, g) in enumerate(zip(V, C, G)):
+            writer.writerow([f"{vbias:g}", f"{c:.6e}", f"{g:.6e}"] + (metadata if i == 0 else [""] * len(metadata)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a C-V sweep on the capacitance measurement unit")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--connect", metavar="HOST[:PORT]", help="Instrument address (raw SCPI socket)")
+    target.add_argument("--simulate", action="store_true", help="Sweep a local simulated diode instead")
+    parser.add_argument("--start", type=float, default=-5.0, help="First bias (V)")
+    parser.add_argument("--stop", type=float, default=5.0, help="Last bias (V)")
+    parser.add_argument("--step", type=float, default=0.2, help="Bias step (V)")
+    parser.add_argument("--frequency", type=float, default=cv_instrument.DEFAULT_FREQUENCY, help="AC frequency (Hz)")
+    parser.add_argument("--ac-level", type=float, default=cv_instrument.DEFAULT_AC_LEVEL, help="AC level (V rms)")
+    parser.add_argument("--batch-id", default="N/A", help="Batch ID written with the sweep")
+    parser.add_argument("--point-by-point", action="store_true",
+                        help="Query every point separately instead of one list sweep")
+    parser.add_argument("--min-v", type=float, default=cv_analysis.MIN_V, help="Lower bound of the fit window (V)")
+    parser.add_argument("--max-v", type=float, default=cv_analysis.MAX_V, help="Upper bound of the fit window (V)")
+    parser.add_argument("-o", "--output", help="Save the sweep to this CSV")
+    cv_profiles.add_arguments(parser)
+    args = parser.parse_args(argv)
+    _, eps_r, area = cv_profiles.from_args(parser, args)
+
+    server = None
+    if args.simulate:
+        import cv_simulator
+
+        server = cv_simulator.start_simulator()
+        host, port = server.server_address
+    else:
+        host, port = cv_instrument.parse_address(args.connect)
+
+    V = cv_instrument.bias_list(args.start, args.stop, args.step)
+    try:
+        with cv_instrument.SCPIInstrument(host, port) as instrument:
+            print(f"Connected to {instrument.identify()}")
+            instrument.configure(args.frequency, args.ac_level)
+            start = time.perf_counter()
+            if args.point_by_point:
+                C, G = np.array([instrument.measure_point(v) for v in V]).T
+            else:
+                C, G = instrument.sweep(V)
+            elapsed = time.perf_counter() - start
+    except (OSError, cv_instrument.InstrumentError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print(f"Measured {len(V)} points in {elapsed * 1000:.1f} ms ({len(V) / elapsed:.0f} points/s)")
+    if args.output:
+        write_export(args.output, V, C, G, args.frequency, args.batch_id)
+        print(f"Sweep written to {args.output}")
+
+    try:
+        result = cv_analysis.fit_sweep(V, 1 / C ** 2, args.min_v, args.max_v, eps_r, area)
+    except cv_analysis.AnalysisError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Built-in Potential (V_bi): {result.V_bi:.4f} V")
+    print(f"Carrier Concentration (N_A): {result.N_A:.4e} m⁻³ = {result.N_A / 1e6:.4e} cm⁻³")
+    print(f"Depletion Width (W): {result.W:.4f} nm")
+    print(f"R² Value: {result.r_squared:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
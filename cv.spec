@@ -2,7 +2,7 @@
 
 
 a = Analysis(
-    ['cv.py'],
+    ['CMU Setup.py'],
     pathex=[],
     binaries=[],
     datas=[],
@@ -22,7 +22,7 @@ exe = EXE(
     a.binaries,
     a.datas,
     [],
-    name='cv',
+    name='CMU Setup',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
@@ -0,0 +1,422 @@
+import numpy as np
+
+from cv_trace import stage
+
+# pandas and scipy are imported where they are used so that importing this
+# module (and starting the GUI) stays fast
+
+# Constants
+Q = 1.6e-19  # elementary charge (C)
+EPS_0 = 8.85e-12  # vacuum permittivity (F/m)
+EPS_R = 11.7  # relative permittivity for Silicon
+AREA = 1e-6  # junction area in m²
+
+# Default voltage range for linear regression
+MIN_V = -5.0
+MAX_V = -1.0
+
+# Shortest window considered by the automatic fit-window search
+AUTO_MIN_POINTS = 10
+
+REQUIRED_COLUMNS = ["VBias", "C", "G"]
+PROPERTY_COLUMNS = ["Record Time", "Monitor Unit", "Frequency", "Batch ID", "Record Date"]
+
+# Optional die location columns, added to the device properties only when a file has them
+LOCATION_COLUMNS = ["Wafer", "Die X", "Die Y"]
+
+
+class AnalysisError(Exception):
+    """Raised when a sweep cannot be loaded or analyzed"""
+
+
+class MissingColumnsError(AnalysisError):
+    """Raised when a sweep file lacks one of the required columns"""
+
+    def __init__(self, missing_cols):
+        self.missing_cols = missing_cols
+        super().__init__(f"The following required columns are missing: {', '.join(missing_cols)}")
+
+
+class CVResult:
+    """Linear fit of 1/C² vs V and the device parameters derived from it
+
+    method names the fit engine (see cv_robust.FIT_METHODS); "ols" is the
+    plain linregress fit.
+    """
+
+    def __init__(self, slope, intercept, r_value, std_err, n_points, min_v, max_v, eps_s=EPS_R * EPS_0, A=AREA,
+                 method="ols"):
+        self.slope = slope
+        self.intercept = intercept
+        self.r_value = r_value
+        self.std_err = std_err
+        self.n_points = n_points
+        self.min_v = min_v
+        self.max_v = max_v
+        self.eps_s = eps_s
+        self.A = A
+        self.method = method
+        self.V_bi, self.V_bi_mod, self.N_A, self.W = extract_parameters(slope, intercept, eps_s, A)
+
+    @property
+    def r_squared(self):
+        return self.r_value ** 2
+
+    def with_constants(self, eps_r=EPS_R, A=AREA):
+        """The same fit with V_bi, N_A and W derived for another εr and junction area"""
+        return CVResult(self.slope, self.intercept, self.r_value, self.std_err, self.n_points, self.min_v,
+                        self.max_v, eps_r * EPS_0, A, self.method)
+
+
+class CVBatchResult:
+    """Per-sweep fit results of fit_sweeps, stored as parallel arrays"""
+
+    def __init__(self, slope, intercept, r_value, std_err, n_points, min_v, max_v, eps_s=EPS_R * EPS_0, A=AREA,
+                 method="ols"):
+        self.slope = slope
+        self.intercept = intercept
+        self.r_value = r_value
+        self.std_err = std_err
+        self.n_points = n_points
+        self.min_v = min_v
+        self.max_v = max_v
+        self.eps_s = eps_s
+        self.A = A
+        self.method = method
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.V_bi, self.V_bi_mod, self.N_A, self.W = extract_parameters(slope, intercept, eps_s, A)
+
+    @property
+    def r_squared(self):
+        return self.r_value ** 2
+
+    def __len__(self):
+        return len(self.slope)
+
+    def with_constants(self, eps_r=EPS_R, A=AREA):
+        """The same fits with every sweep's V_bi, N_A and W derived for another εr and junction area"""
+        return CVBatchResult(self.slope, self.intercept, self.r_value, self.std_err, self.n_points, self.min_v,
+                             self.max_v, eps_r * EPS_0, A, self.method)
+
+    def __getitem__(self, i):
+        # n_points is shared by OLS batches but per sweep for engines that skip non-finite points
+        n_points = self.n_points[i] if np.ndim(self.n_points) else self.n_points
+        return CVResult(self.slope[i], self.intercept[i], self.r_value[i], self.std_err[i], n_points,
+                        self.min_v, self.max_v, self.eps_s, self.A, self.method)
+
+
+def read_sweep(file_path):
+    """Read a sweep CSV, clean its column names and add the 1/C² column"""
+    import pandas as pd
+
+    df = pd.read_csv(file_path)
+    return prepare_sweep(df)
+
+
+def load_sweep(file_path, cache=None):
+    """Read a sweep and its device properties, going through a SweepCache when one is given"""
+    if cache is not None:
+        with stage("cache read"):
+            cached = cache.get(file_path)
+        if cached is not None:
+            return cached
+
+    # Local import: cv_parser builds on this module's constants and errors
+    import cv_parser
+
+    with stage("parse"):
+        sweep = cv_parser.parse_sweep(file_path)
+        df = sweep.to_frame()
+        device_properties = sweep.device_properties()
+    if cache is not None:
+        with stage("cache write"):
+            cache.put(file_path, df, device_properties)
+    return df, device_properties
+
+
+def prepare_sweep(df):
+    """Validate a raw sweep DataFrame and add the 1/C² column"""
+    # Clean column names
+    df.columns = df.columns.str.strip()
+
+    # Verify required columns
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        raise MissingColumnsError(missing_cols)
+
+    # Calculate 1/C²
+    df['1/C^2'] = 1 / (df['C'] ** 2)
+    return df
+
+
+def extract_device_properties(df):
+    """Extract device properties from a loaded sweep"""
+    device_properties = {}
+
+    # Check for each property column
+    for prop in PROPERTY_COLUMNS:
+        try:
+            if prop in df.columns:
+                # Get first non-null value for the property
+                values = df[prop].dropna()
+                if len(values) > 0:
+                    device_properties[prop] = values.iloc[0]
+                else:
+                    device_properties[prop] = "N/A"
+            else:
+                device_properties[prop] = "N/A"
+        except Exception:
+            device_properties[prop] = "N/A"
+
+    for prop in LOCATION_COLUMNS:
+        if prop in df.columns:
+            values = df[prop].dropna()
+            if len(values) > 0:
+                device_properties[prop] = values.iloc[0]
+
+    # Add additional calculated properties
+    device_properties["Number of Data Points"] = len(df)
+    device_properties["Voltage Range"] = f"{df['VBias'].min():.2f} V to {df['VBias'].max():.2f} V"
+    return device_properties
+
+
+def extract_parameters(slope, intercept, eps_s=EPS_R * EPS_0, A=AREA, q=Q):
+    """Derive V_bi, |V_bi|, N_A (m⁻³) and W (nm) from the 1/C² vs V fit"""
+    V_bi = -intercept / slope
+    V_bi_mod = np.abs(V_bi)
+    N_A = 2 / (q * eps_s * A ** 2 * slope)
+    W = np.sqrt(2 * eps_s * V_bi_mod / (q * N_A)) * 1e9  # nm
+    return V_bi, V_bi_mod, N_A, W
+
+
+def fit_sweep(V, invC2, min_v=MIN_V, max_v=MAX_V, eps_r=EPS_R, A=AREA):
+    """Fit 1/C² vs V inside [min_v, max_v] and return a CVResult"""
+    V = np.asarray(V, dtype=float)
+    invC2 = np.asarray(invC2, dtype=float)
+
+    # Select linear region for regression, skipping unreadable points
+    with stage("select window"):
+        mask = (V >= min_v) & (V <= max_v) & np.isfinite(invC2)
+        n_points = int(np.count_nonzero(mask))
+        if n_points < 2:
+            raise AnalysisError("Not enough data points in the selected voltage range.")
+        x, y = V[mask], invC2[mask]
+
+    from scipy.stats import linregress
+
+    with stage("linregress"):
+        slope, intercept, r_value, p_value, std_err = linregress(x, y)
+    return CVResult(slope, intercept, r_value, std_err, n_points, min_v, max_v, eps_r * EPS_0, A)
+
+
+class WindowFitter:
+    """Prefix sums over one sweep for O(1) refits of any contiguous VBias window
+
+    The sweep is sorted by VBias and standardized once so the running sums
+    of x, y, x², y² and xy stay well conditioned; fit() maps a voltage
+    window to index bounds with a binary search and rebuilds the regression
+    from five prefix-sum differences instead of touching every point.
+    """
+
+    def __init__(self, V, invC2, eps_r=EPS_R, A=AREA):
+        V = np.asarray(V, dtype=float)
+        invC2 = np.asarray(invC2, dtype=float)
+        valid = np.isfinite(V) & np.isfinite(invC2)
+        order = np.argsort(V[valid], kind="stable")
+        self.V = V[valid][order]
+        self.invC2 = invC2[valid][order]
+        self.eps_s = eps_r * EPS_0
+        self.A = A
+
+        # Standardize; R² is unaffected and slope/intercept are mapped back in fit
+        self.x0, self.xs = self.V.mean() if len(self.V) else 0.0, self.V.std() or 1.0
+        self.y0, self.ys = self.invC2.mean() if len(self.V) else 0.0, self.invC2.std() or 1.0
+        x = (self.V - self.x0) / self.xs
+        y = (self.invC2 - self.y0) / self.ys
+
+        def prefix(values):
+            return np.concatenate(([0.0], np.cumsum(values)))
+
+        self.Sx, self.Sy = prefix(x), prefix(y)
+        self.Sxx, self.Syy, self.Sxy = prefix(x * x), prefix(y * y), prefix(x * y)
+
+    def __len__(self):
+        return len(self.V)
+
+    def window_sums(self, i, j):
+        """Point count, means and centered sums of points i..j-1 (standardized units; i, j may be arrays)"""
+        n = j - i
+        sx, sy = self.Sx[j] - self.Sx[i], self.Sy[j] - self.Sy[i]
+        sxx = self.Sxx[j] - self.Sxx[i] - sx * sx / n
+        syy = self.Syy[j] - self.Syy[i] - sy * sy / n
+        sxy = self.Sxy[j] - self.Sxy[i] - sx * sy / n
+        return n, sx / n, sy / n, sxx, syy, sxy
+
+    def fit(self, min_v, max_v):
+        """Fit the points with min_v <= VBias <= max_v and return a CVResult"""
+        i = int(np.searchsorted(self.V, min_v, side="left"))
+        j = int(np.searchsorted(self.V, max_v, side="right"))
+        if j - i < 2:
+            raise AnalysisError("Not enough data points in the selected voltage range.")
+
+        n, x_mean, y_mean, sxx, syy, sxy = self.window_sums(i, j)
+        if sxx <= 0:
+            raise AnalysisError("Not enough data points in the selected voltage range.")
+
+        slope_s = sxy / sxx
+        slope = slope_s * self.ys / self.xs
+        intercept = self.y0 + self.ys * (y_mean - slope_s * x_mean) - slope * self.x0
+        r_value = 0.0 if syy <= 0 else max(-1.0, min(1.0, sxy / np.sqrt(sxx * syy)))
+        if n > 2:
+            std_err = np.sqrt(max(0.0, 1 - r_value ** 2) * syy / sxx / (n - 2)) * self.ys / self.xs
+        else:
+            std_err = 0.0
+
+        # Report the window snapped to the sweep's own bias points
+        return CVResult(slope, intercept, r_value, std_err, int(n), float(self.V[i]), float(self.V[j - 1]),
+                        self.eps_s, self.A)
+
+
+def find_linear_window(V, invC2, min_points=AUTO_MIN_POINTS, criterion="r2", progress=None):
+    """Find the contiguous VBias window where 1/C² is most linear
+
+    Every window of at least min_points consecutive bias points is scored,
+    either by R² ("r2") or by residual sum of squares per point
+    ("residual"). Prefix sums of x, y, x², y² and xy make each candidate
+    O(1), so the whole search is O(n²) instead of refitting every window.
+    V may also be a prebuilt WindowFitter, in which case invC2 is ignored.
+    progress, if given, is called with the fraction of window lengths done
+    and may raise to abort the search. Returns the (min_v, max_v) bounds of
+    the best window.
+    """
+    if criterion not in ("r2", "residual"):
+        raise ValueError(f"Unknown window criterion: {criterion}")
+
+    fitter = V if isinstance(V, WindowFitter) else WindowFitter(V, invC2)
+    n = len(fitter)
+    min_points = max(int(min_points), 3)
+    if n < min_points:
+        raise AnalysisError(f"At least {min_points} data points are needed to search for a fit window.")
+
+    best_score, best_window = -np.inf, None
+    for length in range(min_points, n + 1):
+        if progress is not None:
+            progress((length - min_points) / (n - min_points + 1))
+        i = np.arange(n - length + 1)
+        j = i + length
+        _, _, _, sxx, syy, sxy = fitter.window_sums(i, j)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if criterion == "r2":
+                score = sxy * sxy / (sxx * syy)
+            else:
+                score = -(syy - sxy * sxy / sxx) / length
+        score[~np.isfinite(score)] = -np.inf
+
+        k = int(np.argmax(score))
+        # Ties go to the longer window
+        if score[k] >= best_score and np.isfinite(score[k]):
+            best_score, best_window = score[k], (i[k], j[k] - 1)
+
+    if best_window is None:
+        raise AnalysisError("No usable fit window found in the sweep.")
+    return float(fitter.V[best_window[0]]), float(fitter.V[best_window[1]])
+
+
+def analyze_sweep(df, min_v=MIN_V, max_v=MAX_V, eps_r=EPS_R, A=AREA, auto_window=False,
+                  min_points=AUTO_MIN_POINTS, method="ols", frequency=None):
+    """Run the 1/C² regression on a prepared sweep DataFrame
+
+    Any method other than "ols" is handed to cv_robust; frequency (Hz) is
+    only used by the G-weighted fit. The auto window search stays OLS.
+    """
+    V = df['VBias'].to_numpy()
+    invC2 = df['1/C^2'].to_numpy()
+    if auto_window:
+        with stage("window search"):
+            min_v, max_v = find_linear_window(V, invC2, min_points)
+    if method == "ols":
+        return fit_sweep(V, invC2, min_v, max_v, eps_r, A)
+
+    # Local import: cv_robust builds on this module's result classes
+    import cv_robust
+
+    return cv_robust.fit_sweep(V, df['C'].to_numpy(), df['G'].to_numpy(), min_v, max_v, method, eps_r, A,
+                               frequency)
+
+
+def analyze_file(file_path, min_v=MIN_V, max_v=MAX_V, eps_r=EPS_R, A=AREA, auto_window=False,
+                 min_points=AUTO_MIN_POINTS, cache=None, method="ols"):
+    """Load and analyze one sweep file, returning (device_properties, CVResult)"""
+    df, device_properties = load_sweep(file_path, cache)
+    frequency = sweep_frequency(device_properties) if method == "wls-g" else None
+    return device_properties, analyze_sweep(df, min_v, max_v, eps_r, A, auto_window, min_points, method, frequency)
+
+
+def sweep_frequency(device_properties):
+    """Measurement frequency in Hz from the device properties (None if missing or unparsable)"""
+    import cv_parser
+
+    frequency = cv_parser.parse_quantity(device_properties.get("Frequency"), "Hz")[0]
+    return None if np.isnan(frequency) else frequency
+
+
+def fit_sweeps(V, C, min_v=MIN_V, max_v=MAX_V, eps_r=EPS_R, A=AREA):
+    """Fit 1/C² vs V for many sweeps sharing one voltage grid
+
+    V is the common (n_points,) bias vector and C an (n_sweeps, n_points)
+    capacitance matrix. Every sweep is regressed in one NumPy pass using the
+    same centered least-squares sums as linregress, so each row matches the
+    result of fit_sweep on that sweep alone. As there, non-finite 1/C² points
+    are skipped; n_points then becomes per sweep and a sweep left with fewer
+    than two points gets NaN results.
+    """
+    V = np.asarray(V, dtype=float)
+    C = np.atleast_2d(np.asarray(C, dtype=float))
+    if C.shape[1] != V.shape[0]:
+        raise AnalysisError(f"Capacitance matrix has {C.shape[1]} points per sweep but the voltage grid has {V.shape[0]}.")
+
+    # Select linear region for regression
+    mask = (V >= min_v) & (V <= max_v)
+    n = int(np.count_nonzero(mask))
+    if n < 2:
+        raise AnalysisError("Not enough data points in the selected voltage range.")
+
+    x = V[mask]
+    with np.errstate(divide="ignore"):
+        y = 1 / C[:, mask] ** 2
+    valid = np.isfinite(y)
+
+    if valid.all():
+        # Centered sums, shared x terms computed once for all sweeps
+        x_mean = x.mean()
+        xc = x - x_mean
+        ssxm = xc @ xc
+        y_mean = y.mean(axis=1)
+        yc = y - y_mean[:, None]
+        ssxym = yc @ xc
+    else:
+        # Unreadable points drop out of their own sweep only, so the x sums become per sweep
+        n = np.count_nonzero(valid, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_mean = (valid @ x) / n
+            y_mean = np.where(valid, y, 0.0).sum(axis=1) / n
+        xc = np.where(valid, x - x_mean[:, None], 0.0)
+        yc = np.where(valid, y - y_mean[:, None], 0.0)
+        ssxm = np.einsum("ij,ij->i", xc, xc)
+        ssxym = np.einsum("ij,ij->i", yc, xc)
+    ssym = np.einsum("ij,ij->i", yc, yc)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = ssxym / ssxm
+        intercept = y_mean - slope * x_mean
+        r_value = np.where(ssym == 0, 0.0, ssxym / np.sqrt(ssxm * ssym))
+        r_value = np.clip(r_value, -1.0, 1.0)
+        std_err = np.where(n > 2, np.sqrt((1 - r_value ** 2) * ssym / ssxm / np.maximum(n - 2, 1)), 0.0)
+
+    if np.ndim(n):
+        too_few = n < 2
+        for values in (slope, intercept, r_value, std_err):
+            values[too_few] = np.nan
+
+    return CVBatchResult(slope, intercept, r_value, std_err, n, min_v, max_v, eps_r * EPS_0, A)
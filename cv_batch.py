@@ -0,0 +1,257 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+import cv_analysis
+import cv_bootstrap
+import cv_cache
+import cv_profiles
+import cv_results
+import cv_robust
+import cv_trace
+from cv_trace import stage
+
+RESULT_COLUMNS = ["File", "Batch ID", "Frequency", "V_bi", "N_A", "W", "R²", "Min V", "Max V", "Error"]
+
+# Extra columns written when bootstrap confidence intervals are requested
+CI_COLUMNS = [f"{name} CI {bound}" for name in ("V_bi", "N_A", "W") for bound in ("low", "high")]
+
+
+def ci_label(method="ols"):
+    """"CI", or "OLS CI" when the intervals belong to a different fit than the reported values"""
+    return "CI" if method == "ols" else "OLS CI"
+
+
+def result_columns(bootstrap=0, method="ols"):
+    if not bootstrap:
+        return RESULT_COLUMNS
+    ci_columns = [column.replace("CI", ci_label(method)) for column in CI_COLUMNS]
+    return RESULT_COLUMNS[:-1] + ci_columns + RESULT_COLUMNS[-1:]
+
+
+def collect_files(patterns):
+    """Expand directories and glob patterns into a sorted list of CSV files"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(glob.glob(os.path.join(pattern, "*.csv")))
+        else:
+            files.extend(glob.glob(pattern))
+    return sorted(set(files))
+
+
+def _property(device_properties, name):
+    value = device_properties.get(name, "N/A")
+    return value.strip() if isinstance(value, str) else value
+
+
+# One SweepCache per worker process, keyed by (cache_dir, max_mb)
+_caches = {}
+
+
+def _cache(cache_dir, cache_max_mb):
+    if cache_dir is None:
+        return None
+    key = (cache_dir, cache_max_mb)
+    if key not in _caches:
+        _caches[key] = cv_cache.SweepCache(cache_dir, cache_max_mb)
+    return _caches[key]
+
+
+def analyze_one(file_path, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, auto_window=False,
+                min_points=cv_analysis.AUTO_MIN_POINTS, cache_dir=None, cache_max_mb=None, bootstrap=0,
+                confidence=cv_bootstrap.CONFIDENCE, seed=0, with_record=False, method="ols", eps_r=cv_analysis.EPS_R,
+                A=cv_analysis.AREA):
+    """Analyze a single file and return its row of the results table
+
+    With with_record, return (row, results-database record or None).
+    method selects the fit engine (cv_robust.FIT_METHODS); bootstrap
+    intervals are always resampled OLS fits over the same window, so with
+    any other engine their columns are named "... OLS CI low/high". The
+    resamples are seeded by seed and the file's contents (see file_seed);
+    seed None leaves them unseeded.
+    """
+    row = dict.fromkeys(result_columns(bootstrap, method))
+    record = None
+    row["File"] = file_path
+    try:
+        df, device_properties = cv_analysis.load_sweep(file_path, _cache(cache_dir, cache_max_mb))
+        frequency = cv_analysis.sweep_frequency(device_properties) if method == "wls-g" else None
+        result = cv_analysis.analyze_sweep(df, min_v, max_v, eps_r, A, auto_window, min_points, method, frequency)
+        row["Batch ID"] = _property(device_properties, "Batch ID")
+        row["Frequency"] = _property(device_properties, "Frequency")
+        row["V_bi"] = result.V_bi
+        row["N_A"] = result.N_A
+        row["W"] = result.W
+        row["R²"] = result.r_squared
+        row["Min V"] = result.min_v
+        row["Max V"] = result.max_v
+        digest = None
+        if with_record:
+            with stage("make record"):
+                digest = cv_results.file_hash(file_path)
+                record = cv_results.make_record(file_path, device_properties, result, eps_r, digest)
+
+        if bootstrap:
+            if seed is not None:
+                seed = file_seed(seed, digest or cv_results.file_hash(file_path))
+            with stage("bootstrap"):
+                uncertainty = cv_bootstrap.bootstrap_fit(df['VBias'].to_numpy(), df['1/C^2'].to_numpy(),
+                                                         result.min_v, result.max_v, n_resamples=bootstrap,
+                                                         confidence=confidence, eps_r=eps_r, A=A,
+                                                         seed=seed)
+            label = ci_label(method)
+            for name in ("V_bi", "N_A", "W"):
+                row[f"{name} {label} low"], row[f"{name} {label} high"] = uncertainty.ci[name]
+    except Exception as e:
+        # A broken file must not abort the rest of the lot
+        row["Error"] = str(e)
+    if with_record:
+        return row, record
+    return row
+
+
+def file_seed(seed, digest):
+    """Bootstrap seed of one file, from the batch seed and the file's SHA-1 (cv_results.file_hash)
+
+    Keying on the contents rather than the file's place in the batch gives
+    every file the same resamples with any number of workers and in any
+    subset of the lot.
+    """
+    return np.random.SeedSequence([seed, int(digest, 16)])
+
+
+def _analyze_args(args):
+    file_path, options = args
+    with stage("analyze file"):
+        return analyze_one(file_path, **options)
+
+
+def _traced_analyze_args(args, memory=True):
+    """_analyze_args in a pool worker, returning (row, trace events) for the parent's tracer"""
+    tracer = cv_trace.tracer
+    if not tracer.enabled:
+        tracer.enable(memory)
+    mark = tracer.mark()
+    row = _analyze_args(args)
+    events = tracer.events[mark:]
+    del tracer.events[mark:]
+    return row, [dict(event, start=event["start"] + tracer.started, thread=f"worker {os.getpid()}")
+                 for event in events]
+
+
+def run_batch(files, workers=None, store=None, **options):
+    """Analyze files across a process pool and return (results DataFrame, elapsed seconds)
+
+    options are passed to analyze_one for every file. With a
+    cv_results.ResultsStore, every successful fit is also saved to it in one
+    bulk transaction.
+    """
+    start = time.perf_counter()
+    if store is not None:
+        options = dict(options, with_record=True)
+    tasks = [(f, options) for f in files]
+
+    if workers == 1 or len(files) < 2:
+        rows = [_analyze_args(task) for task in tasks]
+    else:
+        workers = workers or os.cpu_count() or 1
+        # Large chunks keep inter-process overhead small for thousands of tiny files
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if cv_trace.tracer.enabled:
+                # Worker stages are recorded in the workers and merged into this process's trace
+                traced = list(executor.map(partial(_traced_analyze_args, memory=cv_trace.tracer.memory), tasks,
+                                           chunksize=chunksize))
+                rows = [row for row, events in traced]
+                cv_trace.tracer.merge(event for row, events in traced for event in events)
+            else:
+                rows = list(executor.map(_analyze_args, tasks, chunksize=chunksize))
+
+    if store is not None:
+        with stage("save results"):
+            store.add_many(record for row, record in rows if record is not None)
+        rows = [row for row, record in rows]
+
+    elapsed = time.perf_counter() - start
+    columns = result_columns(options.get("bootstrap", 0), options.get("method", "ols"))
+    return pd.DataFrame(rows, columns=columns), elapsed
+
+
+def write_results(results, output_path):
+    """Write the consolidated results table as CSV or XLSX depending on the extension"""
+    if output_path.lower().endswith(".xlsx"):
+        results.to_excel(output_path, index=False)
+    else:
+        results.to_csv(output_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch C-V analysis of sweep CSV files")
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of sweep CSV files")
+    parser.add_argument("-o", "--output", default="cv_results.csv", help="Results table (.csv or .xlsx)")
+    parser.add_argument("--min-v", type=float, default=cv_analysis.MIN_V, help="Lower bound of the fit window (V)")
+    parser.add_argument("--max-v", type=float, default=cv_analysis.MAX_V, help="Upper bound of the fit window (V)")
+    parser.add_argument("--auto-window", action="store_true",
+                        help="Pick the most linear 1/C² window per sweep instead of --min-v/--max-v")
+    parser.add_argument("--min-points", type=int, default=cv_analysis.AUTO_MIN_POINTS,
+                        help="Shortest window considered by --auto-window")
+    parser.add_argument("--fit-method", choices=list(cv_robust.FIT_METHODS), default="ols",
+                        help="Fit engine for the 1/C² regression (default: ols)")
+    cv_cache.add_arguments(parser)
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                        help="Add confidence intervals for V_bi, N_A and W from N bootstrap resamples of the "
+                             "OLS fit (columns named 'OLS CI' with any other --fit-method)")
+    parser.add_argument("--confidence", type=float, default=cv_bootstrap.CONFIDENCE,
+                        help="Confidence level of the bootstrap intervals")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the bootstrap resamples, combined with each file's hash so the intervals do "
+                             "not depend on --workers (default: %(default)s)")
+    parser.add_argument("--db", nargs="?", const=cv_results.DEFAULT_DB_PATH, default=None,
+                        help="Also save every fit to this results database (default path if no value is given)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    cv_profiles.add_arguments(parser)
+    cv_trace.add_arguments(parser)
+    args = parser.parse_args(argv)
+    _, eps_r, area = cv_profiles.from_args(parser, args)
+    if args.trace:
+        cv_trace.start(args.trace)
+
+    with stage("collect files"):
+        files = collect_files(args.inputs)
+    if not files:
+        print("No sweep files found.", file=sys.stderr)
+        return 1
+
+    store = cv_results.ResultsStore(args.db) if args.db else None
+    with stage("batch"):
+        results, elapsed = run_batch(files, args.workers, store, min_v=args.min_v, max_v=args.max_v,
+                                     auto_window=args.auto_window, min_points=args.min_points,
+                                     cache_dir=args.cache_dir, cache_max_mb=args.cache_max_mb,
+                                     bootstrap=args.bootstrap, confidence=args.confidence, seed=args.seed,
+                                     method=args.fit_method, eps_r=eps_r, A=area)
+    with stage("write table"):
+        write_results(results, args.output)
+
+    failed = results["Error"].notna().sum()
+    rate = len(files) / elapsed if elapsed > 0 else float("inf")
+    print(f"Analyzed {len(files)} files ({failed} failed) in {elapsed:.2f} s: {rate:.1f} files/s")
+    print(f"Results written to {args.output}")
+    if store is not None:
+        print(f"Results saved to {store.db_path}")
+        store.close()
+    if args.trace:
+        print(f"Stages: {cv_trace.tracer.summary()}")
+        print(f"Trace written to {args.trace}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
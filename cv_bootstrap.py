@@ -0,0 +1,138 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import cv_analysis
+
+N_RESAMPLES = 10000
+CONFIDENCE = 0.95
+
+# Upper bound on resampled values held in memory at once (resamples x window points)
+CHUNK_ELEMENTS = 2 ** 22
+
+CI_PARAMETERS = ["slope", "intercept", "V_bi", "N_A", "W"]
+
+
+class BootstrapResult:
+    """Point fit plus bootstrap confidence intervals of the fit and derived parameters"""
+
+    def __init__(self, fit, samples, n_resamples, confidence, method):
+        self.fit = fit
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.method = method
+
+        tail = (1 - confidence) / 2 * 100
+        self.ci = {}
+        self.std = {}
+        for name, values in samples.items():
+            finite = values[np.isfinite(values)]
+            if len(finite):
+                low, high = np.percentile(finite, [tail, 100 - tail])
+                self.ci[name] = (float(low), float(high))
+                self.std[name] = float(finite.std(ddof=1)) if len(finite) > 1 else 0.0
+            else:
+                self.ci[name] = (np.nan, np.nan)
+                self.std[name] = np.nan
+
+
+def _resampled_fits(x, y, idx, method, residuals=None):
+    """Slopes and intercepts of one block of resamples, each row of idx being one resample
+
+    x and y are centered on their means beforehand, so raw per-row sums are
+    as accurate as centering every resample and avoid two large temporaries.
+    """
+    n = idx.shape[1]
+    if method == "pairs":
+        X, Y = x[idx], y[idx]
+        sx, sy = X.sum(axis=1), Y.sum(axis=1)
+        sxx = np.einsum("ij,ij->i", X, X) - sx * sx / n
+        sxy = np.einsum("ij,ij->i", X, Y) - sx * sy / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = sxy / sxx
+        return slope, (sy - slope * sx) / n
+
+    # Residual bootstrap keeps x fixed, so only the resampled residuals vary:
+    # each resample shifts the fitted line by the regression of its residuals on x
+    R = residuals[idx]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (R @ x) / (x @ x)
+    return slope, R.mean(axis=1)
+
+
+def bootstrap_fit(V, invC2, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, n_resamples=N_RESAMPLES,
+                  confidence=CONFIDENCE, method="pairs", eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA, seed=None,
+                  progress=None):
+    """Bootstrap the 1/C² fit inside [min_v, max_v]
+
+    "pairs" resamples (V, 1/C²) points with replacement; "residual" keeps
+    V fixed and resamples the fit residuals. All resamples are processed
+    as index matrices in a few large NumPy blocks, and V_bi, N_A and W are
+    derived from every resampled slope/intercept, so their intervals
+    capture the nonlinearity of the formulas. progress, if given, is called
+    with the fraction of resamples done before every block and may raise to
+    abort.
+    """
+    if method not in ("pairs", "residual"):
+        raise ValueError(f"Unknown bootstrap method: {method}")
+
+    fit = cv_analysis.fit_sweep(V, invC2, min_v, max_v, eps_r, A)
+
+    V = np.asarray(V, dtype=float)
+    invC2 = np.asarray(invC2, dtype=float)
+    mask = (V >= min_v) & (V <= max_v) & np.isfinite(invC2)
+    x, y = V[mask], invC2[mask]
+    n = len(x)
+
+    # Work in coordinates centered on the window (and on the fitted line for
+    # residual resampling), then shift back to V and 1/C²
+    x0 = x.mean()
+    y0 = y.mean()
+    x = x - x0
+    if method == "residual":
+        y0 = fit.slope * x0 + fit.intercept
+        residuals = y - (fit.slope * x + y0)
+        base_slope = fit.slope
+    else:
+        y = y - y0
+        residuals = None
+        base_slope = 0.0
+
+    rng = np.random.default_rng(seed)
+    slope = np.empty(n_resamples)
+    intercept = np.empty(n_resamples)
+    rows = max(1, CHUNK_ELEMENTS // n)
+    for start in range(0, n_resamples, rows):
+        if progress is not None:
+            progress(start / n_resamples)
+        stop = min(start + rows, n_resamples)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        slope[start:stop], intercept[start:stop] = _resampled_fits(x, y, idx, method, residuals)
+    slope += base_slope
+    intercept += y0 - slope * x0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        V_bi, _, N_A, W = cv_analysis.extract_parameters(slope, intercept, eps_r * cv_analysis.EPS_0, A)
+    samples = {"slope": slope, "intercept": intercept, "V_bi": V_bi, "N_A": N_A, "W": W}
+    return BootstrapResult(fit, samples, n_resamples, confidence, method)
+
+
+def _bootstrap_args(args):
+    V, invC2, kwargs = args
+    return bootstrap_fit(V, invC2, **kwargs)
+
+
+def bootstrap_many(sweeps, workers=None, **kwargs):
+    """Bootstrap many (V, 1/C²) sweeps, fanned out over a process pool
+
+    kwargs are passed to bootstrap_fit. With workers=1 (or a single sweep)
+    everything runs in this process.
+    """
+    tasks = [(V, invC2, kwargs) for V, invC2 in sweeps]
+    if workers == 1 or len(tasks) < 2:
+        return [_bootstrap_args(task) for task in tasks]
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_bootstrap_args, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
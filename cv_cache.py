@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Bump when the on-disk layout changes so stale entries are ignored
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cmu_setup")
+DEFAULT_MAX_MB = 512
+
+# Rows of the stored array, in order
+CACHED_COLUMNS = ["VBias", "C", "G", "1/C^2"]
+
+
+def _json_value(value):
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class SweepCache:
+    """LRU on-disk cache of parsed sweeps, keyed by file path, mtime and size
+
+    Each entry is a directory holding the numeric columns as one (4, n)
+    float64 .npy array, memory-mapped on load, and a JSON file with the
+    extracted device properties. The least recently used entries are evicted
+    once the cache grows past max_bytes; the directory is only rescanned
+    after roughly 5% of the limit has been written, so batch runs storing
+    thousands of sweeps don't pay for a full scan on every put.
+    """
+
+    def __init__(self, cache_dir=None, max_mb=None):
+        self.cache_dir = cache_dir or os.environ.get("CMU_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_mb is None:
+            max_mb = float(os.environ.get("CMU_CACHE_MAX_MB", DEFAULT_MAX_MB))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.pending_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, file_path):
+        stat = os.stat(file_path)
+        ident = f"{CACHE_VERSION}|{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, file_path):
+        """Return (df, device_properties) for a cached file, or None on a miss"""
+        entry = self._entry(self.key(file_path))
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            data = np.load(os.path.join(entry, "data.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(meta_path)
+
+        import pandas as pd
+
+        df = pd.DataFrame({name: data[i] for i, name in enumerate(CACHED_COLUMNS)}, copy=False)
+        return df, meta["device_properties"]
+
+    def put(self, file_path, df, device_properties):
+        """Store a parsed sweep and its device properties, then enforce the size limit"""
+        key = self.key(file_path)
+        data = np.vstack([df[name].to_numpy(dtype=float) for name in CACHED_COLUMNS])
+
+        # Write into a scratch directory and rename it into place so readers never see half an entry
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            np.save(os.path.join(tmp, "data.npy"), data)
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"file": os.path.abspath(file_path), "device_properties": device_properties}, f,
+                          default=_json_value)
+            os.replace(tmp, self._entry(key))
+        except OSError:
+            # Another process stored the same file first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.pending_bytes += data.nbytes
+        if self.pending_bytes >= self.max_bytes // 20:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        self.pending_bytes = 0
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry = self._entry(name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry))
+                used = os.stat(os.path.join(entry, "meta.json")).st_mtime
+            except OSError:
+                continue
+            entries.append((used, size, entry))
+            total += size
+
+        for used, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            shutil.rmtree(self._entry(name), ignore_errors=True)
+
+
+def add_arguments(parser):
+    """--cache-dir/--cache-max-mb options shared by the command line tools"""
+    parser.add_argument("--cache-dir", default=None,
+                        help="Reuse parsed sweeps from this cache directory (see cv_cache.SweepCache)")
+    parser.add_argument("--cache-max-mb", type=float, default=None, help="Size limit of the cache directory")
+
+
+def from_args(args):
+    """The SweepCache selected with the add_arguments options; tools only cache when --cache-dir is given"""
+    if args.cache_dir is None:
+        return None
+    return SweepCache(args.cache_dir, args.cache_max_mb)
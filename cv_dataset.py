@@ -0,0 +1,219 @@
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+
+import cv_analysis
+import cv_parser
+import cv_profiles
+import cv_robust
+
+RESULT_FIELDS = ["slope", "intercept", "r_value", "V_bi", "N_A", "W", "n_points"]
+
+# Trailing frequency tag in file names such as "die3_100kHz.csv"
+_FREQUENCY_TAG = re.compile(r"[_\- ]*\d+(?:\.\d+)?\s*[kKMG]?Hz$")
+
+
+def device_name(file_path):
+    """Device name from a file name, dropping a trailing frequency tag"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return _FREQUENCY_TAG.sub("", stem) or stem
+
+
+class SweepDataset:
+    """Many C-V sweeps indexed by (Batch ID, device, frequency)
+
+    VBias, C and G of every sweep live back to back in three flat float64
+    buffers with an offsets array marking where each sweep starts, so a lot
+    of thousands of sweeps costs a handful of arrays instead of thousands
+    of DataFrames. Sweeps are appended in chunks and consolidated lazily.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.metadata = []
+        self._chunks = ([], [], [])
+        self._lengths = []
+        self._V = self._C = self._G = np.empty(0)
+        self._offsets = np.zeros(1, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, V, C, G, batch_id, device, frequency, **metadata):
+        """Append one sweep; frequency is in Hz"""
+        V = np.asarray(V, dtype=float)
+        C = np.asarray(C, dtype=float)
+        G = np.asarray(G, dtype=float) if G is not None else np.full(len(V), np.nan)
+        if not len(V) == len(C) == len(G):
+            raise ValueError("VBias, C and G must have the same length.")
+
+        self.keys.append((batch_id, device, float(frequency)))
+        self.metadata.append(metadata)
+        for chunk, values in zip(self._chunks, (V, C, G)):
+            chunk.append(values)
+        self._lengths.append(len(V))
+
+    def add_file(self, file_path, device=None):
+        """Parse a sweep file and add it, taking Batch ID and Frequency from its metadata"""
+        sweep = cv_parser.parse_sweep(file_path)
+        batch_id = sweep.metadata.get("Batch ID", "N/A")
+        if device is None:
+            device = device_name(file_path)
+        self.add(sweep.VBias, sweep.C, sweep.G, batch_id, device, sweep.frequency, file=file_path,
+                 **sweep.metadata)
+
+    @classmethod
+    def from_files(cls, file_paths, devices=None):
+        dataset = cls()
+        for i, file_path in enumerate(file_paths):
+            dataset.add_file(file_path, devices[i] if devices else None)
+        return dataset
+
+    def _consolidate(self):
+        if not self._chunks[0]:
+            return
+        self._V, self._C, self._G = (np.concatenate([old] + chunk) for old, chunk in
+                                     zip((self._V, self._C, self._G), self._chunks))
+        self._offsets = np.concatenate([self._offsets, self._offsets[-1] + np.cumsum(self._lengths)])
+        self._chunks = ([], [], [])
+        self._lengths = []
+
+    def sweep(self, i):
+        """(VBias, C, G) views of sweep i"""
+        self._consolidate()
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        return self._V[start:stop], self._C[start:stop], self._G[start:stop]
+
+    def grid_groups(self):
+        """Group sweep indices by identical voltage grid, so each group can be fitted as one matrix"""
+        self._consolidate()
+        groups = {}
+        for i in range(len(self)):
+            V = self.sweep(i)[0]
+            groups.setdefault(V.tobytes(), []).append(i)
+        return list(groups.values())
+
+    def extract(self, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, eps_r=cv_analysis.EPS_R,
+                A=cv_analysis.AREA, method="ols"):
+        """Fit every sweep and return a DataFrame indexed by (Batch ID, Device, Frequency)
+
+        Sweeps sharing a voltage grid are fitted together with
+        cv_analysis.fit_sweeps, or cv_robust.fit_sweeps for any other fit
+        method; a sweep whose window holds too few points gets NaN results
+        instead of failing the whole dataset.
+        """
+        import pandas as pd
+
+        results = {field: np.full(len(self), np.nan) for field in RESULT_FIELDS}
+        for group in self.grid_groups():
+            V = self.sweep(group[0])[0]
+            C = np.stack([self.sweep(i)[1] for i in group])
+            try:
+                if method == "ols":
+                    batch = cv_analysis.fit_sweeps(V, C, min_v, max_v, eps_r, A)
+                else:
+                    G = np.stack([self.sweep(i)[2] for i in group])
+                    frequency = [self.keys[i][2] for i in group]
+                    batch = cv_robust.fit_sweeps(V, C, G, min_v, max_v, method, eps_r, A, frequency)
+            except cv_analysis.AnalysisError:
+                continue
+            for field in RESULT_FIELDS:
+                results[field][group] = getattr(batch, field)
+
+        results["R²"] = results["r_value"] ** 2
+        index = pd.MultiIndex.from_tuples(self.keys, names=["Batch ID", "Device", "Frequency"])
+        return pd.DataFrame(results, index=index).sort_index()
+
+    def dispersion(self, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, eps_r=cv_analysis.EPS_R,
+                   A=cv_analysis.AREA, method="ols"):
+        """V_bi, N_A, W and R² vs frequency for each (Batch ID, Device)"""
+        return self.extract(min_v, max_v, eps_r, A, method)[["V_bi", "N_A", "W", "R²"]]
+
+
+def plot_dispersion(results, fig=None):
+    """Plot V_bi, N_A and W against frequency for each device from extract()/dispersion() output"""
+    if fig is None:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(7, 8), dpi=100)
+
+    panels = [("V_bi", "V_bi (V)", 1), ("N_A", "N_A (cm⁻³)", 1e-6), ("W", "W (nm)", 1)]
+    axes = [fig.add_subplot(len(panels), 1, i + 1) for i in range(len(panels))]
+    for (batch_id, device), group in results.groupby(level=["Batch ID", "Device"]):
+        frequency = group.index.get_level_values("Frequency")
+        for ax, (column, label, scale) in zip(axes, panels):
+            ax.plot(frequency, group[column] * scale, marker='o', label=f"{batch_id} / {device}")
+
+    for ax, (column, label, scale) in zip(axes, panels):
+        ax.set_xscale('log')
+        ax.set_xlabel('Frequency (Hz)')
+        ax.set_ylabel(label)
+        ax.set_title(f'{column} vs. Frequency')
+        ax.grid(True, alpha=0.3)
+    if len(results.groupby(level=["Batch ID", "Device"])) <= 10:
+        axes[0].legend()
+    fig.tight_layout()
+    return fig
+
+
+def plot_overlay(dataset, column="C", fig=None):
+    """Overlay every sweep of a dataset (C, G or 1/C^2 vs VBias) as one decimated line collection"""
+    import cv_lod
+
+    if fig is None:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(7, 5), dpi=100)
+
+    label, scale = {"C": ("Capacitance (pF)", 1e12), "G": ("Conductance (µS)", 1e6),
+                    "1/C^2": ("1/C² (F⁻² × 10²⁴)", 1e-24)}[column]
+    sweeps = []
+    for i in range(len(dataset)):
+        V, C, G = dataset.sweep(i)
+        y = C if column == "C" else G if column == "G" else 1 / C ** 2
+        sweeps.append((V, y * scale))
+
+    ax = fig.add_subplot(1, 1, 1)
+    overlay = cv_lod.LineOverlay(ax, sweeps, linewidths=0.8, alpha=0.5)
+    ax.set_xlabel('Voltage (V)')
+    ax.set_ylabel(label)
+    ax.set_title(f'{column} vs. V ({len(sweeps)} sweeps)')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    # Decimate again for the final axes width
+    overlay.refresh()
+    return fig
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Frequency dispersion of V_bi, N_A and W across sweep files")
+    parser.add_argument("files", nargs="+", help="Sweep CSV files (one frequency per file)")
+    parser.add_argument("--min-v", type=float, default=cv_analysis.MIN_V, help="Lower bound of the fit window (V)")
+    parser.add_argument("--max-v", type=float, default=cv_analysis.MAX_V, help="Upper bound of the fit window (V)")
+    parser.add_argument("--fit-method", choices=list(cv_robust.FIT_METHODS), default="ols",
+                        help="Fit engine for the 1/C² regression (default: ols)")
+    parser.add_argument("-o", "--output", help="Write the dispersion table to this CSV")
+    parser.add_argument("--plot", help="Save a dispersion plot to this image file")
+    parser.add_argument("--overlay", help="Save an overlay of every sweep's C-V curve to this image file")
+    cv_profiles.add_arguments(parser)
+    args = parser.parse_args(argv)
+    _, eps_r, area = cv_profiles.from_args(parser, args)
+
+    dataset = SweepDataset.from_files(args.files)
+    results = dataset.dispersion(args.min_v, args.max_v, eps_r, area, args.fit_method)
+    print(results.to_string())
+
+    if args.output:
+        results.to_csv(args.output)
+    if args.plot:
+        plot_dispersion(results).savefig(args.plot)
+        print(f"Dispersion plot written to {args.plot}")
+    if args.overlay:
+        plot_overlay(dataset).savefig(args.overlay)
+        print(f"Sweep overlay written to {args.overlay}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import argparse
+import sys
+
+import numpy as np
+
+import cv_analysis
+import cv_profiles
+
+# Default Savitzky-Golay / smoothing window (points) and polynomial order
+WINDOW_LENGTH = 11
+POLYORDER = 2
+
+
+class DopingProfile:
+    """Depth profile from differential C-V: N(V) and W(V) at every bias point"""
+
+    def __init__(self, V, W, N, dinvC2_dV, eps_s=cv_analysis.EPS_R * cv_analysis.EPS_0, A=cv_analysis.AREA):
+        self.V = V
+        self.W = W  # depletion width (nm)
+        self.N = N  # carrier concentration (m⁻³)
+        self.dinvC2_dV = dinvC2_dV
+        self.eps_s = eps_s
+        self.A = A
+
+    def with_constants(self, eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA):
+        """The same profile for another εr and junction area (W scales with εs·A, N with 1/(εs·A²))"""
+        eps_s = eps_r * cv_analysis.EPS_0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            N = 2 / (cv_analysis.Q * eps_s * A ** 2 * self.dinvC2_dV)
+        return DopingProfile(self.V, self.W * (eps_s * A) / (self.eps_s * self.A), N, self.dinvC2_dV, eps_s, A)
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({"VBias": self.V, "W (nm)": self.W, "N (m^-3)": self.N, "N (cm^-3)": self.N / 1e6,
+                             "d(1/C^2)/dV": self.dinvC2_dV})
+
+
+def _window(n_points, window_length, polyorder):
+    """Clip the window to the sweep length, keeping it odd and above polyorder"""
+    window_length = min(int(window_length), n_points if n_points % 2 else n_points - 1)
+    if window_length % 2 == 0:
+        window_length -= 1
+    if window_length <= polyorder:
+        raise cv_analysis.AnalysisError(
+            f"At least {polyorder + 2} data points are needed for a doping profile.")
+    return window_length
+
+
+def dinvC2_dV(V, C, window_length=WINDOW_LENGTH, polyorder=POLYORDER, method="savgol"):
+    """d(1/C²)/dV along the last axis of C (one sweep, or an (n_sweeps, n_points) stack on a shared grid)
+
+    "savgol" fits a local polynomial (Savitzky-Golay) and differentiates it,
+    which needs a uniform VBias step; "gradient" smooths 1/C² with a moving
+    average and takes np.gradient against VBias, which works on any grid.
+    """
+    V = np.asarray(V, dtype=float)
+    C = np.asarray(C, dtype=float)
+    invC2 = 1 / C ** 2
+    window_length = _window(V.shape[-1], window_length, polyorder)
+
+    if method == "savgol":
+        from scipy.signal import savgol_filter
+
+        step = np.diff(V)
+        if not np.allclose(step, step[0], rtol=1e-6, atol=1e-12):
+            raise cv_analysis.AnalysisError("Savitzky-Golay derivatives need a uniform VBias step; use 'gradient'.")
+        return savgol_filter(invC2, window_length, polyorder, deriv=1, delta=step[0], axis=-1, mode="interp")
+
+    if method == "gradient":
+        from scipy.ndimage import uniform_filter1d
+
+        smoothed = uniform_filter1d(invC2, window_length, axis=-1, mode="nearest")
+        return np.gradient(smoothed, V, axis=-1)
+
+    raise ValueError(f"Unknown derivative method: {method}")
+
+
+def doping_profile(V, C, eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA, window_length=WINDOW_LENGTH,
+                   polyorder=POLYORDER, method="savgol"):
+    """Differential C-V profile of one sweep or a stack of sweeps
+
+    N(V) = 2 / (q·εs·A²·d(1/C²)/dV) and W(V) = εs·A / C, evaluated at every
+    bias point with the same constants as the 1/C² fit. C may be a single
+    sweep or an (n_sweeps, n_points) array sharing the voltage grid V; the
+    whole computation is vectorized along the last axis.
+    """
+    eps_s = eps_r * cv_analysis.EPS_0
+    C = np.asarray(C, dtype=float)
+    slope = dinvC2_dV(V, C, window_length, polyorder, method)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        N = 2 / (cv_analysis.Q * eps_s * A ** 2 * slope)
+        W = eps_s * A / C * 1e9  # nm
+    return DopingProfile(np.asarray(V, dtype=float), W, N, slope, eps_s, A)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Doping profile N(W) of a sweep from differential C-V")
+    parser.add_argument("file", help="Sweep CSV file")
+    parser.add_argument("--window", type=int, default=WINDOW_LENGTH, help="Smoothing window (points, odd)")
+    parser.add_argument("--polyorder", type=int, default=POLYORDER, help="Savitzky-Golay polynomial order")
+    parser.add_argument("--method", choices=["savgol", "gradient"], default="savgol", help="Derivative method")
+    parser.add_argument("-o", "--output", help="Write the profile to this CSV instead of printing it")
+    cv_profiles.add_arguments(parser)
+    args = parser.parse_args(argv)
+    _, eps_r, area = cv_profiles.from_args(parser, args)
+
+    df, _ = cv_analysis.load_sweep(args.file)
+    profile = doping_profile(df['VBias'].to_numpy(), df['C'].to_numpy(), eps_r, area, window_length=args.window,
+                             polyorder=args.polyorder, method=args.method)
+    table = profile.to_frame()
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Profile written to {args.output}")
+    else:
+        print(table.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import socket
+
+import numpy as np
+
+DEFAULT_PORT = 5025  # raw SCPI socket port of Keysight instruments
+DEFAULT_FREQUENCY = 1e6  # Hz
+DEFAULT_AC_LEVEL = 0.03  # V rms
+
+
+def bias_list(start, stop, step):
+    """Bias values from start to stop inclusive"""
+    n_points = int(round(abs(stop - start) / abs(step))) + 1
+    return np.linspace(start, stop, n_points)
+
+
+def parse_address(address):
+    """(host, port) from "HOST[:PORT]", defaulting to the raw SCPI port"""
+    host, _, port = address.partition(":")
+    return host, int(port) if port else DEFAULT_PORT
+
+
+class InstrumentError(Exception):
+    """Raised when the instrument rejects a command or returns malformed data"""
+
+
+def encode_block(values, byte_order="<"):
+    """IEEE 488.2 definite-length block of float64 values ("<" little-endian, ">" big-endian)"""
+    payload = np.ascontiguousarray(values, dtype=f"{byte_order}f8").tobytes()
+    length = str(len(payload))
+    return f"#{len(length)}{length}".encode("ascii") + payload
+
+
+def read_block(stream):
+    """Read one definite-length block ("#<digits><length><payload>") from a binary stream"""
+    start = stream.read(1)
+    while start in (b" ", b","):
+        start = stream.read(1)
+    if start != b"#":
+        raise InstrumentError(f"Expected a binary block, got {start + stream.readline()!r}")
+    digits = int(stream.read(1))
+    if not digits:
+        raise InstrumentError("Indefinite-length blocks are not supported.")
+    length = int(stream.read(digits))
+    payload = stream.read(length)
+    if len(payload) != length:
+        raise InstrumentError("Connection closed in the middle of a binary block.")
+    return payload
+
+
+class Instrument:
+    """What the analysis code needs from a C-V meter: configure it, then sweep a bias list"""
+
+    def configure(self, frequency=DEFAULT_FREQUENCY, ac_level=DEFAULT_AC_LEVEL):
+        raise NotImplementedError
+
+    def sweep(self, voltages):
+        """Measure C and G at every bias in voltages and return them as two float64 arrays"""
+        raise NotImplementedError
+
+    def points(self, voltages):
+        """Yield (VBias, C, G) tuples of a sweep, e.g. for cv_stream.StreamingAnalyzer"""
+        C, G = self.sweep(voltages)
+        for vbias, c, g in zip(voltages, C, G):
+            yield float(vbias), float(c), float(g)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SCPIInstrument(Instrument):
+    """SCPI driver for a capacitance measurement unit over a raw TCP socket
+
+    sweep() batches a whole sweep: the bias list goes out as one binary
+    block (:SOUR:LIST:VOLT), the setup, trigger and fetch commands are
+    written in a single send, and C/G come back as one binary block from
+    :FETC?. That is one round trip per sweep instead of one per point.
+    measure_point() keeps the per-point query path for comparison and for
+    instruments without list sweeps.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, timeout=10.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile("rb")
+
+    def write(self, *commands):
+        """Send one or more commands in a single packet; bytes arguments are sent as-is"""
+        data = b"".join((c if isinstance(c, bytes) else c.encode("ascii")) + b"\n" for c in commands)
+        self.sock.sendall(data)
+
+    def read_line(self):
+        line = self.stream.readline()
+        if not line:
+            raise InstrumentError("Connection closed by the instrument.")
+        return line.decode("ascii").strip()
+
+    def query(self, command):
+        self.write(command)
+        return self.read_line()
+
+    def check_error(self):
+        """Raise InstrumentError if the instrument's error queue is not empty"""
+        error = self.query(":SYST:ERR?")
+        code = error.split(",", 1)[0]
+        if code.strip() not in ("0", "+0"):
+            raise InstrumentError(error)
+
+    def identify(self):
+        return self.query("*IDN?")
+
+    def reset(self):
+        self.write("*RST", "*CLS")
+
+    def configure(self, frequency=DEFAULT_FREQUENCY, ac_level=DEFAULT_AC_LEVEL):
+        self.write(f":SENS:FREQ {frequency:g}", f":SOUR:VOLT:AC {ac_level:g}")
+        self.check_error()
+
+    def sweep(self, voltages):
+        voltages = np.asarray(voltages, dtype=float)
+        self.write(":FORM:DATA REAL,64", ":FORM:BORD SWAP", b":SOUR:LIST:VOLT " + encode_block(voltages),
+                   ":SOUR:VOLT:MODE LIST", ":INIT", ":FETC?")
+        data = np.frombuffer(read_block(self.stream), dtype="<f8")
+        self.stream.readline()  # terminator after the block
+        if len(data) != 2 * len(voltages):
+            self.check_error()
+            raise InstrumentError(f"Expected {2 * len(voltages)} values from :FETC?, got {len(data)}.")
+        # Readings come interleaved as C0, G0, C1, G1, ...
+        return data[0::2].copy(), data[1::2].copy()
+
+    def measure_point(self, vbias):
+        """Set one DC bias and query C and G (one round trip per point)"""
+        self.write(f":SOUR:VOLT {vbias:g}", ":MEAS:CG?")
+        c, g = self.read_line().split(",")
+        return float(c), float(g)
+
+    def sweep_points(self, voltages):
+        """Point-by-point sweep yielding (VBias, C, G) as each reading arrives"""
+        for vbias in voltages:
+            c, g = self.measure_point(float(vbias))
+            yield float(vbias), c, g
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
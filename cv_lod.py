@@ -0,0 +1,113 @@
+import numpy as np
+
+# Series shorter than this are drawn as-is
+LOD_MIN_POINTS = 4000
+
+# Pixel columns assumed before an axes has been laid out
+DEFAULT_COLUMNS = 800
+
+
+def minmax_decimate(x, y, n_columns, x_low=None, x_high=None):
+    """Keep the lowest and highest point of every pixel column of a series sorted by x
+
+    Columns split [x_low, x_high] (default: the data range) evenly. The
+    first and last points are always kept, and kept points stay in x order,
+    so peaks, dips and the envelope of noise look the same as the full
+    series at that resolution. Everything is a few vectorized passes.
+    """
+    n = len(x)
+    if n <= 2 * n_columns:
+        return x, y
+    if x_low is None or x_high is None or not x_high > x_low:
+        x_low, x_high = x[0], x[-1]
+        if not x_high > x_low:
+            return x[[0, -1]], y[[0, -1]]
+
+    edges = np.linspace(x_low, x_high, n_columns + 1)[1:-1]
+    starts = np.unique(np.concatenate([[0], np.searchsorted(x, edges, side="left")]))
+    starts = starts[starts < n]
+    lengths = np.diff(np.append(starts, n))
+    column = np.repeat(np.arange(len(starts)), lengths)
+
+    keep = [starts, starts + lengths - 1]
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(y, starts)
+        hits = np.flatnonzero(y == extreme[column])
+        # First hit per column (hits are in column order)
+        first = np.concatenate([[True], column[hits][1:] != column[hits][:-1]])
+        keep.append(hits[first])
+    keep = np.unique(np.concatenate(keep))
+    return x[keep], y[keep]
+
+
+class MinMaxDecimator:
+    """Level-of-detail view of one (x, y) series for a given x range and pixel width
+
+    The series is sorted by x once, so every later view only slices the
+    visible range with searchsorted and reduces it with minmax_decimate.
+    Non-finite points are dropped. Sweeps that double back on themselves
+    are drawn in x order once decimated.
+    """
+
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        x, y = x[finite], y[finite]
+        order = np.argsort(x, kind="stable")
+        self.x = x[order]
+        self.y = y[order]
+
+    def __len__(self):
+        return len(self.x)
+
+    def view(self, x_low, x_high, n_columns=DEFAULT_COLUMNS, pad=True):
+        """Decimated (x, y) inside [x_low, x_high]
+
+        With pad, one point beyond each end is included so lines run on to
+        the edge of the axes instead of stopping at the last visible point.
+        """
+        i = int(np.searchsorted(self.x, x_low, side="left"))
+        j = int(np.searchsorted(self.x, x_high, side="right"))
+        if pad:
+            i, j = max(i - 1, 0), min(j + 1, len(self.x))
+        return minmax_decimate(self.x[i:j], self.y[i:j], n_columns, x_low, x_high)
+
+
+def axes_columns(ax):
+    """Width of an axes in pixels (DEFAULT_COLUMNS before the first layout)"""
+    width = int(ax.bbox.width)
+    return width if width > 1 else DEFAULT_COLUMNS
+
+
+class LineOverlay:
+    """Many sweeps drawn as one LineCollection, re-decimated when the x limits change
+
+    One collection instead of a Line2D per sweep keeps artist overhead
+    constant, and each sweep contributes at most two points per pixel column
+    of the visible range.
+    """
+
+    def __init__(self, ax, sweeps, **line_kwargs):
+        from matplotlib.collections import LineCollection
+
+        self.ax = ax
+        self.decimators = [MinMaxDecimator(x, y) for x, y in sweeps]
+        self.collection = LineCollection([], **line_kwargs)
+        ax.add_collection(self.collection, autolim=False)
+
+        # Autoscale to the full data, not to whatever is decimated at the moment
+        series = [d for d in self.decimators if len(d)]
+        if series:
+            ax.update_datalim([(min(d.x[0] for d in series), min(d.y.min() for d in series)),
+                               (max(d.x[-1] for d in series), max(d.y.max() for d in series))])
+            ax.autoscale_view()
+        self.refresh()
+        ax.callbacks.connect("xlim_changed", lambda ax: self.refresh())
+
+    def refresh(self):
+        x_low, x_high = self.ax.get_xlim()
+        if x_low > x_high:
+            x_low, x_high = x_high, x_low
+        columns = axes_columns(self.ax)
+        self.collection.set_segments([np.column_stack(d.view(x_low, x_high, columns)) for d in self.decimators])
@@ -0,0 +1,121 @@
+import csv
+import re
+
+import numpy as np
+import pandas as pd
+
+import cv_analysis
+
+# SI prefixes accepted in front of a unit, e.g. "100 kHz" or "33.6 pF"
+SI_PREFIXES = {"f": 1e-15, "p": 1e-12, "n": 1e-9, "u": 1e-6, "µ": 1e-6, "m": 1e-3,
+               "k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9}
+
+_QUANTITY = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([^\d\s]*)\s*$")
+
+
+def parse_quantity(text, unit=None):
+    """Parse values like '1000000 Hz', '1 MHz' or '1e6' into (value in base units, unit)
+
+    Returns (nan, "") when the text is not a number with an optional unit.
+    """
+    match = _QUANTITY.match(str(text)) if text is not None else None
+    if not match:
+        return np.nan, ""
+
+    value = float(match.group(1))
+    suffix = match.group(2)
+    if unit is not None and suffix.endswith(unit):
+        prefix, suffix = suffix[:-len(unit)], unit
+    elif len(suffix) > 1 and suffix[0] in SI_PREFIXES:
+        prefix, suffix = suffix[0], suffix[1:]
+    else:
+        prefix = ""
+
+    if prefix:
+        if prefix not in SI_PREFIXES:
+            return np.nan, ""
+        value *= SI_PREFIXES[prefix]
+    return value, suffix
+
+
+class ParsedSweep:
+    """Numeric columns of one sweep as float64 arrays plus its first-row metadata"""
+
+    def __init__(self, VBias, C, G, metadata, file_path=None):
+        self.VBias = VBias
+        self.C = C
+        self.G = G
+        self.metadata = metadata
+        self.file_path = file_path
+
+    def __len__(self):
+        return len(self.VBias)
+
+    @property
+    def frequency(self):
+        """Measurement frequency in Hz (nan when missing or unreadable)"""
+        return parse_quantity(self.metadata.get("Frequency"), "Hz")[0]
+
+    def device_properties(self):
+        """Device properties in the same layout as cv_analysis.extract_device_properties"""
+        device_properties = {prop: self.metadata.get(prop, "N/A") for prop in cv_analysis.PROPERTY_COLUMNS}
+        device_properties.update({prop: self.metadata[prop] for prop in cv_analysis.LOCATION_COLUMNS
+                                  if prop in self.metadata})
+
+        # Add additional calculated properties
+        device_properties["Number of Data Points"] = len(self)
+        if len(self):
+            device_properties["Voltage Range"] = f"{np.nanmin(self.VBias):.2f} V to {np.nanmax(self.VBias):.2f} V"
+        else:
+            device_properties["Voltage Range"] = "N/A"
+        return device_properties
+
+    def to_frame(self):
+        """DataFrame with the VBias, C, G and 1/C^2 columns used by the GUI and analysis"""
+        return pd.DataFrame({"VBias": self.VBias, "C": self.C, "G": self.G, "1/C^2": 1 / self.C ** 2}, copy=False)
+
+
+def _read_header(file_path):
+    """Return (stripped column names, first data row) without reading the rest of the file"""
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        first_row = next((row for row in reader if any(cell.strip() for cell in row)), [])
+    if header is None:
+        raise cv_analysis.AnalysisError("The sweep file is empty.")
+    return [name.strip() for name in header], first_row
+
+
+def parse_sweep(file_path):
+    """Parse an instrument sweep export into a ParsedSweep
+
+    The export repeats its metadata (Record Time, Monitor Unit, Frequency,
+    Batch ID, Record Date) only on the first data row and pads header names
+    with spaces. Only VBias, C and G are parsed for the whole file, straight
+    into float64 arrays; the metadata comes from the first row alone.
+    """
+    names, first_row = _read_header(file_path)
+
+    # Verify required columns
+    missing_cols = [col for col in cv_analysis.REQUIRED_COLUMNS if col not in names]
+    if missing_cols:
+        raise cv_analysis.MissingColumnsError(missing_cols)
+
+    metadata = {}
+    for prop in cv_analysis.PROPERTY_COLUMNS + cv_analysis.LOCATION_COLUMNS:
+        if prop in names:
+            index = names.index(prop)
+            if index < len(first_row) and first_row[index].strip():
+                metadata[prop] = first_row[index].strip()
+
+    usecols = [names.index(col) for col in cv_analysis.REQUIRED_COLUMNS]
+    try:
+        data = pd.read_csv(file_path, usecols=usecols, dtype=np.float64, encoding="utf-8-sig")
+    except ValueError:
+        # Stray text in a numeric column: fall back to a tolerant parse with NaN for bad cells
+        data = pd.read_csv(file_path, usecols=usecols, dtype=str, encoding="utf-8-sig")
+        data = data.apply(pd.to_numeric, errors="coerce")
+
+    # Columns come back in file order; map them to VBias, C, G explicitly
+    columns = {name.strip(): data[name].to_numpy(dtype=np.float64) for name in data.columns}
+    return ParsedSweep(columns["VBias"], columns["C"], columns["G"], metadata, file_path)
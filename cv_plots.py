@@ -0,0 +1,351 @@
+import numpy as np
+import tkinter as tk
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+import cv_lod
+
+# Subplot layout of each selectable graph
+VIEW_PANELS = {
+    "inv_c2": ["inv_c2"],
+    "c": ["c"],
+    "g": ["g"],
+    "all": ["inv_c2", "c", "g"],
+    "profile": ["inv_c2", "profile"],
+}
+
+# (rows, columns) of views that are not a single vertical stack
+VIEW_GRID = {
+    "profile": (1, 2),
+}
+
+VIEW_FIGSIZE = {
+    "all": (7, 8),
+    "profile": (9, 4.5),
+}
+
+
+def _span(values):
+    """Finite (min, max) of an array with matplotlib's default 5% margin"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    low, high = values.min(), values.max()
+    pad = (high - low) * 0.05 or abs(low) * 0.05 or 1.0
+    return low - pad, high + pad
+
+
+def _set_limits(ax, xs, ys):
+    x_span = _span(np.concatenate([np.ravel(x) for x in xs]))
+    y_span = _span(np.concatenate([np.ravel(y) for y in ys]))
+    if x_span:
+        ax.set_xlim(*x_span)
+    if y_span:
+        ax.set_ylim(*y_span)
+
+
+class SweepPlot:
+    """Persistent figure and canvas for one graph view
+
+    The artists are created once and later updates only swap their data
+    (set_offsets/set_data). The selected region, fit line and V_bi marker
+    are animated artists that are blitted over a cached background, so the
+    fit window can change without redrawing the full scatter.
+
+    Series longer than cv_lod.LOD_MIN_POINTS are drawn min/max decimated to
+    the axes' pixel columns and re-decimated whenever the x limits change,
+    e.g. on toolbar zoom or pan.
+    """
+
+    def __init__(self, master, graph_type, on_window_drag=None, on_window_release=None):
+        self.graph_type = graph_type
+        self.on_window_drag = on_window_drag
+        self.on_window_release = on_window_release
+        self.drag_start = None
+        self.last_span = None
+        self.figure = Figure(figsize=VIEW_FIGSIZE.get(graph_type, (7, 5)), dpi=100)
+        self.axes = {}
+        self.overlay = []
+        self.background = None
+        self.version = None
+
+        # Decimated series per axes: name -> (ax, MinMaxDecimator, setter, pad, (low, high) clip or None)
+        self.lod = {}
+
+        panels = VIEW_PANELS[graph_type]
+        rows, cols = VIEW_GRID.get(graph_type, (len(panels), 1))
+        for i, panel in enumerate(panels):
+            ax = self.figure.add_subplot(rows, cols, i + 1)
+            self.axes[panel] = ax
+            getattr(self, f"create_{panel}")(ax)
+            ax.callbacks.connect("xlim_changed", self.refresh_lod)
+
+        self.figure.tight_layout()
+
+        # Add figure to tkinter window
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        if "inv_c2" in self.axes:
+            self.canvas.mpl_connect("button_press_event", self.on_press)
+            self.canvas.mpl_connect("motion_notify_event", self.on_motion)
+            self.canvas.mpl_connect("button_release_event", self.on_release)
+        self.widget = self.canvas.get_tk_widget()
+
+        # Zoom/pan toolbar (needs a Tk master; headless canvases go without)
+        self.toolbar = None
+        if master is not None:
+            self.toolbar = NavigationToolbar2Tk(self.canvas, master, pack_toolbar=False)
+            self.toolbar.update()
+
+    def show(self):
+        if self.toolbar is not None:
+            self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.widget.pack(fill=tk.BOTH, expand=True)
+
+    def hide(self):
+        if self.toolbar is not None:
+            self.toolbar.pack_forget()
+        self.widget.pack_forget()
+
+    def set_series(self, name, ax, x, y, setter, pad=True, clip=None, decimator=None):
+        """Hand (x, y) to setter, decimated to the visible range when the series is long
+
+        A decimator may be shared between series of the same data, as the
+        selected region shares the 1/C² scatter's.
+        """
+        if decimator is None:
+            if len(x) <= cv_lod.LOD_MIN_POINTS:
+                self.lod.pop(name, None)
+                setter(x, y)
+                return
+            decimator = cv_lod.MinMaxDecimator(x, y)
+        self.lod[name] = (ax, decimator, setter, pad, clip)
+        self.refresh_series(name)
+
+    def refresh_series(self, name):
+        ax, decimator, setter, pad, clip = self.lod[name]
+        x_low, x_high = sorted(ax.get_xlim())
+        if clip is not None:
+            x_low, x_high = max(x_low, clip[0]), min(x_high, clip[1])
+        if x_low > x_high:
+            setter(np.empty(0), np.empty(0))
+            return
+        setter(*decimator.view(x_low, x_high, cv_lod.axes_columns(ax), pad))
+
+    def refresh_lod(self, ax):
+        """Re-decimate the series of an axes after its x limits changed"""
+        for name, entry in self.lod.items():
+            if entry[0] is ax:
+                self.refresh_series(name)
+
+    def create_inv_c2(self, ax):
+        """Create the 1/C² vs V artists"""
+        self.all_points = ax.scatter([], [], color='blue', alpha=0.6, label='All data')
+        self.selected_points = ax.scatter([], [], color='red', label='Selected region', animated=True)
+        self.fit_line, = ax.plot([], [], 'r--', label='Fit', animated=True)
+        self.v_bi_line = ax.axvline(0, color='green', linestyle='--', label='V_bi', animated=True, visible=False)
+
+        # Span shown while dragging out a new fit window
+        self.span = Rectangle((0, 0), 0, 1, transform=ax.get_xaxis_transform(), color='red', alpha=0.15,
+                              animated=True, visible=False)
+        ax.add_patch(self.span)
+        self.overlay.extend([self.span, self.selected_points, self.fit_line, self.v_bi_line])
+
+        ax.set_xlabel('Voltage (V)')
+        ax.set_ylabel('1/C² (F⁻² × 10²⁴)')
+        ax.set_title('1/C² vs. V')
+        ax.grid(True, alpha=0.3)
+
+    def create_c(self, ax):
+        """Create the C vs V artists"""
+        self.c_points = ax.scatter([], [], color='purple')
+        ax.set_xlabel('Voltage (V)')
+        ax.set_ylabel('Capacitance (pF)')
+        ax.set_title('C vs. V')
+        ax.grid(True, alpha=0.3)
+
+    def create_g(self, ax):
+        """Create the G vs V artists"""
+        self.g_line, = ax.plot([], [], color='orange')
+        ax.set_xlabel('Voltage (V)')
+        ax.set_ylabel('Conductance (µS)')
+        ax.set_title('G vs. V')
+        ax.grid(True, alpha=0.3)
+
+    def create_profile(self, ax):
+        """Create the doping profile N vs W artists"""
+        self.profile_line, = ax.plot([], [], color='darkgreen', marker='.', markersize=3)
+        ax.set_xlabel('Depletion Width W (nm)')
+        ax.set_ylabel('N (cm⁻³)')
+        ax.set_title('Doping Profile N vs. W')
+        ax.grid(True, alpha=0.3)
+
+    def update(self, version, V, C, G, invC2, min_v, max_v, slope, intercept, r_value, V_bi, profile=None):
+        """Load a sweep and its fit into the existing artists and redraw"""
+        if version == self.version:
+            return
+        self.version = version
+
+        self.V, self.invC2 = V, invC2
+        self.lod = {}
+        if "inv_c2" in self.axes:
+            self.plot_inv_c2(self.axes["inv_c2"], min_v, max_v, slope, intercept, r_value, V_bi)
+        if "c" in self.axes:
+            self.plot_c(self.axes["c"], V, C)
+        if "g" in self.axes:
+            self.plot_g(self.axes["g"], V, G)
+        if "profile" in self.axes:
+            self.plot_profile(self.axes["profile"], profile)
+
+        self.figure.tight_layout()
+        # Layout changes the pixel width, so decimate again at the final size
+        for ax in self.axes.values():
+            self.refresh_lod(ax)
+        self.background = None
+        self.canvas.draw_idle()
+
+    def plot_inv_c2(self, ax, min_v, max_v, slope, intercept, r_value, V_bi):
+        """Plot 1/C² vs V graph"""
+        self.set_series("all_points", ax, self.V, self.invC2 * 1e-24, self._set_offsets(self.all_points))
+        x_fit, y_fit = self.set_fit(min_v, max_v, slope, intercept, r_value, V_bi)
+
+        xs, ys = [self.V, x_fit], [self.invC2 * 1e-24, y_fit]
+        if self.v_bi_line.get_visible():
+            xs.append([V_bi])
+        _set_limits(ax, xs, ys)
+
+        handles = [self.all_points, self.selected_points, self.fit_line]
+        if self.v_bi_line.get_visible():
+            handles.append(self.v_bi_line)
+        ax.legend(handles=handles)
+
+    def set_fit(self, min_v, max_v, slope, intercept, r_value, V_bi):
+        """Update the selected region, fit line and V_bi marker (the blitted overlay)"""
+        V, invC2 = self.V, self.invC2
+
+        # Select linear region (decimated like the full scatter, clipped to the window)
+        lod = self.lod.get("all_points")
+        if lod is not None:
+            self.set_series("selected_points", lod[0], V, None, self._set_offsets(self.selected_points), pad=False,
+                            clip=(min_v, max_v), decimator=lod[1])
+        else:
+            mask = (V >= min_v) & (V <= max_v)
+            self.selected_points.set_offsets(np.column_stack([V[mask], invC2[mask] * 1e-24]))
+
+        # Plot regression line
+        x_fit = np.linspace(np.nanmin(V), np.nanmax(V), 100)
+        y_fit = (slope * x_fit + intercept) * 1e-24
+        self.fit_line.set_data(x_fit, y_fit)
+        self.fit_line.set_label(f'Fit (R² = {r_value ** 2:.4f})')
+
+        # Plot V_bi if within reasonable range
+        v_max = np.nanmax(np.abs(V))
+        show_v_bi = bool(-2 * v_max < V_bi < 2 * v_max)
+        self.v_bi_line.set_visible(show_v_bi)
+        if show_v_bi:
+            self.v_bi_line.set_xdata([V_bi, V_bi])
+            self.v_bi_line.set_label(f'V_bi = {V_bi:.2f} V')
+        return x_fit, y_fit
+
+    def plot_c(self, ax, V, C):
+        """Plot C vs V graph"""
+        self.set_series("c_points", ax, V, C * 1e12, self._set_offsets(self.c_points))
+        _set_limits(ax, [V], [C * 1e12])
+
+    def plot_g(self, ax, V, G):
+        """Plot G vs V graph"""
+        self.set_series("g_line", ax, V, G * 1e6, self.g_line.set_data)
+        _set_limits(ax, [V], [G * 1e6])
+
+    def plot_profile(self, ax, profile):
+        """Plot the doping profile N vs W"""
+        if profile is None:
+            self.lod.pop("profile_line", None)
+            self.profile_line.set_data([], [])
+            return
+
+        W, N = profile.W, profile.N / 1e6
+        self.set_series("profile_line", ax, W, N, self.profile_line.set_data)
+
+        # Log scale only makes sense when every concentration is positive
+        finite = np.isfinite(N) & np.isfinite(W)
+        positive = bool(finite.any() and (N[finite] > 0).all())
+        ax.set_yscale('log' if positive else 'linear')
+        if positive:
+            ax.set_xlim(*_span(W[finite]))
+            ax.set_ylim(N[finite].min() / 1.5, N[finite].max() * 1.5)
+        else:
+            _set_limits(ax, [W[finite]], [N[finite]])
+
+    @staticmethod
+    def _set_offsets(collection):
+        return lambda x, y: collection.set_offsets(np.column_stack([x, y]))
+
+    def on_draw(self, event):
+        """Cache the static background after a full draw and paint the overlay on top"""
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_overlay()
+
+    def draw_overlay(self):
+        for artist in self.overlay:
+            if artist.get_visible():
+                self.figure.draw_artist(artist)
+
+    def blit_fit(self, min_v, max_v, slope, intercept, r_value, V_bi):
+        """Move the fit overlay without redrawing the static artists"""
+        if "inv_c2" not in self.axes:
+            return
+        self.set_fit(min_v, max_v, slope, intercept, r_value, V_bi)
+        self.blit_overlay()
+
+    def blit_overlay(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_overlay()
+        self.canvas.blit(self.figure.bbox)
+
+    def drag_span(self, event):
+        """Current (low, high) voltage span of a drag on the 1/C² axes"""
+        x = event.xdata if event.inaxes is self.axes["inv_c2"] else None
+        if x is None:
+            return None
+        return min(self.drag_start, x), max(self.drag_start, x)
+
+    def on_press(self, event):
+        toolbar = self.canvas.toolbar
+        if event.button != 1 or event.inaxes is not self.axes["inv_c2"] or (toolbar and toolbar.mode):
+            return
+        self.drag_start = event.xdata
+        self.span.set_x(event.xdata)
+        self.span.set_width(0)
+        self.span.set_visible(True)
+
+    def on_motion(self, event):
+        if self.drag_start is None:
+            return
+        span = self.drag_span(event)
+        if span is None:
+            return
+        self.last_span = span
+        self.span.set_x(span[0])
+        self.span.set_width(span[1] - span[0])
+        if self.on_window_drag is None or not self.on_window_drag(*span):
+            # The callback blits when it refits; otherwise just move the span
+            self.blit_overlay()
+
+    def on_release(self, event):
+        if self.drag_start is None:
+            return
+        # Releasing outside the axes keeps the last span seen inside them
+        span = self.drag_span(event) or self.last_span
+        self.drag_start = None
+        self.last_span = None
+        self.span.set_visible(False)
+        if span is not None and self.on_window_release is not None:
+            self.on_window_release(*span)
+        else:
+            self.blit_overlay()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import sys
+
+import cv_analysis
+
+DEFAULT_PROFILES_PATH = os.path.join(os.path.expanduser("~"), ".config", "cmu_setup", "profiles.json")
+
+DEFAULT_DEVICE = "Default"
+
+# Static relative permittivities of common diode materials
+MATERIALS = {
+    "Si": cv_analysis.EPS_R,
+    "Ge": 16.0,
+    "GaAs": 12.9,
+    "InP": 12.5,
+    "4H-SiC": 9.7,
+    "GaN": 8.9,
+    "ZnO": 8.5,
+}
+
+# Device profiles: junction area (m²) and the material the 1/C² slope is evaluated for
+DEVICES = {
+    DEFAULT_DEVICE: {"material": "Si", "area": cv_analysis.AREA},
+}
+
+
+class ProfileError(Exception):
+    """Unknown profile name or malformed profiles file"""
+
+
+class Profiles:
+    """Material (εr) and device (area, material) profiles
+
+    The built-in MATERIALS and DEVICES are always available; a JSON file
+    such as
+
+        {"materials": {"ZnO": {"eps_r": 8.66}},
+         "devices": {"p-Si/n-ZnO 0.5 mm": {"material": "Si", "area": 2.5e-7}}}
+
+    adds to them or overrides entries of the same name.
+    """
+
+    def __init__(self, materials=None, devices=None, path=None):
+        self.materials = dict(MATERIALS if materials is None else materials)
+        self.devices = {name: dict(device) for name, device in (DEVICES if devices is None else devices).items()}
+        self.path = path
+
+    @classmethod
+    def load(cls, path=None):
+        """Built-in profiles merged with the profiles file
+
+        The file defaults to CMU_PROFILES or DEFAULT_PROFILES_PATH and may be
+        missing; an explicitly given path must exist.
+        """
+        explicit = path is not None
+        path = path or os.environ.get("CMU_PROFILES", DEFAULT_PROFILES_PATH)
+        profiles = cls(path=path)
+        if not explicit and not os.path.exists(path):
+            return profiles
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ProfileError(f"Cannot read profiles from {path}: {e}") from e
+
+        try:
+            for name, material in data.get("materials", {}).items():
+                profiles.materials[name] = float(material["eps_r"])
+            for name, device in data.get("devices", {}).items():
+                profiles.devices[name] = {"material": str(device.get("material", "Si")),
+                                          "area": float(device["area"])}
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ProfileError(f"Malformed profiles file {path}: {e!r}") from e
+
+        for name, device in profiles.devices.items():
+            if device["material"] not in profiles.materials:
+                raise ProfileError(f"Device '{name}' uses unknown material '{device['material']}'.")
+        return profiles
+
+    def to_json(self):
+        return {"materials": {name: {"eps_r": eps_r} for name, eps_r in self.materials.items()},
+                "devices": self.devices}
+
+    def save(self, path=None):
+        path = path or self.path or DEFAULT_PROFILES_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+        return path
+
+    def eps_r(self, material):
+        if material not in self.materials:
+            raise ProfileError(f"Unknown material '{material}' (known: {', '.join(self.materials)}).")
+        return self.materials[material]
+
+    def device(self, name):
+        if name not in self.devices:
+            raise ProfileError(f"Unknown device profile '{name}' (known: {', '.join(self.devices)}).")
+        return self.devices[name]
+
+    def resolve(self, device=None, material=None, eps_r=None, area=None):
+        """(eps_r, area) for a device profile, with a material or explicit values overriding it"""
+        profile = self.device(device or DEFAULT_DEVICE)
+        if eps_r is None:
+            eps_r = self.eps_r(material or profile["material"])
+        if area is None:
+            area = profile["area"]
+        return float(eps_r), float(area)
+
+
+def add_arguments(parser):
+    """--profiles/--device/--material/--eps-r/--area options shared by the command line tools"""
+    group = parser.add_argument_group("device constants")
+    group.add_argument("--profiles", default=None,
+                       help=f"Material/device profiles file (default: {DEFAULT_PROFILES_PATH} if present)")
+    group.add_argument("--device", default=None, help=f"Device profile (default: {DEFAULT_DEVICE})")
+    group.add_argument("--material", default=None, help="Material profile, overriding the device's material")
+    group.add_argument("--eps-r", type=float, default=None, help="Relative permittivity, overriding the profiles")
+    group.add_argument("--area", type=float, default=None, help="Junction area (m²), overriding the profiles")
+
+
+def from_args(parser, args):
+    """(Profiles, eps_r, area) from the add_arguments options; profile errors end in parser.error"""
+    try:
+        profiles = Profiles.load(args.profiles)
+        eps_r, area = profiles.resolve(args.device, args.material, args.eps_r, args.area)
+    except ProfileError as e:
+        parser.error(str(e))
+    return profiles, eps_r, area
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List material and device profiles")
+    parser.add_argument("--profiles", default=None, help=f"Profiles file (default: {DEFAULT_PROFILES_PATH})")
+    parser.add_argument("--init", action="store_true",
+                        help="Write the built-in profiles to the profiles file as a starting point")
+    args = parser.parse_args(argv)
+
+    if args.init:
+        path = args.profiles or os.environ.get("CMU_PROFILES", DEFAULT_PROFILES_PATH)
+        if os.path.exists(path):
+            print(f"{path} already exists.", file=sys.stderr)
+            return 1
+        print(f"Profiles written to {Profiles().save(path)}")
+        return 0
+
+    try:
+        profiles = Profiles.load(args.profiles)
+    except ProfileError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print("Materials:")
+    for name, eps_r in profiles.materials.items():
+        print(f"  {name:<24s} εr = {eps_r:g}")
+    print("Devices:")
+    for name, device in profiles.devices.items():
+        print(f"  {name:<24s} {device['material']}, A = {device['area']:g} m²")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+import cv_analysis
+import cv_profiles
+import cv_robust
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "cmu_setup", "results.sqlite")
+
+# Rows fetched per round trip when streaming query results
+FETCH_ROWS = 50000
+
+# Rows per Excel worksheet; larger .xlsx exports are split across several sheets
+XLSX_MAX_ROWS = 1048576
+
+# Stored columns, in table and export order
+COLUMNS = ["id", "analyzed_at", "file_path", "file_hash", "batch_id", "frequency", "record_date", "record_time",
+           "monitor_unit", "device_properties", "method", "min_v", "max_v", "n_points", "slope", "intercept",
+           "r_value", "std_err", "V_bi", "N_A", "W", "r_squared", "eps_r", "area"]
+_TEXT_COLUMNS = {"analyzed_at", "file_path", "file_hash", "batch_id", "record_date", "record_time", "monitor_unit",
+                 "device_properties", "method"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    analyzed_at TEXT NOT NULL,
+    file_path TEXT,
+    file_hash TEXT,
+    batch_id TEXT,
+    frequency REAL,
+    record_date TEXT,
+    record_time TEXT,
+    monitor_unit TEXT,
+    device_properties TEXT,
+    method TEXT,
+    min_v REAL,
+    max_v REAL,
+    n_points INTEGER,
+    slope REAL,
+    intercept REAL,
+    r_value REAL,
+    std_err REAL,
+    V_bi REAL,
+    N_A REAL,
+    W REAL,
+    r_squared REAL,
+    eps_r REAL,
+    area REAL
+);
+CREATE INDEX IF NOT EXISTS results_batch_id ON results (batch_id);
+CREATE INDEX IF NOT EXISTS results_record_date ON results (record_date);
+CREATE INDEX IF NOT EXISTS results_frequency ON results (frequency);
+CREATE INDEX IF NOT EXISTS results_file_hash ON results (file_hash);
+"""
+
+# Run after _SCHEMA: databases created before the fit method was stored lack the column
+# (their rows keep method NULL, i.e. unknown)
+_METHOD_INDEX = "CREATE INDEX IF NOT EXISTS results_method ON results (method)"
+
+
+def file_hash(file_path):
+    """SHA-1 of a file's contents, read in 1 MB blocks"""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in ("", "N/A", "nan") else value
+
+
+def _iso_date(value):
+    """The export's M/D/YYYY Record Date as YYYY-MM-DD, so dates sort and range-filter as text"""
+    value = _text(value)
+    if value is None:
+        return None
+    for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return value
+
+
+def make_record(file_path, device_properties, result, eps_r=cv_analysis.EPS_R, digest=None):
+    """One results row (a tuple in COLUMNS order without id) for ResultsStore.add_many
+
+    Building records is cheap enough to do in batch worker processes, which
+    also keeps file hashing off the process that owns the database.
+    """
+    # Local import: cv_parser pulls in pandas, which the GUI only loads with the first file
+    import cv_parser
+
+    if digest is None and file_path is not None and os.path.exists(file_path):
+        digest = file_hash(file_path)
+    frequency = cv_parser.parse_quantity(device_properties.get("Frequency"), "Hz")[0]
+    properties = json.dumps(device_properties, default=str)
+    return (datetime.datetime.now().isoformat(timespec="seconds"),
+            os.path.abspath(file_path) if file_path else None, digest,
+            _text(device_properties.get("Batch ID")), None if math.isnan(frequency) else frequency,
+            _iso_date(device_properties.get("Record Date")), _text(device_properties.get("Record Time")),
+            _text(device_properties.get("Monitor Unit")), properties, getattr(result, "method", "ols"),
+            float(result.min_v), float(result.max_v), int(result.n_points), float(result.slope),
+            float(result.intercept), float(result.r_value), float(result.std_err), float(result.V_bi),
+            float(result.N_A), float(result.W), float(result.r_squared), float(eps_r), float(result.A))
+
+
+class ResultsStore:
+    """SQLite database of every analysis, indexed on Batch ID, Record Date, frequency, file hash and fit method
+
+    Inserts from batch runs go through add_many, one transaction per call,
+    and queries are streamed in FETCH_ROWS chunks so exports of millions of
+    rows never hold the whole result set in memory.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.environ.get("CMU_RESULTS_DB", DEFAULT_DB_PATH)
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(results)")]
+        if "method" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE results ADD COLUMN method TEXT")
+        self.conn.execute(_METHOD_INDEX)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, file_path, device_properties, result, eps_r=cv_analysis.EPS_R, digest=None):
+        """Store one analysis and return its row id"""
+        with self.conn:
+            cursor = self.conn.execute(self._insert_sql(),
+                                       make_record(file_path, device_properties, result, eps_r, digest))
+        return cursor.lastrowid
+
+    def add_many(self, records):
+        """Store many make_record() tuples in a single transaction and return how many were written"""
+        with self.conn:
+            cursor = self.conn.executemany(self._insert_sql(), records)
+        return cursor.rowcount
+
+    @staticmethod
+    def _insert_sql():
+        names = COLUMNS[1:]
+        return f"INSERT INTO results ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+
+    @staticmethod
+    def _where(batch_id=None, date_from=None, date_to=None, frequency=None, file_hash=None, min_r_squared=None,
+               method=None):
+        """SQL WHERE clause and parameters for the supported filters (all optional, combined with AND)"""
+        clauses, params = [], []
+        if batch_id is not None:
+            clauses.append("batch_id = ?")
+            params.append(batch_id)
+        if date_from is not None:
+            clauses.append("record_date >= ?")
+            params.append(_iso_date(date_from))
+        if date_to is not None:
+            clauses.append("record_date <= ?")
+            params.append(_iso_date(date_to))
+        if frequency is not None:
+            # Frequencies are parsed floats; match within a relative 1e-9
+            clauses.append("frequency BETWEEN ? AND ?")
+            params.extend([frequency * (1 - 1e-9), frequency * (1 + 1e-9)])
+        if file_hash is not None:
+            clauses.append("file_hash = ?")
+            params.append(file_hash)
+        if min_r_squared is not None:
+            clauses.append("r_squared >= ?")
+            params.append(min_r_squared)
+        if method is not None:
+            clauses.append("method = ?")
+            params.append(method)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def iter_chunks(self, chunk_rows=FETCH_ROWS, **filters):
+        """Yield lists of result tuples (COLUMNS order) matching the filters, oldest first"""
+        where, params = self._where(**filters)
+        cursor = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM results{where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                return
+            yield rows
+
+    def query(self, limit=None, **filters):
+        """Matching results as a DataFrame (use iter_chunks or export for very large result sets)"""
+        import pandas as pd
+
+        where, params = self._where(**filters)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM results{where} ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return pd.read_sql_query(sql, self.conn, params=params, index_col="id")
+
+    def recompute(self, eps_r=cv_analysis.EPS_R, area=cv_analysis.AREA, chunk_rows=FETCH_ROWS, **filters):
+        """Re-derive N_A and W of the matching results for another εr and area, returning how many changed
+
+        Only the stored slope and intercept are read back, in id-ordered
+        chunks, and the new values are computed per chunk as array
+        operations; nothing is refitted and no sweep file is opened. V_bi
+        and R² do not depend on εr or the area and are left alone. All
+        chunks are written in one transaction.
+        """
+        where, params = self._where(**filters)
+        where = (where + " AND" if where else " WHERE") + " id > ?"
+        sql = f"SELECT id, slope, intercept FROM results{where} ORDER BY id LIMIT ?"
+        updated, last_id = 0, 0
+        with self.conn:
+            while True:
+                rows = self.conn.execute(sql, params + [last_id, chunk_rows]).fetchall()
+                if not rows:
+                    return updated
+                ids, slope, intercept = np.array(rows, dtype=float).T
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    N_A, W = cv_analysis.extract_parameters(slope, intercept, eps_r * cv_analysis.EPS_0, area)[2:]
+                self.conn.executemany("UPDATE results SET eps_r = ?, area = ?, N_A = ?, W = ? WHERE id = ?",
+                                      zip([eps_r] * len(rows), [area] * len(rows), N_A.tolist(), W.tolist(),
+                                          [row[0] for row in rows]))
+                updated += len(rows)
+                last_id = rows[-1][0]
+
+    def export(self, output_path, chunk_rows=FETCH_ROWS, **filters):
+        """Stream matching results to .csv, .xlsx or .parquet and return the number of rows written"""
+        extension = os.path.splitext(output_path)[1].lower()
+        chunks = self.iter_chunks(chunk_rows, **filters)
+        if extension == ".xlsx":
+            return _export_xlsx(output_path, chunks)
+        if extension == ".parquet":
+            return _export_parquet(output_path, chunks)
+        return _export_csv(output_path, chunks)
+
+
+def _export_csv(output_path, chunks):
+    rows_written = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            rows_written += len(rows)
+    return rows_written
+
+
+def _export_xlsx(output_path, chunks):
+    # openpyxl's write-only mode streams rows to disk instead of building the sheet in memory
+    from openpyxl import Workbook
+
+    # A worksheet holds at most XLSX_MAX_ROWS rows, header included: continue on "Results 2", "Results 3", ...
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(COLUMNS)
+    sheet_rows, rows_written = 1, 0
+    for rows in chunks:
+        for row in rows:
+            if sheet_rows == XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Results {len(workbook.worksheets) + 1}")
+                sheet.append(COLUMNS)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        rows_written += len(rows)
+    workbook.save(output_path)
+    return rows_written
+
+
+def _export_parquet(output_path, chunks):
+    # One Parquet row group per fetched chunk
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string() if name in _TEXT_COLUMNS else
+                         pa.int64() if name in ("id", "n_points") else pa.float64()) for name in COLUMNS])
+    rows_written = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=schema.field(i).type)
+                                                     for i, c in enumerate(columns)], schema=schema))
+            rows_written += len(rows)
+    return rows_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query and export the C-V results database")
+    parser.add_argument("--db", default=None, help=f"Results database (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--batch-id", help="Only results of this Batch ID")
+    parser.add_argument("--from", dest="date_from", help="Earliest Record Date (YYYY-MM-DD or M/D/YYYY)")
+    parser.add_argument("--to", dest="date_to", help="Latest Record Date (YYYY-MM-DD or M/D/YYYY)")
+    parser.add_argument("--frequency", type=float, help="Only results measured at this frequency (Hz)")
+    parser.add_argument("--min-r2", type=float, dest="min_r_squared", help="Only fits with at least this R²")
+    parser.add_argument("--fit-method", dest="method", choices=list(cv_robust.FIT_METHODS),
+                        help="Only fits made with this engine")
+    parser.add_argument("-o", "--output", help="Export matching results to .csv, .xlsx or .parquet")
+    parser.add_argument("--recompute", action="store_true",
+                        help="Re-derive N_A and W of the matching results for --device/--material/--eps-r/--area")
+    cv_profiles.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    filters = {name: getattr(args, name) for name in ("batch_id", "date_from", "date_to", "frequency",
+                                                       "min_r_squared", "method")}
+    with ResultsStore(args.db) as store:
+        if args.recompute:
+            _, eps_r, area = cv_profiles.from_args(parser, args)
+            start = time.perf_counter()
+            rows = store.recompute(eps_r, area, **filters)
+            print(f"Recomputed N_A and W of {rows} results for εr = {eps_r:g}, A = {area:g} m² "
+                  f"in {time.perf_counter() - start:.2f} s")
+        if args.output:
+            rows = store.export(args.output, **filters)
+            print(f"Exported {rows} results to {args.output}")
+        else:
+            print(f"{store.count(**filters)} matching results in {store.db_path}")
+            print(store.query(limit=20, **filters)[["batch_id", "frequency", "record_date", "method", "V_bi", "N_A",
+                                                    "W", "r_squared"]].to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import warnings
+
+import numpy as np
+
+import cv_analysis
+from cv_trace import stage
+
+# Selectable 1/C² fit engines and their display names
+FIT_METHODS = {
+    "ols": "Ordinary LS",
+    "wls-c": "Weighted LS (C weights)",
+    "wls-g": "Weighted LS (C, G weights)",
+    "huber": "Huber",
+    "theil-sen": "Theil-Sen",
+    "ransac": "RANSAC",
+}
+
+DEFAULT_FREQUENCY = 1e6  # Hz, used for G-derived weights when the sweep's frequency is unknown
+
+HUBER_K = 1.345  # 95% efficiency under Gaussian noise
+HUBER_MAX_ITER = 50
+HUBER_TOL = 1e-8  # relative slope change
+
+# Theil-Sen uses every point pair up to this many, then a fixed random subset
+THEIL_SEN_MAX_PAIRS = 20000
+
+RANSAC_TRIALS = 100
+RANSAC_THRESHOLD = 2.5  # inlier band in robust σ of the OLS residuals
+
+# Upper bound on elements of the temporary (rows x pairs/trials x points) arrays
+CHUNK_ELEMENTS = 2 ** 22
+
+_MAD_SCALE = 1.4826
+
+
+def _line(x, Y, W):
+    """Weighted least-squares slope and intercept of every row of Y against x (W = 0 excludes a point)"""
+    sw = W.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = (W * x).sum(axis=1) / sw
+        y_mean = (W * Y).sum(axis=1) / sw
+        xc = x - x_mean[:, None]
+        sxx = (W * xc * xc).sum(axis=1)
+        sxy = (W * xc * (Y - y_mean[:, None])).sum(axis=1)
+        slope = sxy / sxx
+    return slope, y_mean - slope * x_mean
+
+
+def _residuals(x, Y, valid, slope, intercept):
+    R = Y - (slope[:, None] * x + intercept[:, None])
+    R[~valid] = np.nan
+    return R
+
+
+def _median(A):
+    """Row medians ignoring NaN; nanmedian is far slower, so it only runs when there are NaNs"""
+    nan = np.isnan(A)
+    if not nan.any():
+        return np.median(A, axis=1)
+    with warnings.catch_warnings():
+        # Sweeps without a single usable point give NaN ("All-NaN slice")
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmedian(A, axis=1)
+
+
+def _robust_scale(R):
+    """Normalized median absolute deviation of each row (NaN entries ignored)"""
+    center = _median(R)
+    scale = _MAD_SCALE * _median(np.abs(R - center[:, None]))
+    # A perfect fit has zero scale; keep the divisions below finite
+    tiny = np.finfo(float).tiny
+    return np.where(scale > 0, scale, tiny)
+
+
+def _fit_stats(x, Y, W, slope, intercept):
+    """r_value and slope standard error of a line under weights W, in the form linregress reports them"""
+    n = (W > 0).sum(axis=1)
+    sw = W.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = (W * x).sum(axis=1) / sw
+        y_mean = (W * Y).sum(axis=1) / sw
+        sxx = (W * (x - x_mean[:, None]) ** 2).sum(axis=1)
+        ss_tot = (W * (Y - y_mean[:, None]) ** 2).sum(axis=1)
+        ss_res = (W * (Y - (slope[:, None] * x + intercept[:, None])) ** 2).sum(axis=1)
+        r_squared = np.clip(1 - ss_res / ss_tot, 0.0, 1.0)
+        r_value = np.where(ss_tot > 0, np.sign(slope) * np.sqrt(r_squared), 0.0)
+        std_err = np.where(n > 2, np.sqrt(ss_res / np.maximum(n - 2, 1) / sxx), 0.0)
+    return r_value, std_err
+
+
+def _weights(method, C, G, frequency):
+    """Inverse-variance weights of 1/C² points
+
+    With a constant relative error on C, σ(1/C²) ∝ 1/C², so the weight is
+    C⁴. "wls-g" also down-weights lossy points: the CMU's error grows with
+    the dissipation factor D = G/(ωC), giving C⁴/(1 + D²).
+    """
+    W = C ** 4
+    if method == "wls-g":
+        if G is None:
+            raise cv_analysis.AnalysisError("G-derived weights need the G column.")
+        frequency = np.asarray(DEFAULT_FREQUENCY if frequency is None else frequency, dtype=float)
+        frequency = np.where(np.isfinite(frequency) & (frequency > 0), frequency, DEFAULT_FREQUENCY)
+        omega = 2 * np.pi * frequency.reshape(-1, 1)
+        W = W / (1 + (G / (omega * C)) ** 2)
+    # Scale each row to a maximum of 1 so weighted sums stay well conditioned
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return W / np.nanmax(W, axis=1, keepdims=True)
+
+
+def _huber(x, Y, valid):
+    """Huber M-estimate by iteratively reweighted least squares, all rows at once"""
+    W = valid.astype(float)
+    slope, intercept = _line(x, Y, W)
+    # Only sweeps that have not converged yet are iterated again
+    active = np.arange(len(Y))
+    for _ in range(HUBER_MAX_ITER):
+        Ya, valid_a = Y[active], valid[active]
+        R = _residuals(x, Ya, valid_a, slope[active], intercept[active])
+        u = np.abs(R) / (HUBER_K * _robust_scale(R)[:, None])
+        with np.errstate(divide="ignore"):
+            W[active] = Wa = np.where(valid_a, np.minimum(1.0, 1 / u), 0.0)
+        new_slope, intercept[active] = _line(x, Ya, Wa)
+        with np.errstate(invalid="ignore"):
+            moving = ~(np.abs(new_slope - slope[active]) <= HUBER_TOL * np.abs(slope[active]))
+        slope[active] = new_slope
+        active = active[moving & np.isfinite(new_slope)]
+        if not len(active):
+            break
+    return slope, intercept, W
+
+
+def _pairs(n, max_pairs, rng):
+    """Every index pair i < j, or max_pairs random distinct pairs when there are more"""
+    if n * (n - 1) // 2 <= max_pairs:
+        return np.triu_indices(n, 1)
+    i = rng.integers(0, n, max_pairs)
+    j = (i + rng.integers(1, n, max_pairs)) % n  # j != i
+    return i, j
+
+
+def _theil_sen(x, Y, valid, rng):
+    """Median of pairwise slopes; intercept is the median of y - slope·x"""
+    i, j = _pairs(len(x), THEIL_SEN_MAX_PAIRS, rng)
+    dx = x[j] - x[i]
+    i, j, dx = i[dx != 0], j[dx != 0], dx[dx != 0]
+
+    Yn = np.where(valid, Y, np.nan)
+    slope = np.empty(len(Y))
+    rows = max(1, CHUNK_ELEMENTS // max(len(i), 1))
+    for start in range(0, len(Y), rows):
+        block = Yn[start:start + rows]
+        slope[start:start + rows] = _median((block[:, j] - block[:, i]) / dx)
+    intercept = _median(Yn - slope[:, None] * x)
+    return slope, intercept, valid.astype(float)
+
+
+def _ransac(x, Y, valid, rng):
+    """Best two-point line by inlier count over RANSAC_TRIALS samples, refitted on its inliers"""
+    n = len(x)
+    i, j = _pairs(n, RANSAC_TRIALS, rng)
+    dx = x[j] - x[i]
+
+    slope, intercept = _line(x, Y, valid.astype(float))
+    band = RANSAC_THRESHOLD * _robust_scale(_residuals(x, Y, valid, slope, intercept))
+
+    Yn = np.where(valid, Y, np.nan)
+    W = np.zeros_like(Y)
+    rows = max(1, CHUNK_ELEMENTS // (len(i) * n))
+    for start in range(0, len(Y), rows):
+        block = Yn[start:start + rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slopes = (block[:, j] - block[:, i]) / dx
+            intercepts = block[:, i] - slopes * x[i]
+            # Distances in units of the inlier band, computed in place on one (rows, trials, points) array
+            scaled = slopes[..., None] * x
+            scaled += intercepts[..., None]
+            scaled -= block[:, None, :]
+            np.abs(scaled, out=scaled)
+            scaled /= band[start:start + rows, None, None]
+        inliers = scaled <= 1
+        # Most inliers wins; among equals, the smallest total inlier distance (< 1 per point)
+        scaled[~inliers] = 0
+        score = inliers.sum(axis=2) - scaled.sum(axis=2) / (n + 1)
+        score[~np.isfinite(slopes)] = -np.inf
+        best = np.argmax(score, axis=1)
+        W[start:start + rows] = inliers[np.arange(len(block)), best]
+
+    # Rows where no sample produced a usable line keep every valid point
+    W[W.sum(axis=1) < 2] = valid[W.sum(axis=1) < 2]
+    slope, intercept = _line(x, Y, W)
+    return slope, intercept, W
+
+
+def fit_sweeps(V, C, G=None, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, method="huber",
+               eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA, frequency=None, seed=0):
+    """Fit 1/C² vs V with the chosen engine for many sweeps sharing one voltage grid
+
+    V is the (n_points,) bias vector and C (and G for "wls-g") are
+    (n_sweeps, n_points) arrays; frequency is in Hz, one value or one per
+    sweep. Each engine runs on all sweeps at once
+    and returns a CVBatchResult, so callers handle every method like
+    cv_analysis.fit_sweeps. r_value and std_err describe the returned line
+    under the engine's final weights (Huber weights, RANSAC inliers, all
+    points for Theil-Sen). Non-finite points are skipped per sweep.
+    """
+    if method not in FIT_METHODS:
+        raise ValueError(f"Unknown fit method: {method}")
+
+    with stage(f"fit {method}"):
+        return _fit_sweeps(V, C, G, min_v, max_v, method, eps_r, A, frequency, seed)
+
+
+def _fit_sweeps(V, C, G, min_v, max_v, method, eps_r, A, frequency, seed):
+    V = np.asarray(V, dtype=float)
+    C = np.atleast_2d(np.asarray(C, dtype=float))
+    if G is not None:
+        G = np.atleast_2d(np.asarray(G, dtype=float))
+
+    mask = (V >= min_v) & (V <= max_v)
+    if np.count_nonzero(mask) < 2:
+        raise cv_analysis.AnalysisError("Not enough data points in the selected voltage range.")
+
+    x = V[mask]
+    with np.errstate(divide="ignore"):
+        Y = 1 / C[:, mask] ** 2
+    valid = np.isfinite(Y)
+    Y = np.where(valid, Y, 0.0)
+    rng = np.random.default_rng(seed)
+
+    if method in ("ols", "wls-c", "wls-g"):
+        W = valid.astype(float)
+        if method != "ols":
+            W = np.where(valid, _weights(method, C[:, mask], None if G is None else G[:, mask], frequency), 0.0)
+            W[~np.isfinite(W)] = 0.0
+        slope, intercept = _line(x, Y, W)
+    elif method == "huber":
+        slope, intercept, W = _huber(x, Y, valid)
+    elif method == "theil-sen":
+        slope, intercept, W = _theil_sen(x, Y, valid, rng)
+    else:
+        slope, intercept, W = _ransac(x, Y, valid, rng)
+
+    r_value, std_err = _fit_stats(x, Y, W, slope, intercept)
+    n_points = valid.sum(axis=1)
+    return cv_analysis.CVBatchResult(slope, intercept, r_value, std_err, n_points, min_v, max_v,
+                                     eps_r * cv_analysis.EPS_0, A, method)
+
+
+def fit_sweep(V, C, G=None, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, method="huber",
+              eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA, frequency=None, seed=0):
+    """Fit one sweep with the chosen engine and return a CVResult"""
+    batch = fit_sweeps(V, np.asarray(C, dtype=float)[None, :], None if G is None else np.asarray(G)[None, :],
+                       min_v, max_v, method, eps_r, A, frequency, seed)
+    if batch.n_points[0] < 2:
+        raise cv_analysis.AnalysisError("Not enough data points in the selected voltage range.")
+    return batch[0]
@@ -0,0 +1,194 @@
+import argparse
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+
+import cv_analysis
+import cv_instrument
+
+
+class DiodeModel:
+    """C-V/G-V response of an abrupt junction with a given V_bi and doping
+
+    1/C² falls linearly towards V_bi with the slope set by N_A, as in
+    'CV sweep data.csv', and flattens just below V_bi where the depletion
+    approximation stops holding. G is a constant leakage conductance plus
+    a dissipation term proportional to ωC.
+    """
+
+    def __init__(self, V_bi=2.5, N_A=1e21, eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA, conductance=6.8e-4,
+                 dissipation=0.0, noise=0.005, seed=None):
+        self.V_bi = V_bi
+        self.N_A = N_A  # m⁻³
+        self.eps_s = eps_r * cv_analysis.EPS_0
+        self.A = A
+        self.conductance = conductance
+        self.dissipation = dissipation
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+    def measure(self, V, frequency=cv_instrument.DEFAULT_FREQUENCY):
+        """Return (C, G) at the bias values V"""
+        V = np.asarray(V, dtype=float)
+        slope = -2 / (cv_analysis.Q * self.eps_s * self.A ** 2 * self.N_A)
+        inv_c2 = slope * (np.minimum(V, self.V_bi - 0.5) - self.V_bi)
+        C = 1 / np.sqrt(inv_c2) * (1 + self.noise * self.rng.standard_normal(V.shape))
+        G = self.conductance + 2 * np.pi * frequency * C * self.dissipation
+        return C, G
+
+
+def _read_command(rfile):
+    """Read one command line, returning (header text, binary block payload or None)
+
+    A definite-length block may contain newline bytes, so the line is read
+    up to the block marker and the payload by its declared length.
+    """
+    head = bytearray()
+    while True:
+        ch = rfile.read(1)
+        if not ch:
+            return None, None
+        if ch == b"\n":
+            return head.decode("ascii").strip(), None
+        if ch == b"#":
+            digits = int(rfile.read(1))
+            payload = rfile.read(int(rfile.read(digits)))
+            rfile.readline()
+            return head.decode("ascii").strip(), payload
+        head += ch
+
+
+class SimulatorHandler(socketserver.StreamRequestHandler):
+    """One client session speaking the SCPI subset used by cv_instrument.SCPIInstrument"""
+
+    def setup(self):
+        super().setup()
+        self.reset()
+
+    def reset(self):
+        self.frequency = cv_instrument.DEFAULT_FREQUENCY
+        self.ac_level = cv_instrument.DEFAULT_AC_LEVEL
+        self.bias = 0.0
+        self.mode = "FIX"
+        self.voltages = np.empty(0)
+        self.readings = np.empty(0)
+        self.binary = False
+        self.byte_order = ">"
+        self.errors = []
+
+    def respond(self, data):
+        self.wfile.write((data if isinstance(data, bytes) else data.encode("ascii")) + b"\n")
+
+    def handle(self):
+        while True:
+            header, payload = _read_command(self.rfile)
+            if header is None:
+                return
+            if not header and payload is None:
+                continue
+            command, _, argument = header.partition(" ")
+            try:
+                self.execute(command.upper(), argument.strip(), payload)
+            except (ValueError, IndexError):
+                self.errors.append('-224,"Illegal parameter value"')
+            self.wfile.flush()
+
+    def execute(self, command, argument, payload):
+        model = self.server.model
+        if command == "*IDN?":
+            self.respond("Simulated,CMU-Diode,0,1.0")
+        elif command == "*RST":
+            self.reset()
+        elif command == "*CLS":
+            self.errors = []
+        elif command == ":SYST:ERR?":
+            self.respond(self.errors.pop(0) if self.errors else '+0,"No error"')
+        elif command == ":SENS:FREQ":
+            self.frequency = float(argument)
+        elif command == ":SOUR:VOLT:AC":
+            self.ac_level = float(argument)
+        elif command == ":FORM:DATA":
+            self.binary = argument.upper().startswith("REAL")
+        elif command == ":FORM:BORD":
+            self.byte_order = "<" if argument.upper() == "SWAP" else ">"
+        elif command == ":SOUR:VOLT":
+            self.bias = float(argument)
+        elif command == ":SOUR:VOLT:MODE":
+            self.mode = argument.upper()
+        elif command == ":SOUR:LIST:VOLT":
+            if payload is not None:
+                # Uploads use the same byte order as the instrument's output
+                self.voltages = np.frombuffer(payload, dtype=f"{self.byte_order}f8").astype(float)
+            else:
+                self.voltages = np.array([float(v) for v in argument.split(",")])
+        elif command == ":INIT":
+            voltages = self.voltages if self.mode == "LIST" else np.array([self.bias])
+            self.server.integrate(len(voltages))
+            C, G = model.measure(voltages, self.frequency)
+            self.readings = np.column_stack([C, G]).ravel()
+        elif command == ":FETC?":
+            if self.binary:
+                self.respond(cv_instrument.encode_block(self.readings, self.byte_order))
+            else:
+                self.respond(",".join(f"{v:.6e}" for v in self.readings))
+        elif command == ":MEAS:CG?":
+            self.server.integrate(1)
+            C, G = model.measure(np.array([self.bias]), self.frequency)
+            self.respond(f"{C[0]:.6e},{G[0]:.6e}")
+        else:
+            self.errors.append('-113,"Undefined header"')
+
+
+class SimulatorServer(socketserver.ThreadingTCPServer):
+    """Local TCP stand-in for the CMU, answering from a DiodeModel
+
+    point_time emulates the instrument's integration time per reading so
+    benchmarks can include a realistic measurement cost.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, model=None, point_time=0.0):
+        super().__init__(address, SimulatorHandler)
+        self.model = model or DiodeModel()
+        self.point_time = point_time
+
+    def integrate(self, n_points):
+        if self.point_time:
+            time.sleep(n_points * self.point_time)
+
+
+def start_simulator(model=None, host="127.0.0.1", port=0, point_time=0.0):
+    """Start a simulator on a daemon thread and return the server (port 0 picks a free port)"""
+    server = SimulatorServer((host, port), model, point_time)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated CMU answering SCPI over TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=cv_instrument.DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--v-bi", type=float, default=2.5, help="Built-in potential of the simulated diode (V)")
+    parser.add_argument("--n-a", type=float, default=1e21, help="Doping of the simulated diode (m⁻³)")
+    parser.add_argument("--noise", type=float, default=0.005, help="Relative noise on C")
+    parser.add_argument("--point-time", type=float, default=0.0, help="Integration time per reading (s)")
+    args = parser.parse_args(argv)
+
+    model = DiodeModel(args.v_bi, args.n_a, noise=args.noise)
+    with SimulatorServer((args.host, args.port), model, args.point_time) as server:
+        print(f"Simulated CMU listening on {args.host}:{server.server_address[1]} "
+              f"(V_bi = {args.v_bi} V, N_A = {args.n_a:.3e} m⁻³)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
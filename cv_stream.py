@@ -0,0 +1,200 @@
+import argparse
+import socket
+import sys
+import time
+
+import numpy as np
+
+import cv_analysis
+import cv_instrument
+import cv_parser
+import cv_profiles
+
+
+class RunningFit:
+    """Incremental least-squares fit of y vs x updated in O(1) per point"""
+
+    def __init__(self):
+        self.n = 0
+        self.x_mean = 0.0
+        self.y_mean = 0.0
+        # Centered second moments (Welford updates keep them well conditioned)
+        self.ssxm = 0.0
+        self.ssym = 0.0
+        self.ssxym = 0.0
+
+    def add(self, x, y):
+        self.n += 1
+        dx = x - self.x_mean
+        dy = y - self.y_mean
+        self.x_mean += dx / self.n
+        self.y_mean += dy / self.n
+        self.ssxm += dx * (x - self.x_mean)
+        self.ssym += dy * (y - self.y_mean)
+        self.ssxym += dx * (y - self.y_mean)
+
+    def result(self, min_v, max_v, eps_s=cv_analysis.EPS_R * cv_analysis.EPS_0, A=cv_analysis.AREA):
+        """Return the current fit as a CVResult, or None until it is defined"""
+        if self.n < 2 or self.ssxm == 0:
+            return None
+
+        slope = self.ssxym / self.ssxm
+        intercept = self.y_mean - slope * self.x_mean
+        if self.ssym == 0:
+            r_value = 0.0
+        else:
+            r_value = max(-1.0, min(1.0, self.ssxym / np.sqrt(self.ssxm * self.ssym)))
+        if self.n > 2:
+            std_err = np.sqrt((1 - r_value ** 2) * self.ssym / self.ssxm / (self.n - 2))
+        else:
+            std_err = 0.0
+        return cv_analysis.CVResult(slope, intercept, r_value, std_err, self.n, min_v, max_v, eps_s, A)
+
+
+class StreamingAnalyzer:
+    """Consume (VBias, C, G) points one at a time and keep V_bi, N_A and W current"""
+
+    def __init__(self, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, eps_r=cv_analysis.EPS_R,
+                 A=cv_analysis.AREA):
+        self.min_v = min_v
+        self.max_v = max_v
+        self.eps_s = eps_r * cv_analysis.EPS_0
+        self.A = A
+        self.fit = RunningFit()
+        self.result = None
+
+        # Every received point, kept for plotting or saving the sweep afterwards
+        self.VBias = []
+        self.C = []
+        self.G = []
+
+    def push(self, vbias, c, g=np.nan):
+        """Add one measured point and return the updated CVResult (None until two points are in the window)"""
+        self.VBias.append(vbias)
+        self.C.append(c)
+        self.G.append(g)
+
+        # Unreadable points (NaN, C = 0) are kept for plotting but left out of the fit, as fit_sweep does
+        if np.isfinite(vbias) and np.isfinite(c) and c != 0 and self.min_v <= vbias <= self.max_v:
+            self.fit.add(vbias, 1 / c ** 2)
+            self.result = self.fit.result(self.min_v, self.max_v, self.eps_s, self.A)
+        return self.result
+
+    def consume(self, points):
+        """Push every point from an iterable, yielding the running result after each one"""
+        for point in points:
+            yield self.push(*point)
+
+
+class SimulatedInstrument:
+    """Stand-in for the SMU that replays a recorded sweep file point by point"""
+
+    def __init__(self, file_path, rate=None):
+        # rate is in points per second; None replays as fast as possible
+        self.file_path = file_path
+        self.rate = rate
+
+    def __iter__(self):
+        sweep = cv_parser.parse_sweep(self.file_path)
+        interval = 1 / self.rate if self.rate else 0
+        next_time = time.perf_counter()
+        for vbias, c, g in zip(sweep.VBias, sweep.C, sweep.G):
+            if interval:
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield float(vbias), float(c), float(g)
+
+
+def instrument_points(host, port, voltages, frequency=cv_instrument.DEFAULT_FREQUENCY,
+                      ac_level=cv_instrument.DEFAULT_AC_LEVEL):
+    """Sweep the SCPI instrument at host:port point by point, yielding (VBias, C, G) as readings arrive"""
+    with cv_instrument.SCPIInstrument(host, port) as instrument:
+        print(f"Connected to {instrument.identify()}")
+        instrument.configure(frequency, ac_level)
+        yield from instrument.sweep_points(voltages)
+
+
+def socket_points(host, port, timeout=None):
+    """Yield (VBias, C, G) points from a TCP stream of comma-separated lines
+
+    This is for a server that pushes "VBias,C,G" lines on its own (e.g. a
+    logger relaying the instrument); it sends no commands, so use
+    instrument_points for the instrument's SCPI port.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        with sock.makefile("r", encoding="ascii", newline="\n") as stream:
+            for line in stream:
+                fields = line.strip().split(",")
+                if len(fields) < 2:
+                    continue
+                try:
+                    values = [float(field) for field in fields[:3]]
+                except ValueError:
+                    # Header or status lines from the instrument
+                    continue
+                if len(values) == 2:
+                    values.append(np.nan)
+                yield tuple(values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live C-V analysis of a streamed sweep")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--instrument", metavar="HOST[:PORT]",
+                        help="Sweep the instrument over its raw SCPI socket (default port "
+                             f"{cv_instrument.DEFAULT_PORT}), one point at a time")
+    source.add_argument("--simulate", action="store_true", help="Sweep a local simulated diode (cv_simulator)")
+    source.add_argument("--replay", metavar="CSV", help="Replay a recorded sweep through the simulated instrument")
+    source.add_argument("--connect", metavar="HOST:PORT",
+                        help="Read 'VBias,C,G' lines pushed by a line-streaming server (not the SCPI port)")
+    parser.add_argument("--start", type=float, default=-5.0, help="First bias of --instrument/--simulate (V)")
+    parser.add_argument("--stop", type=float, default=5.0, help="Last bias of --instrument/--simulate (V)")
+    parser.add_argument("--step", type=float, default=0.2, help="Bias step of --instrument/--simulate (V)")
+    parser.add_argument("--frequency", type=float, default=cv_instrument.DEFAULT_FREQUENCY, help="AC frequency (Hz)")
+    parser.add_argument("--ac-level", type=float, default=cv_instrument.DEFAULT_AC_LEVEL, help="AC level (V rms)")
+    parser.add_argument("--rate", type=float, default=None, help="Replay rate in points per second")
+    parser.add_argument("--min-v", type=float, default=cv_analysis.MIN_V, help="Lower bound of the fit window (V)")
+    parser.add_argument("--max-v", type=float, default=cv_analysis.MAX_V, help="Upper bound of the fit window (V)")
+    cv_profiles.add_arguments(parser)
+    args = parser.parse_args(argv)
+    _, eps_r, area = cv_profiles.from_args(parser, args)
+
+    server = None
+    if args.replay:
+        points = SimulatedInstrument(args.replay, args.rate)
+    elif args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        points = socket_points(host, int(port))
+    else:
+        if args.simulate:
+            import cv_simulator
+
+            server = cv_simulator.start_simulator()
+            host, port = server.server_address
+        else:
+            host, port = cv_instrument.parse_address(args.instrument)
+        V = cv_instrument.bias_list(args.start, args.stop, args.step)
+        points = instrument_points(host, port, V, args.frequency, args.ac_level)
+
+    analyzer = StreamingAnalyzer(args.min_v, args.max_v, eps_r, area)
+    try:
+        for vbias, c, g in points:
+            result = analyzer.push(vbias, c, g)
+            if result is None:
+                print(f"V = {vbias:8.3f} V  C = {c:.4e} F  (waiting for fit window)")
+            else:
+                print(f"V = {vbias:8.3f} V  C = {c:.4e} F  V_bi = {result.V_bi:.4f} V  "
+                      f"N_A = {result.N_A / 1e6:.4e} cm⁻³  W = {result.W:.4f} nm  R² = {result.r_squared:.4f}")
+    except (OSError, cv_instrument.InstrumentError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if server is not None:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import atexit
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def max_rss_mb():
+    """Peak resident set size of this process in MB (None where the OS does not report it)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class Tracer:
+    """Opt-in per-stage timers and memory high-water marks
+
+    A disabled tracer costs one attribute check per stage, so the stages
+    stay in the code permanently. Once enabled, every stage records its wall
+    time and, with memory tracking, the peak memory traced by tracemalloc
+    while it ran (NumPy buffers included). Peaks are process-wide: a stage
+    running next to work on another thread also sees that thread's memory.
+    Stages may nest; an outer stage's peak covers its inner ones.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.events = []
+        self.started = time.perf_counter()
+        self._open = []  # [peak bytes seen so far] of every running stage
+        self._lock = threading.Lock()
+
+    def enable(self, memory=True):
+        self.enabled = True
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memory = False
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    def mark(self):
+        """Position in the event list, for summarizing only what was recorded after it"""
+        return len(self.events)
+
+    def _fold_peak(self):
+        # Hand the peak since the last reset to every open stage, then start a new interval
+        peak = tracemalloc.get_traced_memory()[1]
+        for seen in self._open:
+            seen[0] = max(seen[0], peak)
+        tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        """Time the enclosed block as stage name; info is stored with the event"""
+        if not self.enabled:
+            yield
+            return
+
+        seen = [0]
+        if self.memory:
+            with self._lock:
+                self._fold_peak()
+                start_bytes = tracemalloc.get_traced_memory()[0]
+                self._open.append(seen)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            event = {"name": name, "start": start - self.started, "seconds": seconds,
+                     "thread": threading.current_thread().name}
+            with self._lock:
+                if self.memory:
+                    self._fold_peak()
+                    # By identity: nested stages may hold equal [peak] lists
+                    del self._open[next(i for i, item in enumerate(self._open) if item is seen)]
+                    event["peak_mb"] = seen[0] / 2 ** 20
+                    event["delta_mb"] = (tracemalloc.get_traced_memory()[0] - start_bytes) / 2 ** 20
+                event.update(info)
+                self.events.append(event)
+
+    def merge(self, events):
+        """Add events recorded by another process, whose start times are absolute perf_counter values"""
+        with self._lock:
+            self.events.extend(dict(event, start=event["start"] - self.started) for event in events)
+
+    def stages(self, since=0):
+        """Per-stage totals {name: {"count", "seconds", "max_seconds", "peak_mb"}} in order of first use"""
+        totals = {}
+        for event in self.events[since:]:
+            total = totals.setdefault(event["name"], {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] += event["seconds"]
+            total["max_seconds"] = max(total["max_seconds"], event["seconds"])
+            if "peak_mb" in event:
+                total["peak_mb"] = max(total.get("peak_mb", 0.0), event["peak_mb"])
+        return totals
+
+    def summary(self, since=0):
+        """One line for the status bar: time per stage and the memory high-water mark"""
+        totals = self.stages(since)
+        if not totals:
+            return ""
+        parts = [f"{name} {total['seconds'] * 1000:.1f} ms" for name, total in totals.items()]
+        peaks = [total["peak_mb"] for total in totals.values() if "peak_mb" in total]
+        if peaks:
+            parts.append(f"peak {max(peaks):.1f} MB")
+        return ", ".join(parts)
+
+    def to_json(self):
+        """Chrome trace event format (chrome://tracing, Perfetto) plus per-stage totals"""
+        threads = {}
+        trace_events = []
+        for event in self.events:
+            args = {key: value for key, value in event.items() if key not in ("name", "start", "seconds", "thread")}
+            trace_events.append({"name": event["name"], "ph": "X", "pid": os.getpid(),
+                                 "tid": threads.setdefault(event["thread"], len(threads)),
+                                 "ts": event["start"] * 1e6, "dur": event["seconds"] * 1e6, "args": args})
+        return {"traceEvents": trace_events, "stages": self.stages(),
+                "metadata": {"python": platform.python_version(), "platform": platform.platform(),
+                             "max_rss_mb": max_rss_mb(), "memory_tracking": self.memory}}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=1)
+        return path
+
+
+# The process-wide tracer used by the application modules
+tracer = Tracer()
+stage = tracer.stage
+
+
+def start(path=None, memory=True):
+    """Enable the tracer, writing the JSON trace to path when the process exits"""
+    tracer.enable(memory)
+    if path:
+        atexit.register(tracer.save, path)
+
+
+def add_arguments(parser):
+    parser.add_argument("--trace", metavar="JSON", default=os.environ.get("CMU_TRACE"),
+                        help="Time every stage, track peak memory and write a JSON trace to this file "
+                             "(default: $CMU_TRACE)")
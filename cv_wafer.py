@@ -0,0 +1,321 @@
+import argparse
+import bisect
+import math
+import os
+import re
+import sys
+
+import numpy as np
+
+import cv_analysis
+import cv_profiles
+import cv_robust
+
+PARAMETERS = ["V_bi", "N_A", "W", "R²"]
+
+# Axis label and display scale of each parameter on the wafer maps
+PARAMETER_LABELS = {"V_bi": ("V_bi (V)", 1), "N_A": ("N_A (cm⁻³)", 1e-6), "W": ("W (nm)", 1), "R²": ("R²", 1)}
+
+# Tukey fences: values beyond Q1 - k·IQR or Q3 + k·IQR of their wafer are flagged
+OUTLIER_IQR = 1.5
+
+# Die tag in file names such as "A15G2_x3_y-2.csv"
+_DIE_TAG = re.compile(r"(?<![A-Za-z])[xX](-?\d+)[_\- ]*[yY](-?\d+)")
+
+
+def die_location(device_properties, file_path=None):
+    """(wafer, die x, die y) of a sweep, or None when it carries no die coordinates
+
+    Coordinates come from the Die X / Die Y columns, or else from an
+    "x3_y5" tag in the file name. The wafer is the Wafer column when present
+    and the Batch ID otherwise.
+    """
+    wafer = device_properties.get("Wafer", device_properties.get("Batch ID", "N/A"))
+    x, y = device_properties.get("Die X"), device_properties.get("Die Y")
+    if (x is None or y is None) and file_path:
+        match = _DIE_TAG.search(os.path.splitext(os.path.basename(file_path))[0])
+        if match:
+            x, y = match.groups()
+    if x is None or y is None:
+        return None
+    return str(wafer).strip(), int(float(x)), int(float(y))
+
+
+class RunningStats:
+    """Median, quartiles, mean and σ of a changing set of values without rescanning it
+
+    Values are kept in a sorted list (O(log n) search per insert/remove) and
+    the mean and σ in Welford's running form. NaN values are ignored.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.n = 0
+        self._mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        if not math.isfinite(value):
+            return
+        bisect.insort(self.values, value)
+        self.n += 1
+        delta = value - self._mean
+        self._mean += delta / self.n
+        self.m2 += delta * (value - self._mean)
+
+    def remove(self, value):
+        if not math.isfinite(value):
+            return
+        del self.values[bisect.bisect_left(self.values, value)]
+        self.n -= 1
+        if self.n == 0:
+            self._mean = self.m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / self.n
+        self.m2 = max(0.0, self.m2 - delta * (value - self._mean))
+
+    def quantile(self, p):
+        """Linearly interpolated quantile, matching np.percentile's default"""
+        if not self.n:
+            return np.nan
+        position = (self.n - 1) * p
+        low = int(position)
+        high = min(low + 1, self.n - 1)
+        return self.values[low] + (self.values[high] - self.values[low]) * (position - low)
+
+    @property
+    def mean(self):
+        return self._mean if self.n else np.nan
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    def fences(self, k=OUTLIER_IQR):
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+
+
+class WaferMap:
+    """Extracted parameters of a lot, indexed by (wafer, die x, die y)
+
+    Rows are stored column-wise in growable NumPy arrays with a dict index
+    on the die location. Each wafer keeps RunningStats per parameter, so
+    adding or re-measuring a die only updates the statistics of its own
+    wafer; outlier flags are evaluated against those statistics on demand.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.wafer_rows = {}
+        self.stats = {}
+        self.files = []
+        self.size = 0
+        self._x = np.empty(0, dtype=np.int64)
+        self._y = np.empty(0, dtype=np.int64)
+        self._columns = {name: np.empty(0) for name in PARAMETERS}
+        self._wafers = []
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def wafers(self):
+        return list(self.wafer_rows)
+
+    def _grow(self):
+        capacity = max(64, 2 * len(self._x))
+        self._x = np.resize(self._x, capacity)
+        self._y = np.resize(self._y, capacity)
+        for name, column in self._columns.items():
+            self._columns[name] = np.resize(column, capacity)
+
+    def add(self, wafer, x, y, values, file_path=None):
+        """Insert or replace the die at (wafer, x, y); values maps parameter names to numbers"""
+        key = (wafer, int(x), int(y))
+        stats = self.stats.setdefault(wafer, {name: RunningStats() for name in PARAMETERS})
+
+        row = self.index.get(key)
+        if row is None:
+            if self.size == len(self._x):
+                self._grow()
+            row = self.index[key] = self.size
+            self.size += 1
+            self._x[row], self._y[row] = key[1], key[2]
+            self._wafers.append(wafer)
+            self.files.append(file_path)
+            self.wafer_rows.setdefault(wafer, []).append(row)
+        else:
+            # Re-measured die: take its old values out of the wafer statistics
+            for name in PARAMETERS:
+                stats[name].remove(float(self._columns[name][row]))
+            self.files[row] = file_path
+
+        for name in PARAMETERS:
+            value = float(values.get(name, np.nan))
+            self._columns[name][row] = value
+            stats[name].add(value)
+
+    def add_result(self, device_properties, result, file_path=None):
+        """Add a CVResult, locating the die from its device properties or file name"""
+        location = die_location(device_properties, file_path)
+        if location is None:
+            raise cv_analysis.AnalysisError("The sweep has no die coordinates (Die X / Die Y or an x_y file tag).")
+        values = {"V_bi": result.V_bi, "N_A": result.N_A, "W": result.W, "R²": result.r_squared}
+        self.add(*location, values, file_path)
+
+    def add_file(self, file_path, min_v=cv_analysis.MIN_V, max_v=cv_analysis.MAX_V, auto_window=False,
+                 cache=None, method="ols", eps_r=cv_analysis.EPS_R, A=cv_analysis.AREA):
+        """Analyze one sweep file and add it to the map"""
+        device_properties, result = cv_analysis.analyze_file(file_path, min_v, max_v, eps_r, A, auto_window,
+                                                             cache=cache, method=method)
+        self.add_result(device_properties, result, file_path)
+
+    def column(self, name, rows=None):
+        values = self._columns[name][:self.size]
+        return values if rows is None else values[rows]
+
+    def outliers(self, wafer, k=OUTLIER_IQR):
+        """Outlier flags per parameter for the dies of one wafer (in wafer_rows order)"""
+        rows = self.wafer_rows[wafer]
+        flags = {}
+        for name in PARAMETERS:
+            low, high = self.stats[wafer][name].fences(k)
+            values = self.column(name, rows)
+            flags[name] = (values < low) | (values > high)
+        return flags
+
+    def summary(self, k=OUTLIER_IQR):
+        """Per-wafer statistics, one row per (Wafer, Parameter)"""
+        import pandas as pd
+
+        records = []
+        for wafer in self.wafers:
+            flags = self.outliers(wafer, k)
+            for name in PARAMETERS:
+                stats = self.stats[wafer][name]
+                records.append((wafer, name, stats.n, stats.median, stats.mean, stats.std, stats.quantile(0.25),
+                                stats.quantile(0.75), int(flags[name].sum())))
+        columns = ["Wafer", "Parameter", "Dies", "Median", "Mean", "σ", "Q1", "Q3", "Outliers"]
+        return pd.DataFrame.from_records(records, columns=columns).set_index(["Wafer", "Parameter"])
+
+    def to_frame(self, k=OUTLIER_IQR):
+        """All dies indexed by (Wafer, Die X, Die Y), with an outlier flag column per parameter"""
+        import pandas as pd
+
+        flags = {name: np.zeros(self.size, dtype=bool) for name in PARAMETERS}
+        for wafer, rows in self.wafer_rows.items():
+            for name, wafer_flags in self.outliers(wafer, k).items():
+                flags[name][rows] = wafer_flags
+
+        data = {"File": self.files}
+        data.update({name: self.column(name) for name in PARAMETERS})
+        data.update({f"{name} Outlier": flags[name] for name in PARAMETERS})
+        index = pd.MultiIndex.from_arrays([self._wafers, self._x[:self.size], self._y[:self.size]],
+                                          names=["Wafer", "Die X", "Die Y"])
+        return pd.DataFrame(data, index=index).sort_index()
+
+    def die_coordinates(self, wafer):
+        """Die X and Die Y arrays of one wafer (in wafer_rows order)"""
+        rows = self.wafer_rows[wafer]
+        return self._x[rows], self._y[rows]
+
+    def grid(self, wafer, name):
+        """(x values, y values, 2D array indexed [y, x]) of one parameter over a wafer, NaN where no die"""
+        rows = self.wafer_rows[wafer]
+        x, y = self.die_coordinates(wafer)
+        xs = np.arange(x.min(), x.max() + 1)
+        ys = np.arange(y.min(), y.max() + 1)
+        values = np.full((len(ys), len(xs)), np.nan)
+        values[y - ys[0], x - xs[0]] = self.column(name, rows)
+        return xs, ys, values
+
+
+def plot_wafer_maps(wafer_map, parameter="V_bi", fig=None, k=OUTLIER_IQR):
+    """Heatmap of one parameter for every wafer, with outlier dies marked"""
+    if fig is None:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(4.5 * min(len(wafer_map.wafers), 3), 4 * math.ceil(len(wafer_map.wafers) / 3)),
+                     dpi=100)
+
+    label, scale = PARAMETER_LABELS[parameter]
+    wafers = wafer_map.wafers
+    cols = min(len(wafers), 3)
+    rows = math.ceil(len(wafers) / cols)
+    for i, wafer in enumerate(wafers):
+        ax = fig.add_subplot(rows, cols, i + 1)
+        xs, ys, values = wafer_map.grid(wafer, parameter)
+        image = ax.imshow(values * scale, origin='lower', cmap='viridis', interpolation='nearest',
+                          extent=(xs[0] - 0.5, xs[-1] + 0.5, ys[0] - 0.5, ys[-1] + 0.5))
+        fig.colorbar(image, ax=ax, label=label)
+
+        x, y = wafer_map.die_coordinates(wafer)
+        flagged = wafer_map.outliers(wafer, k)[parameter]
+        if flagged.any():
+            ax.scatter(x[flagged], y[flagged], marker='x', color='red', s=60, label='Outlier')
+            ax.legend(loc='upper right', fontsize='small')
+
+        ax.set_xlabel('Die X')
+        ax.set_ylabel('Die Y')
+        ax.set_title(f'{wafer}: {parameter}')
+    fig.tight_layout()
+    return fig
+
+
+def main(argv=None):
+    import cv_batch
+    import cv_cache
+
+    parser = argparse.ArgumentParser(description="Per-wafer statistics and wafer maps of V_bi, N_A, W and R²")
+    parser.add_argument("inputs", nargs="+", help="Sweep CSV files, directories or glob patterns")
+    parser.add_argument("--min-v", type=float, default=cv_analysis.MIN_V, help="Lower bound of the fit window (V)")
+    parser.add_argument("--max-v", type=float, default=cv_analysis.MAX_V, help="Upper bound of the fit window (V)")
+    parser.add_argument("--auto-window", action="store_true", help="Pick the most linear 1/C² window per file")
+    parser.add_argument("--fit-method", choices=list(cv_robust.FIT_METHODS), default="ols",
+                        help="Fit engine for the 1/C² regression (default: ols)")
+    cv_cache.add_arguments(parser)
+    parser.add_argument("--iqr", type=float, default=OUTLIER_IQR, help="Outlier fence multiplier (× IQR)")
+    parser.add_argument("-o", "--output", help="Write the per-die table to this CSV")
+    parser.add_argument("--summary", help="Write the per-wafer statistics to this CSV")
+    parser.add_argument("--plot", help="Save wafer maps to this image file")
+    parser.add_argument("--parameter", choices=PARAMETERS, default="V_bi", help="Parameter shown on the wafer maps")
+    cv_profiles.add_arguments(parser)
+    args = parser.parse_args(argv)
+    _, eps_r, area = cv_profiles.from_args(parser, args)
+
+    files = cv_batch.collect_files(args.inputs)
+    if not files:
+        parser.error("no sweep files found")
+
+    cache = cv_cache.from_args(args)
+    wafer_map = WaferMap()
+    for file_path in files:
+        try:
+            wafer_map.add_file(file_path, args.min_v, args.max_v, args.auto_window, cache, args.fit_method, eps_r,
+                                   area)
+        except (OSError, ValueError, cv_analysis.AnalysisError) as e:
+            print(f"Skipped {file_path}: {e}", file=sys.stderr)
+
+    if not len(wafer_map):
+        print("No sweeps with die coordinates.", file=sys.stderr)
+        return 1
+
+    summary = wafer_map.summary(args.iqr)
+    print(summary.to_string())
+    if args.output:
+        wafer_map.to_frame(args.iqr).to_csv(args.output)
+    if args.summary:
+        summary.to_csv(args.summary)
+    if args.plot:
+        plot_wafer_maps(wafer_map, args.parameter, k=args.iqr).savefig(args.plot)
+        print(f"Wafer maps written to {args.plot}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
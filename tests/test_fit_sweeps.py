@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import cv_analysis
+
+
+def make_sweeps(n_sweeps=5, n_points=41, seed=0):
+    """Noisy sweeps on one grid whose 1/C² falls linearly like the sample data"""
+    rng = np.random.default_rng(seed)
+    V = np.linspace(-6.0, 0.0, n_points)
+    invC2 = 1.2e20 * (3.0 - V) * (1 + 0.01 * rng.standard_normal((n_sweeps, n_points)))
+    return V, 1 / np.sqrt(invC2)
+
+
+def assert_matches_fit_sweep(V, C, batch):
+    for i, row in enumerate(C):
+        with np.errstate(divide="ignore"):
+            expected = cv_analysis.fit_sweep(V, 1 / row ** 2)
+        result = batch[i]
+        assert result.n_points == expected.n_points
+        for name in ("slope", "intercept", "r_value", "std_err", "V_bi", "N_A"):
+            assert getattr(result, name) == pytest.approx(getattr(expected, name), rel=1e-9)
+
+
+def test_fit_sweeps_matches_fit_sweep():
+    V, C = make_sweeps()
+    assert_matches_fit_sweep(V, C, cv_analysis.fit_sweeps(V, C))
+
+
+def test_fit_sweeps_skips_non_finite_points_per_sweep():
+    V, C = make_sweeps()
+    window = np.flatnonzero((V >= cv_analysis.MIN_V) & (V <= cv_analysis.MAX_V))
+    C[1, window[3]] = np.nan  # unreadable cell
+    C[3, window[[0, 5]]] = 0.0  # 1/C² = inf
+    batch = cv_analysis.fit_sweeps(V, C)
+
+    assert_matches_fit_sweep(V, C, batch)
+    assert batch[0].n_points == len(window)
+    assert batch[1].n_points == len(window) - 1
+    assert batch[3].n_points == len(window) - 2
+
+
+def test_fit_sweeps_gives_nan_for_a_sweep_without_enough_points():
+    V, C = make_sweeps(n_sweeps=2)
+    window = (V >= cv_analysis.MIN_V) & (V <= cv_analysis.MAX_V)
+    C[1, window] = np.nan
+    C[1, np.flatnonzero(window)[0]] = 1e-10
+    batch = cv_analysis.fit_sweeps(V, C)
+
+    assert np.isfinite(batch.slope[0])
+    assert np.isnan(batch.slope[1]) and np.isnan(batch.V_bi[1])
+    assert batch.n_points[1] == 1
@@ -0,0 +1,128 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+import cv_analysis
+import cv_parser
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CV sweep data.csv")
+
+# The instrument pads header names and writes the metadata on the first data row only
+HEADER = " VBias, C, G,Record Time,Monitor Unit,Frequency ,Batch ID,Record Date"
+
+
+def write_sweep(path, rows, header=HEADER):
+    path.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def old_load(path):
+    """The pandas path parse_sweep replaced: read every column, then scan the metadata columns"""
+    df = cv_analysis.read_sweep(path)
+    return df, cv_analysis.extract_device_properties(df)
+
+
+@pytest.mark.parametrize("text, unit, expected", [
+    ("1000000 Hz", "Hz", (1e6, "Hz")),
+    ("1 MHz", "Hz", (1e6, "Hz")),
+    ("100 kHz", "Hz", (1e5, "Hz")),
+    ("100kHz", None, (1e5, "Hz")),
+    ("33.6 pF", "F", (33.6e-12, "F")),
+    ("2.2 µF", None, (2.2e-6, "F")),
+    ("1e6", "Hz", (1e6, "")),
+    (" -2.5 V ", "V", (-2.5, "V")),
+    (".5 mV", "V", (0.5e-3, "V")),
+    (1e6, "Hz", (1e6, "")),
+])
+def test_parse_quantity(text, unit, expected):
+    value, suffix = cv_parser.parse_quantity(text, unit)
+    assert value == pytest.approx(expected[0], rel=1e-12)
+    assert suffix == expected[1]
+
+
+@pytest.mark.parametrize("text", [None, "", "N/A", "Hz", "5 xHz", "1 2 Hz"])
+def test_parse_quantity_rejects_non_quantities(text):
+    value, suffix = cv_parser.parse_quantity(text, "Hz")
+    assert math.isnan(value) and suffix == ""
+
+
+def test_sample_file_matches_old_read_path():
+    sweep = cv_parser.parse_sweep(SAMPLE)
+    df, device_properties = old_load(SAMPLE)
+
+    for column in ("VBias", "C", "G"):
+        assert np.array_equal(getattr(sweep, column), df[column].to_numpy(dtype=np.float64))
+    assert np.array_equal(sweep.to_frame()["1/C^2"].to_numpy(), df["1/C^2"].to_numpy())
+
+    # The old path kept the padding of the metadata cells
+    parsed = sweep.device_properties()
+    assert parsed.keys() == device_properties.keys()
+    for prop, value in device_properties.items():
+        assert parsed[prop] == (value.strip() if isinstance(value, str) else value)
+    assert sweep.frequency == 1e6
+
+
+def test_metadata_comes_from_the_first_data_row(tmp_path):
+    path = write_sweep(tmp_path / "sweep.csv", [
+        "",  # blank line before the data
+        "-5,3.36E-11,0.00069,  06:59:32, CMU1:MF/SC,100 kHz, A15G2,2/5/2025",
+        "-4.8,3.42E-11,0.000688876,,,,,",
+        "-4.6,3.46E-11,0.000685909,,,,,",
+    ])
+    sweep = cv_parser.parse_sweep(path)
+
+    assert len(sweep) == 3
+    assert sweep.metadata == {"Record Time": "06:59:32", "Monitor Unit": "CMU1:MF/SC", "Frequency": "100 kHz",
+                              "Batch ID": "A15G2", "Record Date": "2/5/2025"}
+    assert sweep.frequency == 1e5
+    properties = sweep.device_properties()
+    assert properties["Number of Data Points"] == 3
+    assert properties["Voltage Range"] == "-5.00 V to -4.60 V"
+
+
+def test_missing_metadata_is_not_available(tmp_path):
+    path = write_sweep(tmp_path / "sweep.csv", ["-5,3.36E-11,0.00069,,,,,", "-4.8,3.42E-11,0.000688876,,,,,"])
+    sweep = cv_parser.parse_sweep(path)
+
+    assert sweep.metadata == {}
+    assert all(sweep.device_properties()[prop] == "N/A" for prop in cv_analysis.PROPERTY_COLUMNS)
+    assert math.isnan(sweep.frequency)
+
+
+def test_location_columns_and_column_order(tmp_path):
+    path = write_sweep(tmp_path / "sweep.csv", ["W07,3,-2,0.0007,3.4E-11,-5", "W07,3,-2,0.0006,3.5E-11,-4"],
+                       header="Wafer,Die X,Die Y, G, C, VBias")
+    sweep = cv_parser.parse_sweep(path)
+
+    assert np.array_equal(sweep.VBias, [-5.0, -4.0])
+    assert np.array_equal(sweep.C, [3.4e-11, 3.5e-11])
+    assert np.array_equal(sweep.G, [0.0007, 0.0006])
+    properties = sweep.device_properties()
+    assert (properties["Wafer"], properties["Die X"], properties["Die Y"]) == ("W07", "3", "-2")
+    assert properties["Batch ID"] == "N/A"
+
+
+def test_stray_text_becomes_nan(tmp_path):
+    path = write_sweep(tmp_path / "sweep.csv", ["-5,3.36E-11,0.00069,,,,,", "-4.8,ERR,0.000688876,,,,,",
+                                                "-4.6,3.46E-11,0.000685909,,,,,"])
+    sweep = cv_parser.parse_sweep(path)
+
+    assert np.isnan(sweep.C[1])
+    assert sweep.C[[0, 2]].tolist() == [3.36e-11, 3.46e-11]
+
+
+def test_missing_columns_raise(tmp_path):
+    path = write_sweep(tmp_path / "sweep.csv", ["-5,0.00069", "-4.8,0.000688876"], header=" VBias, G")
+    with pytest.raises(cv_analysis.MissingColumnsError) as error:
+        cv_parser.parse_sweep(path)
+    assert error.value.missing_cols == ["C"]
+    assert "C" in str(error.value)
+
+
+def test_empty_file_raises(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("", encoding="utf-8")
+    with pytest.raises(cv_analysis.AnalysisError):
+        cv_parser.parse_sweep(str(path))
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import cv_analysis
+import cv_robust
+
+SLOPE, V_BI = -1.2e20, 3.0
+
+
+def make_sweeps(n_sweeps=3, n_points=61, noise=0.002, n_outliers=0, seed=0):
+    """Sweeps whose 1/C² is the line SLOPE·(V - V_BI) plus relative noise, with n_outliers bad points each"""
+    rng = np.random.default_rng(seed)
+    V = np.linspace(-6.0, 0.0, n_points)
+    invC2 = SLOPE * (V - V_BI) * (1 + noise * rng.standard_normal((n_sweeps, n_points)))
+    window = np.flatnonzero((V >= cv_analysis.MIN_V) & (V <= cv_analysis.MAX_V))
+    for row in invC2:
+        # Contact glitches: far too little capacitance, all on the same side of the line
+        row[rng.choice(window, n_outliers, replace=False)] *= 1.5
+    C = 1 / np.sqrt(invC2)
+    G = np.full_like(C, 7e-4)
+    return V, C, G
+
+
+def test_ols_matches_fit_sweep():
+    V, C, G = make_sweeps(n_outliers=4)
+    batch = cv_robust.fit_sweeps(V, C, G, method="ols")
+    for i, row in enumerate(C):
+        expected = cv_analysis.fit_sweep(V, 1 / row ** 2)
+        single = cv_robust.fit_sweep(V, row, G[i], method="ols")
+        for result in (batch[i], single):
+            assert result.n_points == expected.n_points
+            assert result.method == "ols"
+            for name in ("slope", "intercept", "r_value", "std_err", "V_bi", "N_A"):
+                assert getattr(result, name) == pytest.approx(getattr(expected, name), rel=1e-9)
+
+
+@pytest.mark.parametrize("method", list(cv_robust.FIT_METHODS))
+def test_every_method_fits_an_exact_line(method):
+    V, C, G = make_sweeps(noise=0.0)
+    batch = cv_robust.fit_sweeps(V, C, G, method=method, frequency=1e6)
+    assert np.allclose(batch.slope, SLOPE, rtol=1e-9)
+    assert np.allclose(batch.V_bi, V_BI, rtol=1e-9)
+    assert batch[0].method == method
+
+
+@pytest.mark.parametrize("method", ["huber", "theil-sen", "ransac"])
+def test_robust_methods_recover_the_slope_despite_outliers(method):
+    V, C, G = make_sweeps(n_outliers=6)
+    ols = cv_robust.fit_sweeps(V, C, G, method="ols")
+    robust = cv_robust.fit_sweeps(V, C, G, method=method)
+
+    # The outliers pull OLS well off the line; the robust fits stay on it
+    assert np.all(np.abs(ols.slope / SLOPE - 1) > 0.05)
+    assert np.allclose(robust.slope, SLOPE, rtol=0.01)
+    # V_bi is extrapolated well past the window, so the noise weighs more on it
+    assert np.allclose(robust.V_bi, V_BI, rtol=0.02)
+
+
+@pytest.mark.parametrize("method", ["huber", "theil-sen", "ransac"])
+def test_robust_methods_ignore_outliers_on_an_exact_line(method):
+    V, C, G = make_sweeps(noise=0.0, n_outliers=6)
+    robust = cv_robust.fit_sweeps(V, C, G, method=method)
+    assert np.allclose(robust.slope, SLOPE, rtol=1e-6)
+    assert np.allclose(robust.V_bi, V_BI, rtol=1e-6)
+
+
+@pytest.mark.parametrize("method", ["huber", "theil-sen", "ransac"])
+def test_robust_fit_sweep_matches_its_batch_row(method):
+    V, C, G = make_sweeps(n_sweeps=1, n_outliers=6)
+    single = cv_robust.fit_sweep(V, C[0], G[0], method=method, seed=3)
+    batch = cv_robust.fit_sweeps(V, C, G, method=method, seed=3)
+    assert single.slope == batch.slope[0] and single.intercept == batch.intercept[0]
+
+
+@pytest.mark.parametrize("method", ["theil-sen", "ransac"])
+def test_randomized_methods_are_reproducible_for_a_seed(method, monkeypatch):
+    # Few enough pairs that Theil-Sen samples them at random too, instead of using all of them
+    monkeypatch.setattr(cv_robust, "THEIL_SEN_MAX_PAIRS", 100)
+    V, C, G = make_sweeps(n_outliers=6)
+    first = cv_robust.fit_sweeps(V, C, G, method=method, seed=5)
+    second = cv_robust.fit_sweeps(V, C, G, method=method, seed=5)
+    assert np.array_equal(first.slope, second.slope)
+
+
+def test_non_finite_points_are_skipped():
+    V, C, G = make_sweeps(n_outliers=6)
+    window = np.flatnonzero((V >= cv_analysis.MIN_V) & (V <= cv_analysis.MAX_V))
+    C[1, window[2]] = np.nan
+    batch = cv_robust.fit_sweeps(V, C, G, method="huber")
+
+    assert batch.n_points[1] == len(window) - 1
+    assert np.allclose(batch.slope, SLOPE, rtol=0.01)
+
+
+def test_unknown_method_raises():
+    V, C, G = make_sweeps()
+    with pytest.raises(ValueError):
+        cv_robust.fit_sweeps(V, C, G, method="lasso")
+
+
+def test_g_weights_need_g():
+    V, C, _ = make_sweeps()
+    with pytest.raises(cv_analysis.AnalysisError):
+        cv_robust.fit_sweeps(V, C, None, method="wls-g")
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+import cv_analysis
+
+
+def make_sweep(n_points=31, seed=0):
+    """Noisy 1/C² that is linear in reverse bias and bends towards forward bias"""
+    rng = np.random.default_rng(seed)
+    V = np.linspace(-6.0, 1.0, n_points)
+    invC2 = 1.2e20 * (3.0 - V) + 4e19 * np.maximum(V + 1.0, 0.0) ** 2
+    return V, invC2 * (1 + 0.01 * rng.standard_normal(n_points))
+
+
+def brute_force_window(V, invC2, min_points, criterion="r2"):
+    """Refit every window with linregress; ties go to the longer window, as in find_linear_window"""
+    best_score, best_window = -np.inf, None
+    for length in range(min_points, len(V) + 1):
+        for i in range(len(V) - length + 1):
+            fit = stats.linregress(V[i:i + length], invC2[i:i + length])
+            if criterion == "r2":
+                score = fit.rvalue ** 2
+            else:
+                residuals = invC2[i:i + length] - (fit.slope * V[i:i + length] + fit.intercept)
+                score = -np.sum(residuals ** 2) / length
+            if score > best_score or (score == best_score and length > best_window[1] - best_window[0] + 1):
+                best_score, best_window = score, (i, i + length - 1)
+    return V[best_window[0]], V[best_window[1]]
+
+
+@pytest.mark.parametrize("min_v, max_v", [(-5.0, -1.0), (-6.0, 1.0), (-2.3, 0.4), (-5.9, -5.5)])
+def test_fit_matches_linregress(min_v, max_v):
+    V, invC2 = make_sweep()
+    result = cv_analysis.WindowFitter(V, invC2).fit(min_v, max_v)
+
+    window = (V >= min_v) & (V <= max_v)
+    expected = stats.linregress(V[window], invC2[window])
+    assert result.n_points == window.sum()
+    assert result.slope == pytest.approx(expected.slope, rel=1e-9)
+    assert result.intercept == pytest.approx(expected.intercept, rel=1e-9)
+    assert result.r_value == pytest.approx(expected.rvalue, rel=1e-9)
+    assert result.std_err == pytest.approx(expected.stderr, rel=1e-6)
+
+
+def test_fit_matches_fit_sweep_on_unsorted_sweep_with_gaps():
+    V, invC2 = make_sweep()
+    order = np.random.default_rng(1).permutation(len(V))
+    V, invC2 = V[order], invC2[order]
+    invC2[3] = np.nan
+    result = cv_analysis.WindowFitter(V, invC2).fit(-5.0, -1.0)
+    expected = cv_analysis.fit_sweep(V, invC2, -5.0, -1.0)
+
+    assert result.n_points == expected.n_points
+    for name in ("slope", "intercept", "r_value", "V_bi", "N_A"):
+        assert getattr(result, name) == pytest.approx(getattr(expected, name), rel=1e-9)
+
+
+def test_fit_needs_two_points():
+    V, invC2 = make_sweep()
+    fitter = cv_analysis.WindowFitter(V, invC2)
+    with pytest.raises(cv_analysis.AnalysisError):
+        fitter.fit(-5.9, -5.8)
+
+
+@pytest.mark.parametrize("criterion", ["r2", "residual"])
+@pytest.mark.parametrize("min_points", [3, 5, 10])
+def test_find_linear_window_matches_brute_force(criterion, min_points):
+    V, invC2 = make_sweep()
+    expected = brute_force_window(V, invC2, min_points, criterion)
+    assert cv_analysis.find_linear_window(V, invC2, min_points, criterion) == pytest.approx(expected)
+
+
+def test_find_linear_window_accepts_a_window_fitter():
+    V, invC2 = make_sweep()
+    fitter = cv_analysis.WindowFitter(V, invC2)
+    assert cv_analysis.find_linear_window(fitter, None, 5) == cv_analysis.find_linear_window(V, invC2, 5)
+
+
+def test_min_points_is_at_least_three():
+    V, invC2 = make_sweep()
+    assert cv_analysis.find_linear_window(V, invC2, 1) == cv_analysis.find_linear_window(V, invC2, 3)
+
+
+def test_min_points_equal_to_sweep_length_returns_whole_sweep():
+    V, invC2 = make_sweep()
+    assert cv_analysis.find_linear_window(V, invC2, len(V)) == (V[0], V[-1])
+
+
+def test_min_points_longer_than_sweep_raises():
+    V, invC2 = make_sweep()
+    with pytest.raises(cv_analysis.AnalysisError):
+        cv_analysis.find_linear_window(V, invC2, len(V) + 1)
+    with pytest.raises(cv_analysis.AnalysisError):
+        cv_analysis.find_linear_window(V[:2], invC2[:2], 1)
+
+
+def test_unknown_criterion_raises():
+    V, invC2 = make_sweep()
+    with pytest.raises(ValueError):
+        cv_analysis.find_linear_window(V, invC2, criterion="aic")
+
+
+def test_progress_reports_every_window_length():
+    V, invC2 = make_sweep()
+    fractions = []
+    cv_analysis.find_linear_window(V, invC2, 10, progress=fractions.append)
+
+    assert len(fractions) == len(V) - 10 + 1
+    assert fractions[0] == 0.0
+    assert all(0.0 <= f < 1.0 for f in fractions)
+    assert fractions == sorted(fractions)
+
+
+def test_progress_can_cancel_the_search():
+    class Cancelled(Exception):
+        pass
+
+    def progress(fraction):
+        calls.append(fraction)
+        if fraction >= 0.5:
+            raise Cancelled
+
+    V, invC2 = make_sweep()
+    calls = []
+    with pytest.raises(Cancelled):
+        cv_analysis.find_linear_window(V, invC2, 5, progress=progress)
+    assert calls[-1] >= 0.5 and len(calls) < len(V) - 5 + 1